@@ -0,0 +1,159 @@
+import bisect
+import math
+from array import array
+from contextlib import contextmanager, nullcontext
+
+from .items import ItemTable
+from .metrics import timed
+
+class StaleAnalyticsError(ValueError):
+    """Raised when analytics are asked for data the inventory no longer holds at their version."""
+
+class InventoryAnalytics:
+    """Aggregate views of an inventory at one version, built from the aggregates and indexes it maintains.
+
+    Columns are read from the live items and raise StaleAnalyticsError once the inventory has moved on.
+    """
+
+    def __init__(self, items_by_id, total_value, category_values, category_counts, quantity_index, version,
+                 lock=None, current_version=None):
+        self.items_by_id = items_by_id
+        self.total_value = total_value
+        self.total_items = len(items_by_id)
+        self.category_values = dict(sorted(category_values.items()))
+        self.category_counts = dict(sorted(category_counts.items()))
+        self.version = version
+        # The inventory's own list, which it copies before changing while this instance is alive
+        self._quantity_index = quantity_index
+        self._lock = lock
+        self._current_version = current_version
+        self._columns = None
+
+    @contextmanager
+    def _consistent_read(self):
+        """Hold the inventory's lock while reading live state, and fail if it has moved past version."""
+        with self._lock.read() if self._lock is not None else nullcontext():
+            if self._current_version is not None and self._current_version() != self.version:
+                raise StaleAnalyticsError(
+                    f"The inventory changed since version {self.version}; call analytics() again."
+                )
+            yield
+
+    @property
+    def category_share(self):
+        """Fraction of the total inventory value held by each category."""
+        if not self.total_value:
+            return {category: 0.0 for category in self.category_values}
+        return {category: value / self.total_value for category, value in self.category_values.items()}
+
+    def low_stock_count(self, threshold=10):
+        """Count the items with quantity below the threshold."""
+        return self._count_below(threshold)
+
+    def _count_below(self, quantity):
+        return bisect.bisect_left(self._quantity_index, (quantity,))
+
+    def _quantity_range(self):
+        """Return the lowest and highest quantity and the item count, or None without items."""
+        if not self._quantity_index:
+            return None
+        return self._quantity_index[0][0], self._quantity_index[-1][0], len(self._quantity_index)
+
+    def quantity_distribution(self, bins=10):
+        """Return ``(low, high, count)`` equal-width quantity bins, the last one closed."""
+        quantity_range = self._quantity_range()
+        if quantity_range is None:
+            return []
+        low, high, total = quantity_range
+        width = max((high - low) / bins, 1)
+        # A width raised to 1 reaches high in fewer bins, and no edge may pass high
+        bins = min(bins, max(math.ceil((high - low) / width), 1))
+        edges = [low + width * i for i in range(bins)] + [high]
+        distribution = []
+        start = 0
+        for i in range(len(edges) - 1):
+            end = total if i == len(edges) - 2 else self._count_below(edges[i + 1])
+            distribution.append((edges[i], edges[i + 1], end - start))
+            start = end
+            if end == total:
+                break
+        return distribution
+
+    def columns(self):
+        """Return array columns id, quantity, price, value and category_code, plus name and categories lists."""
+        if self._columns is None:
+            with self._consistent_read():
+                self._columns = self._build_columns()
+        return self._columns
+
+    @timed("analytics.build_columns")
+    def _build_columns(self):
+        """Copy the item fields into typed array columns."""
+        items = self.items_by_id
+        if isinstance(items, ItemTable):
+            # Copy so exported buffers never block the table from growing
+            ids, quantities, prices = items.ids[:], items.quantities[:], items.prices[:]
+            category_codes, names, categories = items.category_codes[:], list(items.names), list(items.categories)
+        else:
+            ids, quantities, prices, category_codes = array("q"), array("q"), array("d"), array("l")
+            names = []
+            codes = {}
+            for item in items.values():
+                ids.append(item.id)
+                quantities.append(item.quantity)
+                prices.append(item.price)
+                category_codes.append(codes.setdefault(item.category, len(codes)))
+                names.append(item.name)
+            categories = list(codes)
+        values = array("d", map(float.__mul__, map(float, quantities), prices))
+        return {
+            "id": ids,
+            "quantity": quantities,
+            "price": prices,
+            "value": values,
+            "category_code": category_codes,
+            "name": names,
+            "categories": categories,
+        }
+
+    def to_numpy(self):
+        """Return the item columns as NumPy arrays sharing the buffers of the array columns."""
+        import numpy as np
+
+        columns = self.columns()
+        return {
+            name: np.frombuffer(column, dtype=column.typecode) if isinstance(column, array) else np.array(column)
+            for name, column in columns.items()
+        }
+
+    @timed("analytics.category_frame")
+    def category_frame(self):
+        """Return a pandas DataFrame with Category, Value, Share and Items columns."""
+        import pandas as pd
+
+        share = self.category_share
+        return pd.DataFrame({
+            "Category": list(self.category_values),
+            "Value": list(self.category_values.values()),
+            "Share": [share[category] for category in self.category_values],
+            "Items": [self.category_counts[category] for category in self.category_values],
+        })
+
+    @timed("analytics.item_frame")
+    def item_frame(self):
+        """Return a pandas DataFrame with one row per item, built from the column views."""
+        import pandas as pd
+
+        columns = self.to_numpy()
+        if len(columns["categories"]):
+            categories = pd.Categorical.from_codes(columns["category_code"], categories=columns["categories"])
+        else:
+            categories = pd.Categorical([])
+        return pd.DataFrame({
+            "ID": columns["id"],
+            "Name": columns["name"],
+            "Quantity": columns["quantity"],
+            "Price": columns["price"],
+            "Value": columns["value"],
+            "Category": categories,
+        })
@@ -0,0 +1,479 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from . import metrics
+from .events import ThresholdRules, rules_path
+from .inventory import VersionConflictError
+from .items import Item, item_to_dict
+from .retention import RetentionPolicy
+from .storage import open_inventory
+
+# Rendered GET responses kept per URL, each valid for one inventory version
+CACHE_SIZE = 1024
+# Ops one coalesced commit may hold; a single request with more is still applied on its own
+GROUP_OPS = 1000
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT = 15
+
+def _dumps(data):
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def _etag(version):
+    return f'"{version}"'
+
+class ResponseCache:
+    """LRU cache of serialized GET responses, keyed by URL and tagged with the inventory version; event loop only."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+
+    def get(self, key, version):
+        entry = self._entries.get(key)
+        # Any mutation invalidates every entry at once, without tracking what it touched
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, version, body):
+        self._entries[key] = (version, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+class WriteCoalescer:
+    """Applies the mutations of concurrent requests in groups, with one commit per group."""
+
+    def __init__(self, inventory, data_file=None, group_ops=GROUP_OPS):
+        self.inventory = inventory
+        self.data_file = data_file
+        self.group_ops = group_ops
+        self._pending = []
+        self._writer = None
+
+    async def submit(self, ops, expected_version=None):
+        """Apply ops atomically, coalesced with other requests' ops; return the resulting version."""
+        # One writer task applies whatever queued meanwhile, so a lone request waits for nothing
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((ops, expected_version, future))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write())
+        return await future
+
+    def _take_group(self):
+        """Remove and return the next run of pending requests that may share a commit."""
+        # A request with an expected version is always applied on its own; group_ops=1 does that for all
+        if self._pending[0][1] is not None:
+            return [self._pending.pop(0)]
+        size = 0
+        for count, (ops, expected_version, _) in enumerate(self._pending):
+            if expected_version is not None or (count and size + len(ops) > self.group_ops):
+                break
+            size += len(ops)
+        else:
+            count = len(self._pending)
+        group, self._pending = self._pending[:count], self._pending[count:]
+        return group
+
+    async def _write(self):
+        while self._pending:
+            group = self._take_group()
+            try:
+                results = await run_in_threadpool(self._apply, [(ops, version) for ops, version, _ in group])
+            except Exception as e:
+                results = [e] * len(group)
+            for (_, _, future), result in zip(group, results):
+                if future.done():
+                    continue  # the client went away
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _apply(self, group):
+        """Worker thread: apply a group, returning each request's version or exception."""
+        results = None
+        # One apply_batch, journal fsync or SQLite transaction, and save for the group
+        if len(group) > 1:
+            try:
+                self.inventory.apply_batch([op for ops, _ in group for op in ops])
+                results = [self.inventory.version] * len(group)
+                metrics.increment("api.coalesced_requests", len(group))
+            except ValueError:
+                # Apply the requests one by one, so each gets its own result
+                metrics.increment("api.coalescing_fallbacks")
+        if results is None:
+            results = []
+            for ops, expected_version in group:
+                try:
+                    self._apply_ops(ops, expected_version)
+                    results.append(self.inventory.version)
+                except ValueError as e:
+                    results.append(e)
+        metrics.increment("api.commits")
+        if self.data_file is not None:
+            self.inventory.save_to_file(self.data_file)
+        return results
+
+    def _apply_ops(self, ops, expected_version):
+        """Apply one request's ops; a single op goes through its own method for its plain error message."""
+        if len(ops) > 1:
+            self.inventory.apply_batch(ops, expected_version=expected_version)
+        elif ops[0]["op"] == "add":
+            self.inventory.add_item(ops[0]["item"], expected_version=expected_version)
+        elif ops[0]["op"] == "remove":
+            self.inventory.remove_item(ops[0]["id"], expected_version=expected_version)
+        else:
+            self.inventory.update_item(
+                ops[0]["id"], new_quantity=ops[0]["quantity"], new_price=ops[0]["price"], expected_version=expected_version
+            )
+
+    async def drain(self):
+        """Wait until every queued request has been applied."""
+        while self._writer is not None and not self._writer.done():
+            await self._writer
+
+def _int(request, name, default=None, minimum=None):
+    value = request.query_params.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number.") from None
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{name} must be at least {minimum}.")
+    return number
+
+def _number(data, name, required=True):
+    value = data.get(name)
+    if value is None and not required:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number.")
+    try:
+        finite = math.isfinite(value)
+    except OverflowError:
+        finite = False  # an integer too large for a float
+    if not finite:
+        # Python's json module accepts NaN and Infinity, which would poison the totals
+        raise ValueError(f"{name} must be a finite number.")
+    return value
+
+def _quantity(data, required=True):
+    """Read a quantity; an integral float such as 5.0 becomes the int it equals."""
+    value = _number(data, "quantity", required)
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError("quantity must be a whole number.")
+        value = int(value)
+    return value
+
+def _parse_item(data):
+    if not isinstance(data, dict):
+        raise ValueError("An item must be a JSON object.")
+    if not isinstance(data.get("id"), int) or isinstance(data.get("id"), bool):
+        raise ValueError("id must be a whole number.")
+    for field in ("name", "category"):
+        if not isinstance(data.get(field), str) or not data[field].strip():
+            raise ValueError(f"{field} must be a non-empty string.")
+    return Item(data["id"], data["name"].strip(), _quantity(data), _number(data, "price"), data["category"].strip())
+
+def _parse_op(data):
+    """Turn one op of a request body into the op dict apply_batch takes."""
+    if not isinstance(data, dict):
+        raise ValueError("An operation must be a JSON object.")
+    if data.get("op") == "add":
+        return {"op": "add", "item": _parse_item(data.get("item"))}
+    if data.get("op") not in ("update", "remove"):
+        raise ValueError("op must be add, update or remove.")
+    if not isinstance(data.get("id"), int) or isinstance(data.get("id"), bool):
+        raise ValueError("id must be a whole number.")
+    if data["op"] == "remove":
+        return {"op": "remove", "id": data["id"]}
+    return {
+        "op": "update", "id": data["id"],
+        "quantity": _quantity(data, required=False), "price": _number(data, "price", required=False),
+    }
+
+class InventoryAPI:
+    """HTTP/JSON endpoints over one shared inventory, whose version is every response's ETag.
+
+    Inventory calls run in worker threads, so lock waits and fsyncs never stall the event loop.
+    """
+
+    def __init__(self, inventory, data_file=None, cache_size=CACHE_SIZE, group_ops=GROUP_OPS):
+        self.inventory = inventory
+        self.cache = ResponseCache(cache_size)
+        self.writes = WriteCoalescer(inventory, data_file, group_ops)
+
+    def routes(self):
+        return [
+            Route("/items", self.list_items, methods=["GET"]),
+            Route("/items", self.add_item, methods=["POST"]),
+            Route("/items/{item_id:int}", self.get_item, methods=["GET"]),
+            Route("/items/{item_id:int}", self.update_item, methods=["PATCH"]),
+            Route("/items/{item_id:int}", self.remove_item, methods=["DELETE"]),
+            Route("/batch", self.apply_batch, methods=["POST"]),
+            Route("/low-stock", self.low_stock, methods=["GET"]),
+            Route("/alerts", self.alerts, methods=["GET"]),
+            Route("/analytics", self.analytics, methods=["GET"]),
+            Route("/transactions", self.transactions, methods=["GET"]),
+            Route("/value-history", self.value_history, methods=["GET"]),
+            Route("/events", self.events, methods=["GET"]),
+            Route("/metrics", self.metrics, methods=["GET"]),
+        ]
+
+    async def _read(self, request, render):
+        """Answer a GET with render()'s JSON, from the cache when the inventory has not changed."""
+        inventory = self.inventory
+        if inventory.is_stale():
+            await run_in_threadpool(inventory.refresh)
+        version = inventory.version
+        if _etag(version) in request.headers.get("if-none-match", ""):
+            metrics.increment("api.not_modified")
+            return Response(status_code=304, headers={"ETag": _etag(version)})
+        key = (request.url.path, request.url.query)
+        body = self.cache.get(key, version)
+        if body is not None:
+            metrics.increment("api.cache_hits")
+        else:
+            version, body = await run_in_threadpool(self._render, render)
+            if version is None:
+                # Changed while rendering, so no version describes the body
+                return Response(body, media_type="application/json")
+            self.cache.put(key, version, body)
+        return Response(body, media_type="application/json", headers={"ETag": _etag(version)})
+
+    def _render(self, render):
+        """Worker thread: return the version and rendered body, or None for the version if it changed meanwhile."""
+        with self.inventory.read_lock():
+            version = self.inventory.version
+            body = _dumps(render())
+            if self.inventory.version != version:
+                return None, body
+        return version, body
+
+    async def _write(self, request, ops, status_code=200, body=None):
+        """Apply ops through the coalescer, honouring If-Match; respond with the new version."""
+        expected = request.headers.get("if-match")
+        try:
+            expected_version = None if expected is None else int(expected.strip().strip('"'))
+        except ValueError:
+            raise ValueError("If-Match must be a version returned in an ETag.") from None
+        version = await self.writes.submit(ops, expected_version)
+        return JSONResponse(dict(body or {}, version=version), status_code, headers={"ETag": _etag(version)})
+
+    @staticmethod
+    async def _json(request):
+        try:
+            return await request.json()
+        except json.JSONDecodeError:
+            raise ValueError("The request body must be JSON.") from None
+
+    async def list_items(self, request):
+        query = request.query_params.get("query") or None
+        category = request.query_params.get("category") or None
+        sort_by = request.query_params.get("sort_by", "id")
+        descending = request.query_params.get("descending", "").lower() in ("1", "true")
+        offset = _int(request, "offset", 0, minimum=0)
+        limit = _int(request, "limit", 50, minimum=0)
+        return await self._read(request, lambda: {
+            "total": self.inventory.count_items(query, category),
+            "items": [
+                item_to_dict(item)
+                for item in self.inventory.query_items(query, category, sort_by, descending, offset, limit)
+            ],
+        })
+
+    async def get_item(self, request):
+        item_id = request.path_params["item_id"]
+
+        def render():
+            item = self.inventory.items_by_id.get(item_id)
+            return None if item is None else item_to_dict(item)
+        response = await self._read(request, render)
+        if response.body == b"null":
+            return JSONResponse({"error": f"Item with ID {item_id} does not exist."}, 404)
+        return response
+
+    async def add_item(self, request):
+        item = _parse_item(await self._json(request))
+        return await self._write(request, [{"op": "add", "item": item}], 201, {"item": item_to_dict(item)})
+
+    async def update_item(self, request):
+        data = await self._json(request)
+        if not isinstance(data, dict):
+            raise ValueError("The request body must be a JSON object.")
+        op = _parse_op(dict(data, op="update", id=request.path_params["item_id"]))
+        return await self._write(request, [op])
+
+    async def remove_item(self, request):
+        return await self._write(request, [{"op": "remove", "id": request.path_params["item_id"]}])
+
+    async def apply_batch(self, request):
+        data = await self._json(request)
+        if not isinstance(data, dict) or not isinstance(data.get("ops"), list) or not data["ops"]:
+            raise ValueError('The request body must be {"ops": [...]} with at least one op.')
+        ops = []
+        for number, op in enumerate(data["ops"], start=1):
+            try:
+                ops.append(_parse_op(op))
+            except ValueError as e:
+                raise ValueError(f"Operation {number}: {e}") from None
+        return await self._write(request, ops, body={"applied": len(ops)})
+
+    async def low_stock(self, request):
+        threshold = _int(request, "threshold", 10, minimum=0)
+        return await self._read(request, lambda: [
+            item_to_dict(item) for item in self.inventory.get_low_stock_items(threshold)
+        ])
+
+    async def alerts(self, request):
+        events = self.inventory.events
+        if events is None:
+            return JSONResponse({"error": "Events are not enabled for this inventory."}, 404)
+        return await self._read(request, lambda: [alert.to_dict() for alert in events.active_alerts()])
+
+    async def analytics(self, request):
+        threshold = _int(request, "threshold", 10, minimum=0)
+
+        def render():
+            analytics = self.inventory.analytics()
+            return {
+                "total_items": analytics.total_items,
+                "total_value": analytics.total_value,
+                "category_values": analytics.category_values,
+                "category_counts": analytics.category_counts,
+                "low_stock_count": analytics.low_stock_count(threshold),
+            }
+        return await self._read(request, render)
+
+    async def transactions(self, request):
+        offset = _int(request, "offset", 0, minimum=0)
+        limit = _int(request, "limit", 50, minimum=0)
+        item_id = _int(request, "item_id")
+        since = request.query_params.get("since") or None
+        return await self._read(request, lambda: {
+            "total": self.inventory.count_transactions(item_id, since),
+            "transactions": [
+                transaction.to_dict() for transaction in self.inventory.transactions(offset, limit, item_id, since)
+            ],
+        })
+
+    async def value_history(self, request):
+        start = request.query_params.get("start") or None
+        end = request.query_params.get("end") or None
+        bucket = request.query_params.get("bucket", "1h")
+        agg = request.query_params.get("agg", "last")
+        max_points = _int(request, "max_points", 500, minimum=1)
+        return await self._read(request, lambda: [
+            list(point) for point in self.inventory.value_history(
+                start, end, None if bucket == "raw" else bucket, agg, max_points
+            )
+        ])
+
+    async def events(self, request):
+        """Stream change events and alerts as server-sent events."""
+        events = self.inventory.events
+        if events is None:
+            return JSONResponse({"error": "Events are not enabled for this inventory."}, 404)
+        kinds = request.query_params.get("kinds")
+        subscription = events.subscribe_queue(kinds.split(",") if kinds else None)
+
+        async def stream():
+            try:
+                while True:
+                    try:
+                        event = await asyncio.wait_for(subscription.get(), HEARTBEAT)
+                    except asyncio.TimeoutError:
+                        yield b": keep-alive\n\n"
+                        continue
+                    yield b"event: " + event.kind.encode() + b"\ndata: " + _dumps(event.to_dict()) + b"\n\n"
+            finally:
+                subscription.close()
+        return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    async def metrics(self, request):
+        return JSONResponse({"timings": metrics.registry.timings(), "counters": metrics.registry.counters()})
+
+class TimingMiddleware:
+    """Times every request under ``api.<method> <route path>`` in the metrics registry."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router records the matched route in the scope
+            route = scope.get("route")
+            metrics.observe(f"api.{scope['method']} {route.path if route else 'unmatched'}", time.perf_counter() - started)
+
+async def _bad_request(request, exc):
+    return JSONResponse({"error": str(exc)}, 400)
+
+async def _version_conflict(request, exc):
+    return JSONResponse({"error": str(exc), "version": request.app.state.api.inventory.version}, 412)
+
+def create_app(inventory, data_file=None, cache_size=CACHE_SIZE, group_ops=GROUP_OPS):
+    """Return a Starlette app serving inventory; mutations are saved to data_file like the UI's."""
+    api = InventoryAPI(inventory, data_file, cache_size, group_ops)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        # Let queued writes finish before the server exits
+        await api.writes.drain()
+
+    app = Starlette(
+        routes=api.routes(),
+        middleware=[Middleware(TimingMiddleware)],
+        exception_handlers={VersionConflictError: _version_conflict, ValueError: _bad_request},
+        lifespan=lifespan,
+    )
+    app.state.api = api
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the inventory over HTTP/JSON.")
+    parser.add_argument("--data-file", default=os.environ.get("WARETRACK_DATA_FILE", "inventory_data.json"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--retention", default=os.environ.get("WARETRACK_RETENTION", ""),
+                        help='e.g. "raw=7d,hourly=90d,transactions=365d"; empty keeps everything')
+    parser.add_argument("--group-ops", type=int, default=GROUP_OPS,
+                        help="most ops coalesced into one commit; 1 commits every request on its own")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    inventory = open_inventory(args.data_file)
+    inventory.start_compactor(RetentionPolicy.parse(args.retention))
+    inventory.enable_events(ThresholdRules.load(rules_path(args.data_file)))
+    try:
+        uvicorn.run(create_app(inventory, args.data_file, group_ops=args.group_ops),
+                    host=args.host, port=args.port, log_level="warning")
+    finally:
+        inventory.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import gzip
+import json
+import os
+
+from .transactions import Transaction
+
+def archive_path(filename):
+    """Return the transaction archive directory that belongs to a data file."""
+    return os.path.splitext(filename)[0] + ".archive"
+
+class TransactionArchive:
+    """Gzip-compressed JSON Lines segments of transactions moved out of the live log, oldest first."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        # Manifest entries with each segment's size, time span and per-item counts, so queries skip what cannot match
+        self.segments = []
+        self._length = 0
+        # The last segment read, kept decoded so paging through it decompresses it once
+        self._cached = (None, None)
+        self.refresh()
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, "manifest.json")
+
+    def refresh(self):
+        """Re-read the manifest, picking up segments another process archived."""
+        try:
+            with open(self._manifest_path(), "r") as file:
+                segments = json.load(file)["segments"]
+        except FileNotFoundError:
+            segments = []
+        for segment in segments:
+            segment["items"] = {int(item_id): count for item_id, count in segment["items"].items()}
+        self.segments = segments
+        self._length = sum(segment["count"] for segment in segments)
+
+    def __len__(self):
+        return self._length
+
+    def append(self, transactions):
+        """Write transactions, oldest first, as a new segment after the existing ones."""
+        transactions = list(transactions)
+        if not transactions:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"transactions-{self._length:012d}.jsonl.gz"
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as file:
+            for transaction in transactions:
+                file.write(json.dumps(transaction.to_dict(), separators=(",", ":")).encode("utf-8") + b"\n")
+        # Synced before the manifest lists it, so a crash leaves at worst an unlisted file
+        with open(path, "rb") as raw:
+            os.fsync(raw.fileno())
+        items = {}
+        for transaction in transactions:
+            if transaction.item_id is not None:
+                items[transaction.item_id] = items.get(transaction.item_id, 0) + 1
+        segment = {
+            "file": name,
+            "count": len(transactions),
+            "first_time": transactions[0].time,
+            "last_time": transactions[-1].time,
+            "items": items,
+        }
+        manifest = self._manifest_path()
+        with open(manifest + ".tmp", "w") as file:
+            json.dump({"segments": self.segments + [segment]}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(manifest + ".tmp", manifest)
+        self.segments.append(segment)
+        self._length += segment["count"]
+
+    def _read(self, segment):
+        """Return the transactions of a segment, decompressing it unless it was the last one read."""
+        name, transactions = self._cached
+        if name != segment["file"]:
+            with gzip.open(os.path.join(self.directory, segment["file"]), "rb") as file:
+                transactions = [Transaction.from_data(json.loads(line)) for line in file]
+            self._cached = (segment["file"], transactions)
+        return transactions
+
+    def _matches(self, segment, item_id, since):
+        """Return the matching transactions of a segment, oldest first."""
+        return [
+            transaction for transaction in self._read(segment)
+            if (item_id is None or transaction.item_id == item_id) and (since is None or transaction.time >= since)
+        ]
+
+    def _count(self, segment, item_id, since):
+        """Count a segment's matches, from the manifest unless since splits it."""
+        if since is not None and segment["last_time"] < since:
+            return 0
+        if since is None or segment["first_time"] >= since:
+            return segment["count"] if item_id is None else segment["items"].get(item_id, 0)
+        return len(self._matches(segment, item_id, since))
+
+    def count(self, item_id=None, since=None):
+        """Count the archived transactions matching the filters; since is in epoch seconds."""
+        return sum(self._count(segment, item_id, since) for segment in self.segments)
+
+    def query(self, offset=0, limit=50, item_id=None, since=None):
+        """Return up to limit matching transactions, newest first, skipping the newest offset."""
+        page = []
+        for segment in reversed(self.segments):
+            if len(page) >= limit:
+                break
+            count = self._count(segment, item_id, since)
+            if offset >= count:
+                offset -= count
+                continue
+            matches = self._matches(segment, item_id, since)
+            matches.reverse()
+            page.extend(matches[offset:offset + limit - len(page)])
+            offset = 0
+        return page
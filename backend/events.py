@@ -0,0 +1,271 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+
+from .metrics import increment
+
+CHANGE_KINDS = ("item_added", "quantity_changed", "removed")
+ALERT_KINDS = ("low_stock", "restocked")
+EVENT_KINDS = CHANGE_KINDS + ALERT_KINDS
+
+def rules_path(filename):
+    """Return the file that keeps the low-stock alert rules of a data file."""
+    return os.path.splitext(filename)[0] + ".rules.json"
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """One change to an item, or a low-stock alert it raised or cleared."""
+    kind: str
+    item_id: int
+    name: str
+    category: str
+    # After the change (None once removed) and before it (None for an added item)
+    quantity: int = None
+    old_quantity: int = None
+    # The crossed rule's threshold, on alerts only
+    threshold: float = None
+    # The inventory version the change produced, shared by every item of a batch
+    version: int = 0
+    time: int = 0
+
+    def to_dict(self):
+        return asdict(self)
+
+class ThresholdRules:
+    """Low-stock thresholds: a default, overridden per category, overridden per item; None means no alerts."""
+
+    def __init__(self, default=10):
+        self.default = default
+        self.categories = {}
+        self.items = {}
+
+    def threshold(self, item_id, category):
+        """Return the threshold that applies to an item."""
+        threshold = self.items.get(item_id)
+        if threshold is None:
+            threshold = self.categories.get(category, self.default)
+        return threshold
+
+    def set(self, threshold, item_id=None, category=None):
+        """Set the rule of an item, a category or, with neither given, the default; None removes it."""
+        if item_id is not None and category is not None:
+            raise ValueError("A rule applies to an item or to a category, not both.")
+        if threshold is not None and (isinstance(threshold, bool) or threshold < 0):
+            raise ValueError("Threshold must be a non-negative number.")
+        if item_id is not None:
+            rules, key = self.items, item_id
+        elif category is not None:
+            rules, key = self.categories, category
+        else:
+            self.default = threshold
+            return
+        if threshold is None:
+            rules.pop(key, None)
+        else:
+            rules[key] = threshold
+
+    @classmethod
+    def load(cls, filename, default=10):
+        """Read rules saved with save(), or return the default rules if there is no such file."""
+        try:
+            with open(filename, "r") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return cls(default)
+        rules = cls(data["default"])
+        rules.categories = data["categories"]
+        rules.items = {int(item_id): threshold for item_id, threshold in data["items"].items()}
+        return rules
+
+    def save(self, filename):
+        """Atomically write the rules to filename."""
+        with open(filename + ".tmp", "w") as file:
+            json.dump({"default": self.default, "categories": self.categories, "items": self.items}, file, indent=4)
+        os.replace(filename + ".tmp", filename)
+
+class Subscription:
+    """A subscriber to an EventBus; close() unsubscribes it."""
+
+    def __init__(self, bus, kinds, callback=None):
+        self.bus = bus
+        self.kinds = None if kinds is None else frozenset(kinds)
+        self.callback = callback
+
+    def deliver(self, event):
+        self.callback(event)
+
+    def close(self):
+        self.bus._unsubscribe(self)
+
+class QueueSubscription(Subscription):
+    """Delivers events into an asyncio.Queue owned by an event loop; iterate with ``async for``."""
+
+    def __init__(self, bus, kinds, loop, maxsize):
+        super().__init__(bus, kinds)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def deliver(self, event):
+        # Called on whichever thread made the mutation
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop was closed without unsubscribing
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Dropped and counted rather than blocking the mutation
+            self.dropped += 1
+            increment("events.dropped")
+
+    async def get(self):
+        return await self.queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+class EventBus:
+    """Publishes an inventory's changes to subscribers and turns threshold crossings into alerts.
+
+    Callbacks run on the mutating thread under the inventory's lock, so they must be quick and never mutate it.
+    """
+
+    def __init__(self, inventory, rules=None, history=200):
+        self.inventory = inventory
+        self.rules = rules or ThresholdRules()
+        # Open alerts by item id, checked per change in O(1) without rescanning the inventory
+        self.low_stock = {}
+        self.alerts = deque(maxlen=history)
+        self._subscriptions = ()
+        # Held while publishing; an engine without its own write lock holds it around a whole commit
+        self.lock = threading.RLock()
+
+    def subscribe(self, callback, kinds=None):
+        """Call callback(event) for every event, or only for the given kinds; return the Subscription."""
+        return self._subscribe(Subscription(self, self._check_kinds(kinds), callback))
+
+    def subscribe_queue(self, kinds=None, loop=None, maxsize=1000):
+        """Deliver events into an asyncio queue of loop, the running loop by default; return the subscription."""
+        loop = loop or asyncio.get_running_loop()
+        return self._subscribe(QueueSubscription(self, self._check_kinds(kinds), loop, maxsize))
+
+    @staticmethod
+    def _check_kinds(kinds):
+        if kinds is not None:
+            unknown = set(kinds) - set(EVENT_KINDS)
+            if unknown:
+                raise ValueError(f"Unknown event kinds {sorted(unknown)}; use {', '.join(EVENT_KINDS)}.")
+        return kinds
+
+    def _subscribe(self, subscription):
+        with self.lock:
+            # Copied on write, so a subscriber can close itself while an event is being delivered
+            self._subscriptions += (subscription,)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self.lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def _publish(self, event):
+        for subscription in self._subscriptions:
+            if subscription.kinds is None or event.kind in subscription.kinds:
+                try:
+                    subscription.deliver(event)
+                except Exception:
+                    # A failing subscriber must not fail the mutation that was already applied
+                    increment("events.subscriber_errors")
+
+    def change(self, kind, item, old_quantity, version, time):
+        """Publish an applied change to item (as it is now, or was before removal) and check its threshold."""
+        if kind == "quantity_changed" and item.quantity == old_quantity:
+            return  # price-only updates are not stock changes
+        quantity = None if kind == "removed" else item.quantity
+        with self.lock:
+            event = Event(kind, item.id, item.name, item.category, quantity, old_quantity, version=version, time=time)
+            if self._subscriptions:
+                self._publish(event)
+            self._check(event)
+
+    def _check(self, event):
+        """Open or close the item's alert if event took its quantity across its threshold."""
+        threshold = self.rules.threshold(event.item_id, event.category)
+        is_low = event.quantity is not None and threshold is not None and event.quantity < threshold
+        was_low = event.item_id in self.low_stock
+        if is_low:
+            alert = replace(event, kind="low_stock", threshold=threshold)
+            # An open alert is replaced too, so it shows the current quantity
+            self.low_stock[event.item_id] = alert
+            if was_low:
+                return
+        elif was_low:
+            del self.low_stock[event.item_id]
+            if event.kind == "removed":
+                return
+            alert = replace(event, kind="restocked", threshold=threshold)
+        else:
+            return
+        self.alerts.append(alert)
+        increment(f"events.{alert.kind}")
+        self._publish(alert)
+
+    def _recheck(self, items):
+        """Re-evaluate items against the rules, publishing the alerts that opened or closed."""
+        version, now = self.inventory.version, int(datetime.now().timestamp())
+        for item in items:
+            self._check(Event("quantity_changed", item.id, item.name, item.category, item.quantity, item.quantity,
+                              version=version, time=now))
+
+    def reset(self, publish=True):
+        """Rebuild the open alerts from every item under the caller's lock, publishing what changed if publish is set."""
+        with self.lock:
+            items = list(self.inventory.items_by_id.values())
+            if publish:
+                ids = {item.id for item in items}
+                for item_id in [item_id for item_id in self.low_stock if item_id not in ids]:
+                    del self.low_stock[item_id]
+                self._recheck(items)
+            else:
+                self.low_stock = {}
+                for item in items:
+                    threshold = self.rules.threshold(item.id, item.category)
+                    if threshold is not None and item.quantity < threshold:
+                        self.low_stock[item.id] = Event(
+                            "low_stock", item.id, item.name, item.category, item.quantity,
+                            threshold=threshold, version=self.inventory.version,
+                        )
+
+    def set_threshold(self, threshold, item_id=None, category=None):
+        """Set a threshold rule as ThresholdRules.set and re-evaluate only the items it covers."""
+        with self.inventory.read_lock(), self.lock:
+            self.rules.set(threshold, item_id, category)
+            if item_id is not None:
+                item = self.inventory.items_by_id.get(item_id)
+                self._recheck([] if item is None else [item])
+            elif category is not None:
+                self._recheck(self.inventory.get_items_by_category(category))
+            else:
+                self._recheck(list(self.inventory.items_by_id.values()))
+
+    def active_alerts(self):
+        """Return the open low_stock alerts, lowest quantity first."""
+        with self.lock:
+            alerts = list(self.low_stock.values())
+        return sorted(alerts, key=lambda alert: (alert.quantity, alert.item_id))
+
+    def recent_alerts(self, limit=20):
+        """Return up to limit of the latest low_stock and restocked alerts, newest first."""
+        with self.lock:
+            alerts = list(self.alerts)
+        return alerts[:-limit - 1:-1] if limit else []
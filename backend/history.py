@@ -0,0 +1,277 @@
+import json
+import math
+import mmap
+import os
+import shutil
+from array import array
+from datetime import datetime
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+COLUMNS = {"seq": "q", "timestamp": "q", "total": "d"}
+
+def history_path(filename):
+    """Return the history store directory that belongs to a JSON snapshot file."""
+    return os.path.splitext(filename)[0] + ".history"
+
+def to_epoch(timestamp):
+    """Convert a history timestamp string to epoch seconds."""
+    return int(datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp())
+
+def from_epoch(seconds):
+    """Convert epoch seconds back to a history timestamp string."""
+    return datetime.fromtimestamp(seconds).strftime(TIMESTAMP_FORMAT)
+
+class HistoryStore:
+    """Memory-mapped value history that behaves like a list of ``(timestamp, total, {category: value})``.
+
+    Rows are kept in fixed-width column files: seq, timestamp, total and category values (NaN if absent).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._recover_swap()
+        os.makedirs(directory, exist_ok=True)
+        self.categories = []
+        self._category_ids = {}
+        self._width = 8
+        self._load_meta()
+        self._files = {}
+        self._maps = {}
+        self._length = self._recover_length()
+        self._last_seq = self.seqs()[-1] if self._length else 0
+
+    def column_path(self, name):
+        """Return the path of a column file."""
+        return os.path.join(self.directory, name + ".bin")
+
+    def _recover_swap(self):
+        """Finish or roll back a retain() that a crash interrupted between its renames."""
+        old = self.directory + ".old"
+        if os.path.isdir(old):
+            if os.path.isdir(self.directory):
+                shutil.rmtree(old)
+            else:
+                os.rename(old, self.directory)
+        shutil.rmtree(self.directory + ".tmp", ignore_errors=True)
+
+    def _load_meta(self):
+        """Read the category dictionary and value matrix width."""
+        try:
+            with open(os.path.join(self.directory, "meta.json"), "r") as file:
+                meta = json.load(file)
+        except FileNotFoundError:
+            return
+        self.categories = meta["categories"]
+        self._category_ids = {category: index for index, category in enumerate(self.categories)}
+        self._width = meta["width"]
+
+    def _save_meta(self):
+        """Atomically write the category dictionary and value matrix width."""
+        path = os.path.join(self.directory, "meta.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump({"categories": self.categories, "width": self._width}, file)
+        os.replace(path + ".tmp", path)
+
+    def _row_sizes(self):
+        sizes = {name: array(code).itemsize for name, code in COLUMNS.items()}
+        sizes["values"] = 8 * self._width
+        return sizes
+
+    def _recover_length(self):
+        """Return the number of complete rows, trimming any torn trailing append."""
+        sizes = self._row_sizes()
+        length = min(self._file_size(name) // size for name, size in sizes.items())
+        for name, size in sizes.items():
+            if self._file_size(name) != length * size:
+                with open(self.column_path(name), "r+b") as file:
+                    file.truncate(length * size)
+        return length
+
+    def _file_size(self, name):
+        try:
+            return os.path.getsize(self.column_path(name))
+        except FileNotFoundError:
+            open(self.column_path(name), "wb").close()
+            return 0
+
+    def _file(self, name):
+        if name not in self._files:
+            self._files[name] = open(self.column_path(name), "ab")
+        return self._files[name]
+
+    def _column(self, name, code):
+        """Return a zero-copy view of a column file covering all rows."""
+        size = self._length * self._row_sizes()[name]
+        if size == 0:
+            return memoryview(b"").cast(code)
+        mapped = self._maps.get(name)
+        if mapped is None or len(mapped) < size:
+            self._file(name).flush()
+            with open(self.column_path(name), "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[name] = mapped
+        return memoryview(mapped)[:size].cast(code)
+
+    def seqs(self):
+        """Return the mutation sequence number column."""
+        return self._column("seq", "q")
+
+    def timestamps(self):
+        """Return the epoch-seconds timestamp column."""
+        return self._column("timestamp", "q")
+
+    def totals(self):
+        """Return the total inventory value column."""
+        return self._column("total", "d")
+
+    def values(self):
+        """Return the row-major category value matrix as a flat float64 view."""
+        return self._column("values", "d")
+
+    @property
+    def width(self):
+        """Number of category slots per row of the value matrix."""
+        return self._width
+
+    @property
+    def last_seq(self):
+        """Sequence number of the newest row, or 0 when empty."""
+        return self._last_seq
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("history index out of range")
+        row = self.values()[index * self._width:(index + 1) * self._width]
+        category_values = {
+            category: row[category_id]
+            for category_id, category in enumerate(self.categories)
+            if not math.isnan(row[category_id])
+        }
+        return from_epoch(self.timestamps()[index]), self.totals()[index], category_values
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
+
+    def _category_id(self, category):
+        """Return the column index of a category, registering it if new."""
+        category_id = self._category_ids.get(category)
+        if category_id is None:
+            category_id = len(self.categories)
+            if category_id >= self._width:
+                self._widen(self._width * 2)
+            self.categories.append(category)
+            self._category_ids[category] = category_id
+            self._save_meta()
+        return category_id
+
+    def _widen(self, width):
+        """Rewrite the value matrix with more category slots per row."""
+        old_width = self._width
+        old_values = self.values()
+        new_values = array("d", [math.nan]) * (self._length * width)
+        for index in range(self._length):
+            new_values[index * width:index * width + old_width] = array("d", old_values[index * old_width:(index + 1) * old_width])
+        self._close_column("values")
+        path = self.column_path("values")
+        with open(path + ".tmp", "wb") as file:
+            new_values.tofile(file)
+        os.replace(path + ".tmp", path)
+        self._width = width
+
+    def _close_column(self, name):
+        if name in self._files:
+            self._files.pop(name).close()
+        # Views handed out earlier keep the old mapping alive until they are released.
+        self._maps.pop(name, None)
+
+    def append(self, entry, seq=0):
+        """Append a ``(timestamp, total, category_values)`` entry, ignoring seqs not after ``last_seq``."""
+        if seq and seq <= self._last_seq:
+            return
+        timestamp, total, category_values = entry[0], entry[1], entry[2] if len(entry) > 2 else {}
+        row = array("d", [math.nan]) * self._width
+        for category, value in category_values.items():
+            category_id = self._category_id(category)
+            if len(row) < self._width:
+                row.extend([math.nan] * (self._width - len(row)))
+            row[category_id] = value
+        self._file("seq").write(array("q", [seq]).tobytes())
+        self._file("timestamp").write(array("q", [to_epoch(timestamp)]).tobytes())
+        self._file("total").write(array("d", [total]).tobytes())
+        self._file("values").write(row.tobytes())
+        for file in self._files.values():
+            file.flush()
+        self._length += 1
+        self._last_seq = seq
+
+    def extend(self, entries):
+        """Append several entries, e.g. when importing a JSON history list."""
+        for entry in entries:
+            self.append(entry)
+
+    def truncate_after(self, seq):
+        """Drop rows whose sequence number is greater than seq."""
+        seqs = self.seqs()
+        length = self._length
+        while length and seqs[length - 1] > seq:
+            length -= 1
+        seqs.release()
+        if length == self._length:
+            return
+        sizes = self._row_sizes()
+        for name in sizes:
+            self._close_column(name)
+            with open(self.column_path(name), "r+b") as file:
+                file.truncate(length * sizes[name])
+        self._length = length
+        self._last_seq = self.seqs()[-1] if length else 0
+
+    def retain(self, indices):
+        """Rewrite the store keeping only the rows at the given ascending indices."""
+        temp = self.directory + ".tmp"
+        shutil.rmtree(temp, ignore_errors=True)
+        os.makedirs(temp)
+        for name, code in COLUMNS.items():
+            column = self._column(name, code)
+            with open(os.path.join(temp, name + ".bin"), "wb") as file:
+                array(code, [column[index] for index in indices]).tofile(file)
+                file.flush()
+                os.fsync(file.fileno())
+        values = self.values()
+        width = self._width
+        with open(os.path.join(temp, "values.bin"), "wb") as file:
+            for index in indices:
+                file.write(values[index * width:(index + 1) * width])
+            file.flush()
+            os.fsync(file.fileno())
+        with open(os.path.join(temp, "meta.json"), "w") as file:
+            json.dump({"categories": self.categories, "width": width}, file)
+        self.close()
+        # A crash between the renames is repaired by _recover_swap on the next open
+        old = self.directory + ".old"
+        os.rename(self.directory, old)
+        os.rename(temp, self.directory)
+        shutil.rmtree(old)
+        self.refresh()
+
+    def refresh(self):
+        """Pick up rows and categories appended by another process sharing the store."""
+        self.close()
+        self.categories = []
+        self._category_ids = {}
+        self._load_meta()
+        self._length = self._recover_length()
+        self._last_seq = self.seqs()[-1] if self._length else 0
+
+    def close(self):
+        """Close the column files and memory maps."""
+        for name in list(self._files) + list(self._maps):
+            self._close_column(name)
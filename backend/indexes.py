@@ -0,0 +1,141 @@
+import bisect
+import re
+import weakref
+from itertools import islice
+
+TOKEN_PATTERN = re.compile(r"\w+")
+SORT_COLUMNS = ("id", "name", "quantity", "price")
+# Filters matching fewer than 1/SUBSET_SORT_RATIO of the items sort their matches instead of scanning an order
+SUBSET_SORT_RATIO = 16
+
+def name_tokens(name):
+    """Split an item name into the lowercase tokens used by the search index."""
+    return set(TOKEN_PATTERN.findall(name.lower()))
+
+class InventoryIndex:
+    """Incrementally maintained secondary indexes over the items of an inventory.
+
+    Category -> ids, sorted ``(quantity, id)`` and ``(name token, id)`` pairs, and paging orders built on first use.
+    """
+
+    def __init__(self, items=()):
+        self.ids_by_category = {}
+        self.by_quantity = []
+        self.by_token = []
+        self.orders = {}
+        # Readers keeping by_quantity as it was; it is copied before the next change while any is alive
+        self._quantity_readers = weakref.WeakSet()
+        for item in items:
+            self.ids_by_category.setdefault(item.category, set()).add(item.id)
+            self.by_quantity.append((item.quantity, item.id))
+            self.by_token.extend((token, item.id) for token in name_tokens(item.name))
+        self.by_quantity.sort()
+        self.by_token.sort()
+
+    def add(self, item):
+        """Index a newly added item."""
+        # Tokenize and compare first, so an item that cannot be indexed changes nothing
+        tokens = name_tokens(item.name)
+        bisect.insort(self._writable_quantities(), (item.quantity, item.id))
+        self.ids_by_category.setdefault(item.category, set()).add(item.id)
+        for token in tokens:
+            bisect.insort(self.by_token, (token, item.id))
+        for column, order in self.orders.items():
+            bisect.insort(order, (getattr(item, column), item.id))
+
+    def remove(self, item):
+        """Drop a removed item from every index."""
+        ids = self.ids_by_category[item.category]
+        ids.discard(item.id)
+        if not ids:
+            del self.ids_by_category[item.category]
+        self._discard(self._writable_quantities(), (item.quantity, item.id))
+        for token in name_tokens(item.name):
+            self._discard(self.by_token, (token, item.id))
+        for column, order in self.orders.items():
+            self._discard(order, (getattr(item, column), item.id))
+
+    def update(self, item, old_quantity, old_price):
+        """Move an item whose quantity or price changed to its new positions."""
+        if item.quantity != old_quantity:
+            quantities = self._writable_quantities()
+            self._discard(quantities, (old_quantity, item.id))
+            bisect.insort(quantities, (item.quantity, item.id))
+        order = self.orders.get("price")
+        if order is not None and item.price != old_price:
+            self._discard(order, (old_price, item.id))
+            bisect.insort(order, (item.price, item.id))
+
+    def share_quantities(self, reader):
+        """Let reader keep the by_quantity list as it is now instead of copying it."""
+        self._quantity_readers.add(reader)
+
+    def _writable_quantities(self):
+        """Return by_quantity for changing, first copying it if a reader still keeps it."""
+        if self._quantity_readers:
+            self.by_quantity = list(self.by_quantity)
+            self._quantity_readers = weakref.WeakSet()
+        return self.by_quantity
+
+    @staticmethod
+    def _discard(entries, entry):
+        index = bisect.bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            del entries[index]
+
+    def categories(self):
+        """Return the sorted names of categories that have items."""
+        return sorted(self.ids_by_category)
+
+    def category_ids(self, category):
+        """Return the ids of items in a category."""
+        return self.ids_by_category.get(category, set())
+
+    def low_stock_ids(self, threshold):
+        """Return ids with quantity below threshold, lowest quantity first."""
+        end = bisect.bisect_left(self.by_quantity, (threshold,))
+        return [item_id for _, item_id in self.by_quantity[:end]]
+
+    def low_stock_quantities(self, threshold):
+        """Return ``{id: quantity}`` of the items with quantity below threshold."""
+        end = bisect.bisect_left(self.by_quantity, (threshold,))
+        return {item_id: quantity for quantity, item_id in self.by_quantity[:end]}
+
+    def low_stock_count(self, threshold):
+        """Return the number of items with quantity below threshold."""
+        return bisect.bisect_left(self.by_quantity, (threshold,))
+
+    def search_ids(self, query):
+        """Return ids whose name has a token starting with every term of query."""
+        matches = None
+        for term in TOKEN_PATTERN.findall(query.lower()):
+            start = bisect.bisect_left(self.by_token, (term,))
+            end = bisect.bisect_left(self.by_token, (term + "\U0010ffff",))
+            ids = {item_id for _, item_id in self.by_token[start:end]}
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                break
+        return matches or set()
+
+    def order(self, column, items):
+        """Return ``(value, id)`` pairs for every item sorted by column, building the order on first use."""
+        if column == "quantity":
+            return self.by_quantity
+        order = self.orders.get(column)
+        if order is None:
+            order = self.orders[column] = sorted((getattr(item, column), item.id) for item in items)
+        return order
+
+    def page_ids(self, column, items_by_id, ids=None, descending=False, offset=0, limit=50):
+        """Return the ids on one page of the items sorted by column, ties by id, keeping only ids if given."""
+        order = self.order(column, items_by_id.values())
+        if ids is None:
+            if descending:
+                stop = max(len(order) - offset, 0)
+                return [item_id for _, item_id in reversed(order[max(stop - limit, 0):stop])]
+            return [item_id for _, item_id in order[offset:offset + limit]]
+        if len(ids) * SUBSET_SORT_RATIO < len(order):
+            entries = sorted(((getattr(items_by_id[item_id], column), item_id) for item_id in ids), reverse=descending)
+            return [item_id for _, item_id in entries[offset:offset + limit]]
+        matches = (item_id for _, item_id in (reversed(order) if descending else order) if item_id in ids)
+        return list(islice(matches, offset, offset + limit))
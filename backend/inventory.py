@@ -1,128 +1,838 @@
+import bisect
+import itertools
 import json
-from dataclasses import dataclass
+import math
+import os
+import threading
+from contextlib import nullcontext
 from datetime import datetime
 
-@dataclass
-class Item:
-    id: int
-    name: str
-    quantity: int
-    price: float
-    category: str
+from .analytics import InventoryAnalytics
+from .archive import TransactionArchive, archive_path
+from .events import EventBus
+from .history import TIMESTAMP_FORMAT, HistoryStore, history_path
+from .indexes import SORT_COLUMNS, InventoryIndex
+from .items import Item, ItemTable, item_from_dict, item_to_dict
+from .journal import Journal, journal_path
+from .jsonstream import iter_members, write_members
+from .locks import FileLock, ReadWriteLock, lock_path
+from .metrics import increment, timed
+from .retention import DAY, Compactor, thin_indices
+from .rollups import AGGREGATIONS, Rollups, parse_bucket, wall_seconds, wall_timestamp
+from .transactions import Transaction, TransactionLog
 
-class Inventory:
-    def __init__(self):
-        self.items_by_id = {}
-        self.inventory_value_history = []
-        self.transaction_history = []
-        self._total_value = 0.0
+# Quantities are stored as int64, in ItemTable's arrays and in SQLite
+MAX_QUANTITY = 2 ** 63 - 1
 
-    def add_item(self, item):
-        """Add a new item to the inventory with validation."""
+def encode_record(record):
+    """Return a JSON-serializable copy of a mutation record for the journal."""
+    if record["op"] == "batch":
+        return {"op": "batch", "ops": [encode_record(op) for op in record["ops"]]}
+    if record["op"] == "add":
+        return {"op": "add", "item": item_to_dict(record["item"])}
+    return dict(record)
+
+def validate_record(record, items_by_id):
+    """Raise ValueError if a mutation, or any op of a batch, cannot be applied to items_by_id."""
+    if record["op"] != "batch":
+        _validate_op(record, items_by_id, {})
+        return
+    exists = {}
+    for number, op in enumerate(record["ops"], start=1):
+        try:
+            _validate_op(op, items_by_id, exists)
+        except ValueError as e:
+            raise ValueError(f"Operation {number}: {e}") from None
+
+def _is_whole(value):
+    """Whether value is an int; bools and floats, even integral ones, are not quantities."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _is_number(value):
+    """Whether value is an int or a float; bools are neither quantities nor prices."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _validate_op(op, items_by_id, exists):
+    """Validate one op; exists tracks ids added or removed earlier in the same batch."""
+    if op["op"] == "add":
+        item = op["item"]
+        if not isinstance(item.id, int) or isinstance(item.id, bool):
+            raise ValueError("Item ID must be a whole number.")
+        if not isinstance(item.name, str):
+            raise ValueError("Name must be text.")
+        if not isinstance(item.category, str):
+            raise ValueError("Category must be text.")
+        if not _is_whole(item.quantity):
+            raise ValueError("Quantity must be a whole number.")
         if item.quantity < 0:
             raise ValueError("Quantity cannot be negative.")
+        if item.quantity > MAX_QUANTITY:
+            raise ValueError("Quantity is too large.")
+        if not _is_number(item.price) or not math.isfinite(item.price):
+            raise ValueError("Price must be a finite number.")
         if item.price <= 0:
             raise ValueError("Price must be positive.")
-        if item.id in self.items_by_id:
+        if exists.get(item.id, item.id in items_by_id):
             raise ValueError(f"Item with ID {item.id} already exists.")
-        self.items_by_id[item.id] = item
-        self._total_value += item.quantity * item.price
-        self._update_inventory_value_history()
-        self.transaction_history.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), f"Added item {item.id}: {item.name}"))
+        exists[item.id] = True
+    elif op["op"] in ("remove", "update"):
+        item_id = op["id"]
+        if not exists.get(item_id, item_id in items_by_id):
+            raise ValueError(f"Item with ID {item_id} does not exist.")
+        if op["op"] == "remove":
+            exists[item_id] = False
+            return
+        quantity = op.get("quantity")
+        if quantity is not None and not _is_whole(quantity):
+            raise ValueError("New quantity must be a whole number.")
+        if quantity is not None and quantity < 0:
+            raise ValueError("New quantity cannot be negative.")
+        if quantity is not None and quantity > MAX_QUANTITY:
+            raise ValueError("New quantity is too large.")
+        if op.get("price") is not None and (not _is_number(op["price"]) or not math.isfinite(op["price"])):
+            raise ValueError("New price must be a finite number.")
+        if op.get("price") is not None and op["price"] <= 0:
+            raise ValueError("New price must be positive.")
+    else:
+        raise ValueError(f"Unknown operation {op['op']!r}.")
+
+class VersionConflictError(ValueError):
+    """Raised when a mutation expected a different inventory version than the current one."""
+
+class Batch:
+    """Mutations collected by ``with inventory.batch() as batch:`` and applied together on exit."""
+
+    def __init__(self, inventory, expected_version=None):
+        self.inventory = inventory
+        self.expected_version = expected_version
+        self.ops = []
+
+    def add_item(self, item):
+        """Queue adding an item."""
+        self.ops.append({"op": "add", "item": item})
 
     def remove_item(self, item_id):
+        """Queue removing an item."""
+        self.ops.append({"op": "remove", "id": item_id})
+
+    def update_item(self, item_id, new_quantity=None, new_price=None):
+        """Queue updating an item's quantity and/or price."""
+        self.ops.append({"op": "update", "id": item_id, "quantity": new_quantity, "price": new_price})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.inventory.apply_batch(self.ops, expected_version=self.expected_version)
+        return False
+
+class Inventory:
+    def __init__(self, compact_storage=False):
+        # compact_storage=True keeps items in a struct-of-arrays ItemTable instead of a dict of Items
+        self.compact_storage = compact_storage
+        self.items_by_id = ItemTable() if compact_storage else {}
+        self.inventory_value_history = []
+        self.transaction_history = TransactionLog()
+        self._total_value = 0.0
+        self._category_values = {}
+        self._category_counts = {}
+        self._index = InventoryIndex()
+        self._seq = 0
+        self._journal = None
+        self._journal_snapshot = None
+        self._journal_pending = 0
+        self.compact_every = 1000
+        self._history_store = None
+        self._history_file = None
+        self._archive = None
+        self.archived_transactions = 0
+        self._compactor = None
+        self.events = None
+        self._rollups = None
+        self._data_file = None
+        self._storage_signature = None
+        self._analytics = None
+        # Threads sharing this instance take _lock; processes sharing its files take _file_lock
+        self._lock = ReadWriteLock()
+        self._file_lock = None
+
+    @property
+    def version(self):
+        """Monotonically increasing version: the sequence number of the last applied mutation."""
+        return self._seq
+
+    def read_lock(self):
+        """Hold off mutations from other threads while reading items_by_id directly."""
+        return self._lock.read()
+
+    def _storage_lock(self):
+        """Hold the cross-process lock of the journalled or loaded data file, if any."""
+        filename = self._journal_snapshot or self._data_file
+        if filename is None:
+            return nullcontext()
+        if self._file_lock is None or self._file_lock.path != lock_path(filename):
+            self._file_lock = FileLock(lock_path(filename))
+        return self._file_lock.hold()
+
+    def _apply_category_delta(self, category, value_delta, count_delta=0):
+        """Adjust the running value and item count of a category."""
+        count = self._category_counts.get(category, 0) + count_delta
+        if count <= 0:
+            self._category_counts.pop(category, None)
+            self._category_values.pop(category, None)
+            return
+        self._category_counts[category] = count
+        self._category_values[category] = self._category_values.get(category, 0) + value_delta
+
+    def add_item(self, item, expected_version=None):
+        """Add a new item to the inventory with validation."""
+        self._commit({"op": "add", "item": item}, expected_version)
+
+    def remove_item(self, item_id, expected_version=None):
         """Remove an item from the inventory."""
-        if item_id not in self.items_by_id:
-            raise ValueError(f"Item with ID {item_id} does not exist.")
+        self._commit({"op": "remove", "id": item_id}, expected_version)
+
+    def update_item(self, item_id, new_quantity=None, new_price=None, expected_version=None):
+        """Update an item's quantity and/or price with validation."""
+        self._commit({"op": "update", "id": item_id, "quantity": new_quantity, "price": new_price}, expected_version)
+
+    def apply_batch(self, ops, expected_version=None):
+        """Validate and apply several add/update/remove operations atomically, as one journal record and history point.
+
+        Each op is a dict such as ``{"op": "update", "id": 1, "quantity": 5, "price": None}``.
+        """
+        ops = list(ops)
+        if ops:
+            self._commit({"op": "batch", "ops": ops}, expected_version)
+
+    def batch(self, expected_version=None):
+        """Collect mutations in a ``with`` block and apply them with apply_batch on exit."""
+        return Batch(self, expected_version)
+
+    @timed("inventory.commit")
+    def _commit(self, record, expected_version=None):
+        """Validate a mutation, apply it and journal it; VersionConflictError unless still at expected_version."""
+        with self._lock.write(), self._storage_lock() if self._journal is not None else nullcontext():
+            # Catch up with other processes first, so sequence numbers stay unique and nothing is overwritten
+            if self._journal is not None:
+                self._catch_up()
+            if expected_version is not None and expected_version != self._seq:
+                raise VersionConflictError(
+                    f"The inventory changed (version {expected_version} -> {self._seq}). Reload and try again."
+                )
+            validate_record(record, self.items_by_id)
+            now = datetime.now().replace(microsecond=0)
+            self._seq += 1
+            try:
+                # Journalled only once applied, so a record that cannot be applied is never replayed
+                self._apply_record(record, now)
+                if self._journal is not None:
+                    self._journal.append(dict(encode_record(record), seq=self._seq, ts=now.strftime(TIMESTAMP_FORMAT)))
+            except BaseException:
+                # Back to the state the data files hold
+                if self._journal is not None:
+                    self._roll_back()
+                raise
+            if self._journal is not None:
+                self._journal_pending += 1
+            self._remember_storage_signature()
+
+    def _roll_back(self):
+        """Reload the journalled state after a failed commit; the caller holds both locks."""
+        # Reopening the journal cuts off a torn record before the next append
+        self._journal.close()
+        self._clear()
+        self._load(self._journal_snapshot)
+
+    def _apply_record(self, record, now):
+        """Apply a validated (or replayed) mutation made at datetime now and add one value history point."""
+        # Unless a caller still holds the cached analytics, the index need not copy its quantities for them
+        self._analytics = None
+        epoch = int(now.timestamp())
+        for op in record["ops"] if record["op"] == "batch" else [record]:
+            if op["op"] == "add":
+                item = op["item"]
+                self._apply_add(item_from_dict(item) if isinstance(item, dict) else item, epoch)
+            elif op["op"] == "remove":
+                self._apply_remove(op["id"], epoch)
+            else:
+                self._apply_update(op["id"], op.get("quantity"), op.get("price"), epoch)
+        self._update_inventory_value_history(now.strftime(TIMESTAMP_FORMAT))
+
+    def _apply_add(self, item, epoch):
+        """Insert a validated item and record the transaction."""
+        # The index goes first, so an item it rejects leaves the inventory unchanged
+        self._index.add(item)
+        self.items_by_id[item.id] = item
+        self._total_value += item.quantity * item.price
+        self._apply_category_delta(item.category, item.quantity * item.price, 1)
+        self.transaction_history.append(Transaction(
+            epoch, "add", item.id, item.name, new_quantity=item.quantity, new_price=item.price
+        ))
+        if self.events is not None:
+            self.events.change("item_added", item, None, self._seq, epoch)
+
+    def _apply_remove(self, item_id, epoch):
+        """Delete an existing item and record the transaction."""
         item = self.items_by_id[item_id]
-        self._total_value -= item.quantity * item.price
+        self._index.remove(item)
         del self.items_by_id[item_id]
-        self._update_inventory_value_history()
-        self.transaction_history.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), f"Removed item {item_id}: {item.name}"))
+        self._total_value -= item.quantity * item.price
+        self._apply_category_delta(item.category, -item.quantity * item.price, -1)
+        self.transaction_history.append(Transaction(
+            epoch, "remove", item_id, item.name, old_quantity=item.quantity, old_price=item.price
+        ))
+        if self.events is not None:
+            self.events.change("removed", item, item.quantity, self._seq, epoch)
 
-    def update_item(self, item_id, new_quantity=None, new_price=None):
-        """Update an item's quantity and/or price with validation."""
-        if item_id not in self.items_by_id:
-            raise ValueError(f"Item with ID {item_id} does not exist.")
+    def _apply_update(self, item_id, new_quantity, new_price, epoch):
+        """Change an existing item's quantity and/or price and record the transaction."""
         item = self.items_by_id[item_id]
         old_quantity = item.quantity
         old_price = item.price
         old_value = old_quantity * old_price
         if new_quantity is not None:
-            if new_quantity < 0:
-                raise ValueError("New quantity cannot be negative.")
             item.quantity = new_quantity
         if new_price is not None:
-            if new_price <= 0:
-                raise ValueError("New price must be positive.")
             item.price = new_price
+        # Compact storage hands out copies, so store the changed item back
+        self.items_by_id[item_id] = item
         new_value = item.quantity * item.price
         self._total_value += new_value - old_value
-        self._update_inventory_value_history()
-        self.transaction_history.append((
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            f"Updated item {item_id}: Quantity {old_quantity} -> {item.quantity}, Price {old_price} -> {item.price}"
+        self._apply_category_delta(item.category, new_value - old_value)
+        self._index.update(item, old_quantity, old_price)
+        self.transaction_history.append(Transaction(
+            epoch, "update", item_id,
+            old_quantity=old_quantity, new_quantity=item.quantity, old_price=old_price, new_price=item.price,
         ))
+        if self.events is not None:
+            self.events.change("quantity_changed", item, old_quantity, self._seq, epoch)
 
-    def _update_inventory_value_history(self):
+    def _update_inventory_value_history(self, timestamp):
         """Update the inventory value history with total and category-wise values."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        entry = (timestamp, self._total_value, dict(self._category_values))
+        if self._history_store is not None:
+            self._history_store.append(entry, seq=self._seq)
+        else:
+            self.inventory_value_history.append(entry)
+        if self._rollups is not None:
+            self._rollups.add(wall_seconds(timestamp), entry[1], entry[2])
+
+    @timed("inventory.build_rollups")
+    def _value_rollups(self):
+        """Return the value history rollups, building them on first use."""
+        if self._rollups is None:
+            rollups = Rollups()
+            for entry in self.inventory_value_history:
+                rollups.add(wall_seconds(entry[0]), entry[1], entry[2] if len(entry) > 2 else {})
+            self._rollups = rollups
+        return self._rollups
+
+    @timed("inventory.value_history")
+    def value_history(self, start=None, end=None, bucket="1h", agg="last", max_points=500):
+        """Return ``(timestamp, total, {category: value})`` points between start and end, None for unbounded.
+
+        bucket is a size such as "1h", "auto" (at most max_points buckets) or None for raw points; agg reduces each.
+        """
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"Invalid aggregation {agg!r}; use one of {', '.join(AGGREGATIONS)}.")
+        start = None if start is None else wall_seconds(start)
+        end = None if end is None else wall_seconds(end)
+        with self._lock.read():
+            if bucket is None:
+                history = self.inventory_value_history
+                low = 0 if start is None else bisect.bisect_left(history, wall_timestamp(start), key=lambda entry: entry[0])
+                high = len(history) if end is None else bisect.bisect_right(history, wall_timestamp(end), key=lambda entry: entry[0])
+                return list(history[low:high])
+            rollups = self._value_rollups()
+            size = rollups.auto_bucket(start, end, max_points) if bucket == "auto" else parse_bucket(bucket)
+            return rollups.query(start, end, size, agg)
+
+    def _scan_category_aggregates(self):
+        """Compute per-category values and item counts with a full scan of the items."""
         category_values = {}
+        category_counts = {}
         for item in self.items_by_id.values():
             category_values[item.category] = category_values.get(item.category, 0) + item.quantity * item.price
-        total_value = sum(category_values.values())
-        self.inventory_value_history.append((timestamp, total_value, category_values))
+            category_counts[item.category] = category_counts.get(item.category, 0) + 1
+        return category_values, category_counts
+
+    def _recompute_aggregates(self):
+        """Rebuild the running total and per-category aggregates from scratch."""
+        self._category_values, self._category_counts = self._scan_category_aggregates()
+        self._total_value = sum(self._category_values.values())
+
+    def verify_aggregates(self, rel_tol=1e-9):
+        """Check the running aggregates against a full recompute of the items."""
+        with self._lock.read():
+            expected_values, expected_counts = self._scan_category_aggregates()
+        if expected_counts != self._category_counts:
+            return False
+        if not math.isclose(self._total_value, sum(expected_values.values()), rel_tol=rel_tol, abs_tol=1e-6):
+            return False
+        return all(
+            math.isclose(self._category_values[category], value, rel_tol=rel_tol, abs_tol=1e-6)
+            for category, value in expected_values.items()
+        )
+
+    @timed("inventory.transactions")
+    def transactions(self, offset=0, limit=50, item_id=None, since=None):
+        """Return a page of transactions, newest first, of one item and at or after since if given.
+
+        Use count_transactions with the same filters to size the pagination.
+        """
+        since = self._since_epoch(since)
+        with self._lock.read():
+            page = self.transaction_history.query(offset, limit, item_id, since)
+            if len(page) == limit or self._archive is None or not len(self._archive):
+                return page
+            # The page runs past the live log into the archive
+            offset = max(offset - self.transaction_history.count(item_id, since), 0)
+            return page + self._archive.query(offset, limit - len(page), item_id, since)
+
+    @timed("inventory.count_transactions")
+    def count_transactions(self, item_id=None, since=None):
+        """Count the transactions matching the filters of transactions()."""
+        since = self._since_epoch(since)
+        with self._lock.read():
+            count = self.transaction_history.count(item_id, since)
+            if self._archive is not None:
+                count += self._archive.count(item_id, since)
+            return count
+
+    @staticmethod
+    def _since_epoch(since):
+        if isinstance(since, str):
+            since = datetime.strptime(since, TIMESTAMP_FORMAT)
+        return None if since is None else int(since.timestamp())
 
     def total_inventory_value(self):
         """Return the current total inventory value."""
         return self._total_value
 
+    @timed("inventory.get_low_stock_items")
     def get_low_stock_items(self, threshold=10):
-        """Get a list of items with quantity below the threshold."""
-        return [item for item in self.items_by_id.values() if item.quantity < threshold]
+        """Get a list of items with quantity below the threshold, lowest quantity first."""
+        with self._lock.read():
+            return [self.items_by_id[item_id] for item_id in self._index.low_stock_ids(threshold)]
+
+    def low_stock_quantities(self, threshold=10):
+        """Return ``{id: quantity}`` of the items with quantity below the threshold, without building items."""
+        with self._lock.read():
+            return self._index.low_stock_quantities(threshold)
+
+    @timed("inventory.analytics")
+    def analytics(self):
+        """Return aggregate views of the inventory, cached until the next mutation."""
+        with self._lock.read():
+            if self._analytics is None or self._analytics.version != self._seq:
+                increment("inventory.analytics_rebuilds")
+                analytics = InventoryAnalytics(
+                    self.items_by_id,
+                    self._total_value,
+                    self._category_values,
+                    self._category_counts,
+                    self._index.by_quantity,
+                    self._seq,
+                    self._lock,
+                    lambda: self._seq,
+                )
+                self._index.share_quantities(analytics)
+                self._analytics = analytics
+            return self._analytics
+
+    def count_low_stock_items(self, threshold=10):
+        """Count the items with quantity below the threshold."""
+        with self._lock.read():
+            return self._index.low_stock_count(threshold)
+
+    def categories(self):
+        """Return the sorted names of categories that have items."""
+        with self._lock.read():
+            return self._index.categories()
+
+    @timed("inventory.get_items_by_category")
+    def get_items_by_category(self, category):
+        """Get a list of the items in a category."""
+        with self._lock.read():
+            return [self.items_by_id[item_id] for item_id in self._index.category_ids(category)]
+
+    def existing_ids(self, item_ids):
+        """Return the set of item_ids that are in the inventory."""
+        with self._lock.read():
+            return self.items_by_id.keys() & item_ids
+
+    @timed("inventory.search_items")
+    def search_items(self, query):
+        """Find items by exact ID or by name words starting with each term of the query."""
+        with self._lock.read():
+            return [self.items_by_id[item_id] for item_id in sorted(self._search_ids(query))]
+
+    def _search_ids(self, query):
+        ids = self._index.search_ids(query)
+        query = query.strip()
+        if query.isdigit() and int(query) in self.items_by_id:
+            ids.add(int(query))
+        return ids
+
+    def _matching_ids(self, query, category):
+        """Return the ids matching a search query and a category, or None if neither is given."""
+        ids = self._search_ids(query) if query is not None else None
+        if category is not None:
+            category_ids = self._index.category_ids(category)
+            ids = category_ids if ids is None else ids & category_ids
+        return ids
+
+    @timed("inventory.query_items")
+    def query_items(self, query=None, category=None, sort_by="id", descending=False, offset=0, limit=50):
+        """Return a page of the items matching query and category, sorted by sort_by ("id", "name", "quantity" or "price").
+
+        Use count_items with the same filters to size the pagination.
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Invalid sort column {sort_by!r}; use one of {', '.join(SORT_COLUMNS)}.")
+        with self._lock.read():
+            # Pages come from presorted indexes, so the cost depends on the page rather than the catalog
+            ids = self._matching_ids(query, category)
+            page = self._index.page_ids(sort_by, self.items_by_id, ids, descending, offset, limit)
+            return [self.items_by_id[item_id] for item_id in page]
+
+    def count_items(self, query=None, category=None):
+        """Count the items matching the filters of query_items()."""
+        with self._lock.read():
+            ids = self._matching_ids(query, category)
+            return len(self.items_by_id) if ids is None else len(ids)
+
+    def enable_journal(self, filename="inventory_data.json", compact_every=1000):
+        """Persist mutations by appending to a journal next to filename instead of rewriting it."""
+        self._journal = Journal(journal_path(filename))
+        self._journal_snapshot = filename
+        self.compact_every = compact_every
+
+    def enable_history_store(self, filename="inventory_data.json"):
+        """Keep the value history in a columnar, memory-mapped store next to filename."""
+        self._history_store = HistoryStore(history_path(filename))
+        self._history_file = filename
+        self.inventory_value_history = self._history_store
+
+    def enable_archive(self, filename="inventory_data.json"):
+        """Keep transactions archived by a retention policy in compressed segments next to filename."""
+        self._archive = TransactionArchive(archive_path(filename))
+
+    def enable_events(self, rules=None):
+        """Publish every applied change, including other processes' replayed ones, and low-stock alert on an EventBus."""
+        with self._lock.write():
+            if self.events is None:
+                self.events = EventBus(self, rules)
+                self.events.reset(publish=False)
+        return self.events
+
+    def _includes_history(self, filename):
+        """Whether a snapshot written to filename must carry the value history itself."""
+        return self._history_store is None or filename != self._history_file
 
+    @timed("inventory.compact")
+    def compact(self):
+        """Write a fresh snapshot of the journalled file and truncate its journal."""
+        if self._journal is None:
+            raise ValueError("Journal mode is not enabled.")
+        with self._lock.write(), self._storage_lock():
+            # Fold in other processes' records first, or truncating would drop them
+            self._catch_up()
+            self._compact()
+
+    def _compact(self):
+        """Snapshot and truncate the journal; the caller holds both locks and has caught up."""
+        self._write_snapshot(self._journal_snapshot, self._includes_history(self._journal_snapshot))
+        # Records already covered by the snapshot's "seq" are skipped on replay,
+        # so a crash between the rename and the truncate loses nothing.
+        self._journal.truncate()
+        self._journal_pending = 0
+        self._remember_storage_signature()
+
+    @timed("inventory.apply_retention")
+    def apply_retention(self, policy, now=None):
+        """Thin the value history and archive old transactions as a RetentionPolicy says; return how many of each."""
+        return self._maintain(policy, now, compact=False)
+
+    def run_maintenance(self, policy=None, now=None):
+        """Apply policy, if given, then compact the journal; what the background Compactor runs."""
+        return self._maintain(policy, now, compact=True)
+
+    def _maintain(self, policy, now, compact):
+        now = now or datetime.now()
+        with self._lock.write(), self._storage_lock() if self._journal is not None else nullcontext():
+            if self._journal is not None:
+                self._catch_up()
+            result = {"history_points_dropped": 0, "transactions_archived": 0}
+            if policy is not None:
+                result["history_points_dropped"] = self._thin_history(policy, now)
+                result["transactions_archived"] = self._archive_transactions(policy, now)
+            # Snapshot a change at once, so other processes reload instead of replaying over archived entries
+            if self._journal is not None and (compact or any(result.values())):
+                self._compact()
+            else:
+                self._remember_storage_signature()
+        increment("inventory.history_points_dropped", result["history_points_dropped"])
+        increment("inventory.transactions_archived", result["transactions_archived"])
+        return result
+
+    def _thin_history(self, policy, now):
+        """Drop the value history points policy no longer keeps; return how many."""
+        if policy.raw_days is None:
+            return 0
+        history = self.inventory_value_history
+        raw_after = wall_seconds(now) - policy.raw_days * DAY
+        # Only points older than the raw window can be thinned
+        end = bisect.bisect_left(history, raw_after, key=lambda entry: wall_seconds(entry[0]))
+        kept = thin_indices([wall_seconds(entry[0]) for entry in history[:end]], wall_seconds(now), policy)
+        if len(kept) == end:
+            return 0
+        if self._history_store is not None:
+            self._history_store.retain(kept + list(range(end, len(history))))
+        else:
+            self.inventory_value_history = [history[index] for index in kept] + history[end:]
+        self._rollups = None
+        return end - len(kept)
+
+    def _archive_transactions(self, policy, now):
+        """Move whole segments of transactions older than policy allows into the archive; return how many."""
+        if policy.transaction_days is None:
+            return 0
+        if self._archive is None:
+            raise ValueError("Archiving transactions needs enable_archive().")
+        cutoff = now.timestamp() - policy.transaction_days * DAY
+        log = self.transaction_history
+        archived = 0
+        # Only full segments are archived; the last one is still being appended to
+        while len(log.segments) > 1 and log.segments[0][-1].time < cutoff:
+            self._archive.append(log.segments[0])
+            segment = log.drop_oldest_segment()
+            archived += len(segment)
+            self.archived_transactions += len(segment)
+        return archived
+
+    def start_compactor(self, policy=None, interval=3600):
+        """Run maintenance with policy on a background thread every interval seconds; return the Compactor.
+
+        save_to_file then hands journal compaction to the thread.
+        """
+        if self._compactor is None:
+            self._compactor = Compactor(self, policy, interval).start()
+        return self._compactor
+
+    @timed("inventory.save_to_file")
     def save_to_file(self, filename="inventory_data.json"):
         """Save inventory data to a JSON file."""
-        data = {
-            "items": [
-                {
-                    "id": item.id,
-                    "name": item.name,
-                    "quantity": item.quantity,
-                    "price": item.price,
-                    "category": item.category,
-                }
-                for item in self.items_by_id.values()
-            ],
-            "history": self.inventory_value_history,
-            "transactions": self.transaction_history,
-        }
-        with open(filename, "w") as file:
-            json.dump(data, file, indent=4)
+        # Journalled mutations are already durable, so the journalled file is only compacted now and then
+        if self._journal is not None and filename == self._journal_snapshot:
+            if self._journal_pending >= self.compact_every:
+                if self._compactor is not None:
+                    self._compactor.request()
+                else:
+                    self.compact()
+            return
+        if filename != self._data_file:
+            with self._lock.read():
+                self._write_snapshot(filename, self._includes_history(filename))
+            return
+        with self._lock.write(), self._storage_lock():
+            self._write_snapshot(filename, self._includes_history(filename))
+            self._remember_storage_signature()
+
+    def _write_snapshot(self, filename, include_history=True):
+        """Atomically write the full inventory state to a JSON file."""
+        members = [("items", (item_to_dict(item) for item in self.items_by_id.values()))]
+        if include_history:
+            members.append(("history", self.inventory_value_history))
+        members.append(("archived_transactions", self.archived_transactions))
+        members.append(("transactions", (transaction.to_dict() for transaction in self.transaction_history)))
+        members.append(("seq", self._seq))
+        temp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_filename, "w") as file:
+            # Items and transactions are encoded one at a time rather than as one big dict
+            write_members(file, members)
+            file.flush()
+            os.fsync(file.fileno())
+        # Readers in other processes see either the old or the new snapshot
+        os.replace(temp_filename, filename)
 
+    @timed("inventory.load_from_file")
     def load_from_file(self, filename="inventory_data.json"):
-        """Load inventory data from a JSON file."""
+        """Load inventory data from a JSON file, then replay its journal if one exists."""
+        with self._lock.write():
+            self._data_file = filename
+            with self._storage_lock():
+                self._load(filename)
+
+    @timed("inventory.load")
+    def _load(self, filename):
+        """Replace the in-memory state with the snapshot and journal of filename."""
+        # Records replayed by a full reload are not published again; the open alerts are re-evaluated once instead
+        events, self.events = self.events, None
+        try:
+            self._load_files(filename)
+        finally:
+            self.events = events
+        if events is not None:
+            events.reset()
+
+    def _load_files(self, filename):
+        """Read the snapshot and journal of filename into memory."""
+        if self._history_store is not None:
+            # Another process may have appended rows or categories since the store was opened
+            self._history_store.refresh()
+        if self._archive is not None:
+            self._archive.refresh()
+        snapshot_loaded = False
         try:
             with open(filename, "r") as file:
-                data = json.load(file)
-                self.items_by_id = {}
-                for item_data in data["items"]:
-                    item = Item(
-                        item_data["id"],
-                        item_data["name"],
-                        item_data["quantity"],
-                        item_data["price"],
-                        item_data["category"],
-                    )
-                    self.items_by_id[item.id] = item
-                self._total_value = sum(item.quantity * item.price for item in self.items_by_id.values())
-                self.inventory_value_history = data["history"]
-                self.transaction_history = data.get("transactions", [])
+                # Stream the members so no parse tree of the whole file is ever built
+                self._clear()
+                for key, value in iter_members(file):
+                    if key == "items":
+                        for item_data in value:
+                            item = item_from_dict(item_data)
+                            self.items_by_id[item.id] = item
+                    elif key == "history":
+                        self._load_history(value if self._history_store is not None else list(value))
+                    elif key == "archived_transactions":
+                        self.archived_transactions = value
+                    elif key == "transactions":
+                        self.transaction_history.extend(Transaction.from_data(entry) for entry in value)
+                    elif key == "seq":
+                        self._seq = value
+                self._recompute_aggregates()
+                self._index = InventoryIndex(self.items_by_id.values())
+                snapshot_loaded = True
         except FileNotFoundError:
             print("No existing data found. Starting with an empty inventory.")
         except json.JSONDecodeError:
             print("Invalid JSON data. Starting with an empty inventory.")
-            self.items_by_id = {}
-            self._total_value = 0.0
+            self._clear()
+        if self._journal is not None and filename == self._journal_snapshot:
+            self._journal_pending = self._replay_journal(self._journal)
+        else:
+            self._replay_journal(Journal(journal_path(filename)))
+        if self._history_store is not None:
+            # Without a journal the store can be ahead of an unsaved snapshot.
+            self._history_store.truncate_after(self._seq)
+        if self._archive is not None and snapshot_loaded:
+            self._drop_archived_duplicates()
+        self._rollups = None
+        self._analytics = None
+        self._remember_storage_signature()
+
+    def _clear(self):
+        """Empty the items, aggregates, indexes and transactions and reset the version."""
+        self.items_by_id = ItemTable() if self.compact_storage else {}
+        self._total_value = 0.0
+        self._category_values = {}
+        self._category_counts = {}
+        self._index = InventoryIndex()
+        if self._history_store is None:
             self.inventory_value_history = []
-            self.transaction_history = []
\ No newline at end of file
+        self.transaction_history = TransactionLog()
+        self.archived_transactions = 0
+        self._seq = 0
+
+    def _drop_archived_duplicates(self):
+        """Drop live transactions that were archived after the loaded snapshot was written."""
+        # Archiving appends to the archive before the next snapshot leaves them out; a crash in between keeps both
+        duplicates = len(self._archive) - self.archived_transactions
+        if duplicates > 0:
+            log = TransactionLog()
+            log.extend(itertools.islice(self.transaction_history, duplicates, None))
+            self.transaction_history = log
+            self.archived_transactions = len(self._archive)
+
+    def _load_history(self, history):
+        """Take the value history, possibly a one-pass iterator, from a loaded snapshot into an empty store."""
+        if self._history_store is None:
+            self.inventory_value_history = history
+        # A store that already holds rows leaves history unread, so it is skipped without being decoded
+        elif not len(self._history_store):
+            self._history_store.extend(history)
+
+    def _replay_journal(self, journal, start=0):
+        """Apply the journal records after byte offset start that are newer than the current state.
+
+        Returns the number of records read.
+        """
+        count = 0
+        for record in journal.replay(start):
+            count += 1
+            if record["seq"] <= self._seq:
+                continue
+            self._seq = record["seq"]
+            self._apply_record(record, datetime.strptime(record["ts"], TIMESTAMP_FORMAT))
+        return count
+
+    @timed("inventory.refresh")
+    def refresh(self):
+        """Catch up with changes other processes made to the loaded data file."""
+        with self._lock.write(), self._storage_lock():
+            self._catch_up()
+
+    @timed("inventory.catch_up")
+    def _catch_up(self):
+        """Apply what other processes wrote since we last read or wrote the data files; needs both locks."""
+        if not self.is_stale():
+            return
+        signature = self.storage_signature()
+        # A grown journal is replayed; a rewritten snapshot (compacted or saved elsewhere) means a full reload
+        journal_only = (
+            self._journal is not None
+            and self._data_file == self._journal_snapshot
+            and self._storage_signature is not None
+            and signature[0] == self._storage_signature[0]
+        )
+        if not journal_only:
+            increment("inventory.full_reloads")
+            self._load(self._data_file)
+            return
+        if self._history_store is not None:
+            self._history_store.refresh()
+        replayed = self._replay_journal(self._journal, self._journal.valid_size)
+        increment("inventory.records_replayed", replayed)
+        self._journal_pending += replayed
+        self._remember_storage_signature()
+
+    def _storage_files(self):
+        """Return the files whose changes mean another process wrote the loaded data."""
+        files = [self._data_file, journal_path(self._data_file)]
+        if self._history_store is not None:
+            files.append(self._history_store.column_path("seq"))
+        return files
+
+    def storage_signature(self):
+        """Return the current (mtime, size) of the loaded data file, its journal and history store."""
+        if self._data_file is None:
+            return None
+        signature = []
+        for path in self._storage_files():
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _remember_storage_signature(self):
+        """Record the signature after our own reads and writes so they don't count as external."""
+        self._storage_signature = self.storage_signature()
+
+    def is_stale(self):
+        """Whether the loaded data file was changed on disk by someone else since it was loaded."""
+        return self._data_file is not None and self.storage_signature() != self._storage_signature
+
+    def close(self):
+        """Stop the compactor and close the journal and history store files."""
+        if self._compactor is not None:
+            self._compactor.stop()
+            self._compactor = None
+        if self._journal is not None:
+            self._journal.close()
+        if self._history_store is not None:
+            self._history_store.close()
@@ -0,0 +1,109 @@
+from array import array
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+
+@dataclass(slots=True)
+class Item:
+    id: int
+    name: str
+    quantity: int
+    price: float
+    category: str
+
+def item_to_dict(item):
+    """Serialize an item to the dict layout used in the data file."""
+    return {
+        "id": item.id,
+        "name": item.name,
+        "quantity": item.quantity,
+        "price": item.price,
+        "category": item.category,
+    }
+
+def item_from_dict(item_data):
+    """Build an item from the dict layout used in the data file."""
+    return Item(
+        item_data["id"],
+        item_data["name"],
+        item_data["quantity"],
+        item_data["price"],
+        item_data["category"],
+    )
+
+class ItemTable(MutableMapping):
+    """Struct-of-arrays stand-in for the ``items_by_id`` dict of very large catalogs.
+
+    Items returned are copies built from a row; store changes back with ``table[item.id] = item``.
+    """
+
+    def __init__(self, items=()):
+        self._rows = {}
+        # Typed columns, interned category codes and a name list: a few dozen bytes a row instead of an object
+        self.ids = array("q")
+        self.quantities = array("q")
+        self.prices = array("d")
+        self.category_codes = array("l")
+        self.names = []
+        self.categories = []
+        self._category_codes = {}
+        for item in items:
+            self[item.id] = item
+
+    def _category_code(self, category):
+        """Return the interned code of a category name."""
+        code = self._category_codes.get(category)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(category)
+            self._category_codes[category] = code
+        return code
+
+    def __getitem__(self, item_id):
+        row = self._rows[item_id]
+        return Item(
+            item_id,
+            self.names[row],
+            self.quantities[row],
+            self.prices[row],
+            self.categories[self.category_codes[row]],
+        )
+
+    def __setitem__(self, item_id, item):
+        row = self._rows.get(item_id)
+        if row is None:
+            self._rows[item_id] = len(self.ids)
+            self.ids.append(item_id)
+            self.quantities.append(item.quantity)
+            self.prices.append(item.price)
+            self.category_codes.append(self._category_code(item.category))
+            self.names.append(item.name)
+        else:
+            self.quantities[row] = item.quantity
+            self.prices[row] = item.price
+            self.category_codes[row] = self._category_code(item.category)
+            self.names[row] = item.name
+
+    def __delitem__(self, item_id):
+        row = self._rows.pop(item_id)
+        # The last row moves into the gap, so rows are not kept in insertion order
+        last = len(self.ids) - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self._rows[moved_id] = row
+            self.ids[row] = moved_id
+            self.quantities[row] = self.quantities[last]
+            self.prices[row] = self.prices[last]
+            self.category_codes[row] = self.category_codes[last]
+            self.names[row] = self.names[last]
+        for column in (self.ids, self.quantities, self.prices, self.category_codes):
+            column.pop()
+        self.names.pop()
+
+    def __contains__(self, item_id):
+        return item_id in self._rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
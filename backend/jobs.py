@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from .reports import REPORT_FORMATS, render_report, report_payload
+
+def _run_report(kind, payload, path, progress, key):
+    """Worker entry point: render a report and publish its progress under key."""
+    return render_report(kind, payload, path, lambda fraction: progress.__setitem__(key, fraction))
+
+class ReportJobs:
+    """Renders reports and exports in a process pool, caching finished files by inventory version."""
+
+    def __init__(self, directory=None, max_workers=1):
+        self.directory = directory or tempfile.mkdtemp(prefix="waretrack-reports-")
+        self.max_workers = max_workers
+        self._executor = None
+        self._manager = None
+        self._progress = None
+        self._jobs = {}
+        self._submitted = 0
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: forking a process that runs threads (like a Streamlit server) is unsafe
+            context = multiprocessing.get_context("spawn")
+            self._manager = context.Manager()
+            self._progress = self._manager.dict()
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context)
+        return self._executor
+
+    def submit(self, kind, inventory, **options):
+        """Start rendering a report of the current inventory unless one is cached; return its key."""
+        if kind not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format {kind!r}; use one of {', '.join(REPORT_FORMATS)}.")
+        with self._lock:
+            # A report is keyed by format, version and options, so an unchanged inventory reuses its job
+            options_key = tuple(sorted(options.items()))
+            key = (kind, inventory.version, options_key)
+            if self._reusable(key):
+                return key
+            payload = report_payload(inventory, **options)
+            # The snapshot may have been taken at a newer version than the one read above
+            key = (kind, payload["version"], options_key)
+            if self._reusable(key):
+                return key
+            # Only the newest version of each format is kept
+            self._evict(kind, key)
+            self._submitted += 1
+            path = os.path.join(self.directory, f"{self._submitted}-{REPORT_FORMATS[kind][0]}")
+            executor = self._pool()
+            self._progress[key] = 0.0
+            self._jobs[key] = executor.submit(_run_report, kind, payload, path, self._progress, key)
+            return key
+
+    def _reusable(self, key):
+        """Whether a job for key is running or has finished successfully."""
+        job = self._jobs.get(key)
+        return job is not None and not (job.done() and job.exception() is not None)
+
+    def _evict(self, kind, keep):
+        """Forget finished jobs of kind other than keep and delete their files."""
+        for key, job in list(self._jobs.items()):
+            if key[0] == kind and key != keep and job.done():
+                del self._jobs[key]
+                self._progress.pop(key, None)
+                if job.exception() is None and os.path.exists(job.result()):
+                    os.remove(job.result())
+
+    def progress(self, key):
+        """Return the fraction of the job that is done, from 0.0 to 1.0."""
+        job = self._jobs[key]
+        if job.done():
+            return 1.0
+        return self._progress.get(key, 0.0)
+
+    def done(self, key):
+        """Whether the job has finished, successfully or not."""
+        return self._jobs[key].done()
+
+    def result(self, key):
+        """Return the path of the finished file, None while running; re-raises the job's error."""
+        job = self._jobs[key]
+        if not job.done():
+            return None
+        return job.result()
+
+    def shutdown(self):
+        """Stop the worker processes and delete the cached files."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = None
+        for job in self._jobs.values():
+            if job.done() and job.exception() is None and os.path.exists(job.result()):
+                os.remove(job.result())
+        self._jobs = {}
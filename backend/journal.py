@@ -0,0 +1,64 @@
+import json
+import os
+
+def journal_path(filename):
+    """Return the journal file that belongs to a JSON snapshot file."""
+    return os.path.splitext(filename)[0] + ".journal.jsonl"
+
+class Journal:
+    """Append-only JSON Lines log of inventory mutations."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._valid_size = None
+
+    def append(self, record):
+        """Append one compact record and fsync it to disk."""
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            # Drop a torn trailing write left behind by a crash before appending after it.
+            if self._valid_size is not None and self._file.tell() > self._valid_size:
+                self._file.truncate(self._valid_size)
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        self._file.write(line)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self._valid_size is not None:
+            self._valid_size += len(line)
+
+    @property
+    def valid_size(self):
+        """Byte offset just past the last complete record read or written, or 0 if unknown."""
+        return self._valid_size or 0
+
+    def replay(self, start=0):
+        """Yield the journal records from byte offset start in order, stopping at a torn trailing write."""
+        self._valid_size = start
+        try:
+            with open(self.path, "rb") as file:
+                file.seek(start)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    self._valid_size += len(line)
+                    yield record
+        except FileNotFoundError:
+            return
+
+    def truncate(self):
+        """Discard all records, e.g. after they have been compacted into a snapshot."""
+        self.close()
+        with open(self.path, "wb") as file:
+            os.fsync(file.fileno())
+        self._valid_size = 0
+
+    def close(self):
+        """Close the underlying file handle if it is open."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,139 @@
+import json
+import re
+from itertools import islice
+
+CHUNK_SIZE = 1 << 20
+BATCH_SIZE = 1000
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+# What may follow a complete value; anything else means a number was cut off at the end of the buffer
+DELIMITERS = frozenset(",:]} \t\n\r")
+
+_decoder = json.JSONDecoder()
+
+class _Reader:
+    """Buffered cursor over a text file for decoding JSON one value at a time."""
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Read another chunk, dropping the consumed part of the buffer; return False at EOF."""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, or "" at EOF."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Most likely the value runs past the buffer; a real error stays one at EOF
+                if not self._fill():
+                    raise
+                continue
+            if not self._complete(self.buffer, end) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    @staticmethod
+    def _complete(buffer, end):
+        """Whether a value decoded up to end is followed by a delimiter, so the next chunk cannot extend it."""
+        return end < len(buffer) and buffer[end] in DELIMITERS
+
+    def elements(self):
+        """Yield the elements of the array starting at the cursor, one decoded value at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        scan_once = _decoder.scan_once
+        while True:
+            # Fast path straight into the C scanner; value() handles elements split across chunks
+            buffer = self.buffer
+            pos = WHITESPACE.match(buffer, self.pos).end()
+            try:
+                value, end = scan_once(buffer, pos)
+            except (StopIteration, json.JSONDecodeError):
+                end = None
+            if end is None or not self._complete(buffer, end):
+                self.pos = pos
+                value = self.value()
+            else:
+                self.pos = end
+            yield value
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
+
+def iter_members(file, chunk_size=CHUNK_SIZE):
+    """Yield ``(key, value)`` for each member of the top-level JSON object in a text file.
+
+    Arrays are yielded as iterators decoding one element at a time; use each before asking for the next member.
+    """
+    reader = _Reader(file, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if reader.peek() == "[":
+            elements = reader.elements()
+            yield key, elements
+            for _ in elements:
+                pass
+        else:
+            yield key, reader.value()
+        if reader.peek() == ",":
+            reader.pos += 1
+        else:
+            reader.expect("}")
+            return
+
+def write_members(file, members, indent=4):
+    """Write ``(key, value)`` pairs like ``json.dump(..., indent=indent)``, streaming iterable values in batches."""
+    pad = " " * indent
+    encode = json.JSONEncoder(indent=indent).encode
+    file.write("{")
+    number = -1
+    for number, (key, value) in enumerate(members):
+        file.write(("," if number else "") + "\n" + pad + encode(key) + ": ")
+        if isinstance(value, (str, dict)) or not hasattr(value, "__iter__"):
+            file.write(encode(value).replace("\n", "\n" + pad))
+            continue
+        # Encode elements in batches: per-call setup dominates the pure-Python indenting encoder
+        separator = "[\n"
+        elements = iter(value)
+        while batch := list(islice(elements, BATCH_SIZE)):
+            text = encode(batch)
+            file.write(separator + pad + text[2:-2].replace("\n", "\n" + pad))
+            separator = ",\n"
+        file.write("[]" if separator == "[\n" else "\n" + pad + "]")
+    file.write("\n}" if number >= 0 else "}")
@@ -0,0 +1,113 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def lock_path(filename):
+    """Return the lock file that guards a JSON data file and its journal."""
+    return os.path.splitext(filename)[0] + ".lock"
+
+class ReadWriteLock:
+    """Reentrant, writer-preferring reader/writer lock; upgrading from read to write raises RuntimeError."""
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        """Hold the lock shared with other readers."""
+        me = threading.get_ident()
+        depth = getattr(self._local, "read_depth", 0)
+        if depth or self._writer == me:
+            self._local.read_depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.read_depth -= 1
+            return
+        with self._condition:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        self._local.read_depth = 1
+        try:
+            yield
+        finally:
+            self._local.read_depth = 0
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively."""
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer != me:
+                if getattr(self._local, "read_depth", 0):
+                    raise RuntimeError("Cannot take the write lock while holding the read lock.")
+                self._waiting_writers += 1
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+                self._waiting_writers -= 1
+                self._writer = me
+            self._write_depth += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._write_depth -= 1
+                if not self._write_depth:
+                    self._writer = None
+                    self._condition.notify_all()
+
+class FileLock:
+    """Exclusive advisory lock on a file shared by every process using the same data file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._depth = 0
+
+    @contextmanager
+    def hold(self):
+        """Hold the lock for the duration of the block."""
+        # Nested holds only count depth; callers serialize threads with a ReadWriteLock first
+        if self._depth:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+        self._file = open(self.path, "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            self._depth = 1
+            try:
+                yield
+            finally:
+                self._depth = 0
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
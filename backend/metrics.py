@@ -0,0 +1,171 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from array import array
+from functools import wraps
+
+WINDOW = 1024
+
+class Histogram:
+    """Rolling window of the most recent samples, plus lifetime count and total."""
+
+    __slots__ = ("window", "samples", "position", "count", "total")
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.samples = array("d")
+        self.position = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        if len(self.samples) < self.window:
+            self.samples.append(value)
+        else:
+            # Full: overwrite the oldest sample
+            self.samples[self.position] = value
+            self.position = (self.position + 1) % self.window
+        self.count += 1
+        self.total += value
+
+    def summary(self):
+        """Return lifetime count and total, and mean/p50/p90/p99/max over the window."""
+        window = sorted(self.samples)
+        def percentile(fraction):
+            return window[min(len(window) - 1, int(fraction * len(window)))]
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": sum(window) / len(window),
+            "p50": percentile(0.50),
+            "p90": percentile(0.90),
+            "p99": percentile(0.99),
+            "max": window[-1],
+        }
+
+class _Timer:
+    """Context manager that records its elapsed time in a registry."""
+
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class MetricsRegistry:
+    """Named timing histograms (in seconds) and counters, collected only while enabled."""
+
+    # While disabled every hook costs one attribute check, so instrumentation can stay in hot paths
+    def __init__(self, enabled=False, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        """Record one timing sample."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.window)
+            histogram.add(seconds)
+
+    def increment(self, name, amount=1):
+        """Add amount to a counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def timer(self, name):
+        """Return a context manager that times its block under name."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name=None):
+        """Decorate a function to time every call under name (default: its qualified name)."""
+        def decorate(func):
+            metric = name or func.__qualname__
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(metric, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def timings(self):
+        """Return ``{name: summary}`` for every timer that has samples."""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self._histograms.items())}
+
+    def samples(self, name):
+        """Return the samples in a timer's rolling window."""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return list(histogram.samples) if histogram is not None else []
+
+    def counters(self):
+        """Return a copy of the counters."""
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def reset(self):
+        """Drop every timer and counter."""
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+
+# The process-wide registry the backend and the app are instrumented with
+registry = MetricsRegistry(enabled=os.environ.get("WARETRACK_METRICS") == "1")
+timed = registry.timed
+timer = registry.timer
+observe = registry.observe
+increment = registry.increment
+
+def start_profile():
+    """Start profiling the calling thread with cProfile; return None if another profiler is active."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+def profile_report(profiler, sort="cumulative", limit=40):
+    """Stop a profiler from start_profile and return its top functions as text."""
+    profiler.disable()
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).strip_dirs().sort_stats(sort).print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,48 @@
+"""Migrate a JSON inventory (snapshot, journal, history store and archive) into a SQLite database.
+
+Usage: python -m backend.migrate [data/inventory_data.json] [data/inventory_data.db]
+"""
+import argparse
+import os
+import shutil
+
+from .archive import archive_path
+from .history import history_path
+from .inventory import Inventory
+from .sqlite_storage import SQLiteInventory
+
+def migrate(json_filename, db_filename):
+    """Copy everything stored under json_filename into a new SQLite database; return the new inventory's version."""
+    if not os.path.exists(json_filename):
+        raise FileNotFoundError(f"{json_filename} does not exist.")
+    if os.path.exists(db_filename):
+        raise ValueError(f"{db_filename} already exists.")
+    inventory = Inventory()
+    if os.path.isdir(history_path(json_filename)):
+        inventory.enable_history_store(json_filename)
+    if os.path.isdir(archive_path(json_filename)):
+        inventory.enable_archive(json_filename)
+        if archive_path(db_filename) != archive_path(json_filename):
+            # The database finds its archived transactions next to it
+            shutil.copytree(archive_path(json_filename), archive_path(db_filename))
+    # Also replays the journal next to the file, if there is one
+    inventory.load_from_file(json_filename)
+    database = SQLiteInventory(db_filename)
+    try:
+        database.import_inventory(inventory)
+        return database.version
+    finally:
+        database.close()
+        inventory.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("json_file", nargs="?", default=os.path.join("data", "inventory_data.json"))
+    parser.add_argument("db_file", nargs="?", help="defaults to the JSON file name with a .db extension")
+    args = parser.parse_args()
+    db_file = args.db_file or os.path.splitext(args.json_file)[0] + ".db"
+    version = migrate(args.json_file, db_file)
+    print(f"Migrated {args.json_file} to {db_file} (version {version}).")
+
+if __name__ == "__main__":
+    main()
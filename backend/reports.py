@@ -0,0 +1,142 @@
+import csv
+from datetime import datetime
+
+from .analytics import StaleAnalyticsError
+from .history import TIMESTAMP_FORMAT
+
+# format -> (file name, MIME type)
+REPORT_FORMATS = {
+    "pdf": ("inventory_report.pdf", "application/pdf"),
+    "csv": ("inventory_export.csv", "text/csv"),
+    "xlsx": ("inventory_export.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+HEADERS = ["ID", "Name", "Quantity", "Price", "Category"]
+ROWS_PER_TABLE = 500
+ROWS_PER_CHUNK = 10000
+
+def report_payload(inventory, low_stock_threshold=10):
+    """Snapshot what a report needs as picklable typed columns, so another process can render it."""
+    for attempt in range(3):
+        try:
+            # Holds off writers on the in-memory engine, so every field is of one version
+            with inventory.read_lock():
+                analytics = inventory.analytics()
+                return {
+                    "version": analytics.version,
+                    "generated": datetime.now().strftime(TIMESTAMP_FORMAT),
+                    "total_items": analytics.total_items,
+                    "total_value": analytics.total_value,
+                    "low_stock_threshold": low_stock_threshold,
+                    "low_stock_count": analytics.low_stock_count(low_stock_threshold),
+                    "columns": analytics.columns(),
+                }
+        except StaleAnalyticsError:
+            # Another process committed to the database in between; snapshot the new version
+            if attempt == 2:
+                raise
+
+def iter_rows(payload, start=0, stop=None):
+    """Yield ``[id, name, quantity, price, category]`` rows from the payload columns."""
+    columns = payload["columns"]
+    categories = columns["categories"]
+    stop = len(columns["id"]) if stop is None else min(stop, len(columns["id"]))
+    for i in range(start, stop):
+        yield [
+            columns["id"][i],
+            columns["name"][i],
+            columns["quantity"][i],
+            columns["price"][i],
+            categories[columns["category_code"][i]],
+        ]
+
+def render_report(kind, payload, path, progress=None):
+    """Render a report of the given format to path, calling progress(fraction) as it goes."""
+    progress = progress or (lambda fraction: None)
+    if kind == "pdf":
+        render_pdf(payload, path, progress)
+    elif kind == "csv":
+        render_csv(payload, path, progress)
+    elif kind == "xlsx":
+        render_xlsx(payload, path, progress)
+    else:
+        raise ValueError(f"Unknown report format {kind!r}; use one of {', '.join(REPORT_FORMATS)}.")
+    progress(1.0)
+    return path
+
+def render_pdf(payload, path, progress):
+    """Write the PDF report, splitting the item table into tables of ROWS_PER_TABLE rows."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+    styles = getSampleStyleSheet()
+    elements = [Paragraph("Inventory Report", styles["Heading1"]), Spacer(1, 12)]
+    summary_text = f"""
+    <b>Summary</b><br/>
+    Generated: {payload["generated"]} (version {payload["version"]})<br/>
+    Total Items: {payload["total_items"]}<br/>
+    Total Value: Rs {payload["total_value"]:.2f}<br/>
+    Low Stock Items (Threshold: {payload["low_stock_threshold"]}): {payload["low_stock_count"]}
+    """
+    elements.append(Paragraph(summary_text, styles["Normal"]))
+    elements.append(Spacer(1, 24))
+    elements.append(Paragraph("Current Inventory", styles["Heading2"]))
+    elements.append(Spacer(1, 12))
+
+    total_rows = len(payload["columns"]["id"])
+    if not total_rows:
+        elements.append(Paragraph("No items in inventory.", styles["Normal"]))
+    # ReportLab lays out one huge Table very slowly; small ones keep layout time linear
+    for start in range(0, total_rows, ROWS_PER_TABLE):
+        table = Table([HEADERS] + list(iter_rows(payload, start, start + ROWS_PER_TABLE)), repeatRows=1)
+        table.setStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 12),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+            ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+        ])
+        elements.append(table)
+
+    rows_drawn = 0
+    def after_flowable(flowable):
+        # Tables split across pages are drawn piecewise, each piece repeating the header
+        nonlocal rows_drawn
+        if isinstance(flowable, Table):
+            rows_drawn += flowable._nrows - 1
+            progress(min(rows_drawn / total_rows, 0.99))
+
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    doc.afterFlowable = after_flowable
+    doc.build(elements)
+
+def render_csv(payload, path, progress):
+    """Write every item as a CSV row."""
+    total_rows = len(payload["columns"]["id"])
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADERS)
+        for start in range(0, total_rows, ROWS_PER_CHUNK):
+            writer.writerows(iter_rows(payload, start, start + ROWS_PER_CHUNK))
+            progress(min((start + ROWS_PER_CHUNK) / total_rows, 0.99))
+
+def render_xlsx(payload, path, progress):
+    """Write every item to an Excel sheet with openpyxl's streaming write-only mode."""
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("Excel export requires openpyxl (pip install openpyxl).") from None
+
+    total_rows = len(payload["columns"]["id"])
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Inventory")
+    sheet.append(HEADERS)
+    for start in range(0, total_rows, ROWS_PER_CHUNK):
+        for row in iter_rows(payload, start, start + ROWS_PER_CHUNK):
+            sheet.append(row)
+        progress(min((start + ROWS_PER_CHUNK) / total_rows, 0.99))
+    workbook.save(path)
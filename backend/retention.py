@@ -0,0 +1,123 @@
+import threading
+from dataclasses import dataclass
+
+from .metrics import increment, timed
+from .rollups import parse_bucket
+
+DAY = 86400
+HOUR = 3600
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """How long the value history and the transaction log keep full detail; None keeps that tier forever."""
+    # History points older than raw_days keep the last point of each hour, and older than hourly_days of each day
+    raw_days: float = None
+    hourly_days: float = None
+    # Older transactions move into compressed archive segments that are still read on demand
+    transaction_days: float = None
+
+    def __post_init__(self):
+        for name in ("raw_days", "hourly_days", "transaction_days"):
+            if getattr(self, name) is not None and getattr(self, name) < 0:
+                raise ValueError(f"{name} cannot be negative.")
+        if self.hourly_days is not None and (self.raw_days is None or self.hourly_days < self.raw_days):
+            raise ValueError("hourly_days needs raw_days and must not be shorter than it.")
+
+    @classmethod
+    def parse(cls, spec):
+        """Build a policy from a spec such as ``"raw=7d,hourly=90d,transactions=365d"``."""
+        fields = {"raw": "raw_days", "hourly": "hourly_days", "transactions": "transaction_days"}
+        values = {}
+        for part in filter(None, (part.strip() for part in spec.split(","))):
+            key, _, duration = part.partition("=")
+            if key.strip() not in fields:
+                raise ValueError(f"Unknown retention setting {key.strip()!r}; use {', '.join(fields)}.")
+            values[fields[key.strip()]] = parse_bucket(duration.strip()) / DAY
+        return cls(**values)
+
+    @property
+    def is_empty(self):
+        """Whether the policy keeps everything."""
+        return self.raw_days is None and self.transaction_days is None
+
+def thin_indices(seconds, now, policy):
+    """Return the indices of the points, given as wall-clock seconds oldest first, that policy keeps at now."""
+    # Each thinned hour or day keeps its last point, so thinning again keeps the same points
+    if policy.raw_days is None:
+        return list(range(len(seconds)))
+    raw_after = now - policy.raw_days * DAY
+    hourly_after = None if policy.hourly_days is None else now - policy.hourly_days * DAY
+    kept = []
+    pending = pending_bucket = None
+    for index, point in enumerate(seconds):
+        if point >= raw_after:
+            bucket = None
+        elif hourly_after is None or point >= hourly_after:
+            bucket = (HOUR, point // HOUR)
+        else:
+            bucket = (DAY, point // DAY)
+        if pending is not None and bucket != pending_bucket:
+            kept.append(pending)
+            pending = None
+        if bucket is None:
+            kept.append(index)
+        else:
+            pending, pending_bucket = index, bucket
+    if pending is not None:
+        kept.append(pending)
+    return kept
+
+class Compactor:
+    """Background thread that applies a retention policy and compacts storage every interval seconds or on request()."""
+
+    def __init__(self, inventory, policy=None, interval=3600):
+        self.inventory = inventory
+        self.policy = policy or RetentionPolicy()
+        self.interval = interval
+        self.runs = 0
+        self.last_result = None
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        """Start the thread; return self."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="waretrack-compactor", daemon=True)
+            self._thread.start()
+        return self
+
+    def request(self):
+        """Ask for a run as soon as possible, without waiting for it."""
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped:
+                return
+            try:
+                self.run_once()
+            except Exception as e:
+                # Kept and counted; the thread carries on
+                self.last_error = e
+                increment("maintenance.failures")
+
+    @timed("maintenance.run")
+    def run_once(self):
+        """Apply the policy and compact the storage now, on the calling thread."""
+        result = self.inventory.run_maintenance(self.policy)
+        self.runs += 1
+        self.last_result = result
+        self.last_error = None
+        return result
+
+    def stop(self, timeout=None):
+        """Stop the thread, letting a run in progress finish."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,160 @@
+import bisect
+import calendar
+import time
+from datetime import datetime
+
+from .history import TIMESTAMP_FORMAT
+
+TIERS = (86400, 3600, 60)
+BUCKET_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+AUTO_BUCKETS = (60, 300, 900, 3600, 21600, 86400, 604800)
+AGGREGATIONS = ("last", "first", "min", "max", "mean")
+
+def wall_seconds(timestamp):
+    """Convert a timestamp string or datetime to seconds read as UTC, so day buckets start at local midnight."""
+    if isinstance(timestamp, datetime):
+        return calendar.timegm(timestamp.timetuple())
+    return calendar.timegm(time.strptime(timestamp, TIMESTAMP_FORMAT))
+
+def wall_timestamp(seconds):
+    """Convert wall-clock seconds back to a timestamp string."""
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(seconds))
+
+def parse_bucket(bucket):
+    """Return the size in seconds of a bucket spec such as "15m", "1h" or "1d"."""
+    try:
+        size = int(bucket[:-1]) * BUCKET_UNITS[bucket[-1]]
+    except (KeyError, ValueError, TypeError):
+        raise ValueError(f"Invalid bucket {bucket!r}; use e.g. '1m', '1h', '1d' or 'auto'.")
+    if size <= 0:
+        raise ValueError(f"Invalid bucket {bucket!r}; the size must be positive.")
+    return size
+
+class Bucket:
+    """Aggregated value history over one time bucket."""
+
+    __slots__ = (
+        "start", "count", "first", "last", "total_min", "total_max", "total_sum",
+        "category_sum", "category_min", "category_max", "category_count",
+    )
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.first = None
+        self.last = None
+        self.total_min = float("inf")
+        self.total_max = float("-inf")
+        self.total_sum = 0.0
+        self.category_sum = {}
+        self.category_min = {}
+        self.category_max = {}
+        self.category_count = {}
+
+    def add(self, total, category_values):
+        """Fold one history entry into the bucket."""
+        if self.first is None:
+            self.first = (total, category_values)
+        self.last = (total, category_values)
+        self.count += 1
+        self.total_min = min(self.total_min, total)
+        self.total_max = max(self.total_max, total)
+        self.total_sum += total
+        for category, value in category_values.items():
+            self.category_sum[category] = self.category_sum.get(category, 0) + value
+            self.category_min[category] = min(self.category_min.get(category, value), value)
+            self.category_max[category] = max(self.category_max.get(category, value), value)
+            self.category_count[category] = self.category_count.get(category, 0) + 1
+
+    def merge(self, other):
+        """Fold a later bucket into this one."""
+        if other.count == 0:
+            return
+        if self.first is None:
+            self.first = other.first
+        self.last = other.last
+        self.count += other.count
+        self.total_min = min(self.total_min, other.total_min)
+        self.total_max = max(self.total_max, other.total_max)
+        self.total_sum += other.total_sum
+        for category, value in other.category_sum.items():
+            self.category_sum[category] = self.category_sum.get(category, 0) + value
+            self.category_min[category] = min(self.category_min.get(category, other.category_min[category]), other.category_min[category])
+            self.category_max[category] = max(self.category_max.get(category, other.category_max[category]), other.category_max[category])
+            self.category_count[category] = self.category_count.get(category, 0) + other.category_count[category]
+
+    def value(self, agg):
+        """Return ``(total, {category: value})`` for an aggregation; a missing category counts as 0 for min and mean."""
+        if agg == "last":
+            return self.last
+        if agg == "first":
+            return self.first
+        if agg == "mean":
+            return self.total_sum / self.count, {
+                category: value / self.count for category, value in self.category_sum.items()
+            }
+        if agg == "min":
+            return self.total_min, {
+                category: value if self.category_count[category] == self.count else 0.0
+                for category, value in self.category_min.items()
+            }
+        return self.total_max, dict(self.category_max)
+
+class Rollups:
+    """Minute, hour and day pre-aggregations of the value history, maintained on append."""
+
+    def __init__(self, tiers=TIERS):
+        self.tiers = {size: ([], []) for size in tiers}
+        self.first = None
+        self.last = None
+
+    def add(self, seconds, total, category_values):
+        """Fold one history entry, at wall-clock seconds, into every tier."""
+        if self.first is None or seconds < self.first:
+            self.first = seconds
+        if self.last is None or seconds > self.last:
+            self.last = seconds
+        for size, (starts, buckets) in self.tiers.items():
+            start = seconds - seconds % size
+            if starts and starts[-1] == start:
+                bucket = buckets[-1]
+            else:
+                index = bisect.bisect_left(starts, start)
+                if index < len(starts) and starts[index] == start:
+                    bucket = buckets[index]
+                else:
+                    bucket = Bucket(start)
+                    starts.insert(index, start)
+                    buckets.insert(index, bucket)
+            bucket.add(total, category_values)
+
+    def auto_bucket(self, start, end, max_points):
+        """Pick the smallest standard bucket size that yields at most max_points buckets."""
+        start = self.first if start is None else start
+        end = self.last if end is None else end
+        span = max((end or 0) - (start or 0), 0)
+        for size in AUTO_BUCKETS:
+            if span // size + 1 <= max_points:
+                return size
+        return AUTO_BUCKETS[-1]
+
+    def query(self, start, end, size, agg):
+        """Aggregate the buckets overlapping [start, end] into buckets of size seconds."""
+        tier = next((tier for tier in sorted(self.tiers, reverse=True) if size % tier == 0), None)
+        if tier is None:
+            raise ValueError(f"Bucket size must be a multiple of {min(self.tiers)} seconds.")
+        starts, buckets = self.tiers[tier]
+        low = 0 if start is None else bisect.bisect_right(starts, start - tier)
+        high = len(starts) if end is None else bisect.bisect_right(starts, end)
+        result = []
+        current = None
+        for bucket in buckets[low:high]:
+            bucket_start = bucket.start - bucket.start % size
+            if current is None or current.start != bucket_start:
+                if current is not None:
+                    result.append(current)
+                current = Bucket(bucket_start)
+            current.merge(bucket)
+        if current is not None:
+            result.append(current)
+        return [(wall_timestamp(bucket.start), *bucket.value(agg)) for bucket in result]
@@ -0,0 +1,708 @@
+import bisect
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from .analytics import InventoryAnalytics, StaleAnalyticsError
+from .archive import TransactionArchive, archive_path
+from .events import EventBus
+from .history import TIMESTAMP_FORMAT
+from .indexes import SORT_COLUMNS, TOKEN_PATTERN, name_tokens
+from .inventory import Batch, Inventory, VersionConflictError, validate_record
+from .items import Item, item_to_dict
+from .jsonstream import write_members
+from .metrics import increment, timed
+from .retention import DAY, Compactor
+from .rollups import AGGREGATIONS, Rollups, parse_bucket, wall_seconds, wall_timestamp
+from .transactions import Transaction
+
+ITEM_COLUMNS = "id, name, quantity, price, category"
+TRANSACTION_COLUMNS = ", ".join(Transaction.__slots__)
+# Ids bound per "IN (...)" query, well below SQLite's limit on host parameters
+QUERY_CHUNK = 500
+# Transactions per archive segment, as in the in-memory TransactionLog
+ARCHIVE_SEGMENT = 4096
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL,
+    category TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_by_quantity ON items (quantity, id);
+CREATE INDEX IF NOT EXISTS items_by_category ON items (category, id);
+CREATE INDEX IF NOT EXISTS items_by_name ON items (name, id);
+CREATE INDEX IF NOT EXISTS items_by_price ON items (price, id);
+CREATE TABLE IF NOT EXISTS item_tokens (
+    token TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    PRIMARY KEY (token, item_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS categories (
+    category TEXT PRIMARY KEY,
+    value REAL NOT NULL,
+    item_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    position INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    total REAL NOT NULL,
+    category_values TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_by_timestamp ON history (timestamp);
+CREATE TABLE IF NOT EXISTS transactions (
+    position INTEGER PRIMARY KEY,
+    time INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    item_id INTEGER,
+    name TEXT,
+    old_quantity INTEGER,
+    new_quantity INTEGER,
+    old_price REAL,
+    new_price REAL,
+    note TEXT
+);
+CREATE INDEX IF NOT EXISTS transactions_by_item ON transactions (item_id, position);
+CREATE INDEX IF NOT EXISTS transactions_by_time ON transactions (time);
+"""
+
+class SQLiteItems(Mapping):
+    """Read-only, dict-like view of the items table standing in for ``items_by_id``; items are copies."""
+
+    def __init__(self, inventory):
+        self._inventory = inventory
+
+    def __getitem__(self, item_id):
+        row = self._inventory._connection().execute(
+            f"SELECT {ITEM_COLUMNS} FROM items WHERE id = ?", (item_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(item_id)
+        return Item(*row)
+
+    def __contains__(self, item_id):
+        return self._inventory._connection().execute(
+            "SELECT 1 FROM items WHERE id = ?", (item_id,)
+        ).fetchone() is not None
+
+    def __iter__(self):
+        for (item_id,) in self._inventory._connection().execute("SELECT id FROM items ORDER BY id"):
+            yield item_id
+
+    def __len__(self):
+        return self._inventory._connection().execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def values(self):
+        """Yield every item, ordered by id, from a single query."""
+        for row in self._inventory._connection().execute(f"SELECT {ITEM_COLUMNS} FROM items ORDER BY id"):
+            yield Item(*row)
+
+class SQLiteAnalytics(InventoryAnalytics):
+    """InventoryAnalytics answering the quantity queries from a quantity histogram of the items table.
+
+    The histogram and columns are read on first use and raise StaleAnalyticsError if the database has moved on.
+    """
+
+    def __init__(self, inventory, total_value, category_values, category_counts, version):
+        super().__init__(inventory.items_by_id, total_value, category_values, category_counts, None, version)
+        self.total_items = sum(category_counts.values())
+        self._inventory = inventory
+        self._quantities = None
+        self._cumulative = None
+
+    @contextmanager
+    def _consistent_read(self):
+        with self._inventory._transaction() as connection:
+            if self._inventory._seq(connection) != self.version:
+                raise StaleAnalyticsError(
+                    f"The inventory changed since version {self.version}; call analytics() again."
+                )
+            yield
+
+    def _histogram(self):
+        """Return the distinct quantities, ascending, and the running item counts below each of them."""
+        if self._quantities is None:
+            with self._consistent_read():
+                rows = self._inventory._connection().execute(
+                    "SELECT quantity, COUNT(*) FROM items GROUP BY quantity ORDER BY quantity"
+                ).fetchall()
+            self._cumulative = list(itertools.accumulate((count for _, count in rows), initial=0))
+            self._quantities = [quantity for quantity, _ in rows]
+        return self._quantities, self._cumulative
+
+    def _count_below(self, quantity):
+        quantities, cumulative = self._histogram()
+        return cumulative[bisect.bisect_left(quantities, quantity)]
+
+    def _quantity_range(self):
+        quantities, cumulative = self._histogram()
+        if not quantities:
+            return None
+        return quantities[0], quantities[-1], cumulative[-1]
+
+class SQLiteInventory:
+    """Inventory with the same API as Inventory, stored in indexed SQLite tables instead of memory.
+
+    Each mutation is one transaction; each thread gets its own connection, in WAL mode.
+    """
+
+    def __init__(self, path="inventory_data.db"):
+        self.path = path
+        self.items_by_id = SQLiteItems(self)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._rollups = None
+        self._rollups_position = 0
+        self._rollups_lock = threading.Lock()
+        self._analytics = None
+        self._compactor = None
+        self.events = None
+        self._connection().executescript(SCHEMA)
+        self._archive = TransactionArchive(archive_path(path))
+        self._drop_archived_duplicates()
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=FULL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _transaction(self, write=False):
+        """Run the block in one transaction, taking the write lock up front if write is set."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @staticmethod
+    def _seq(connection):
+        return SQLiteInventory._meta(connection, "seq")
+
+    @staticmethod
+    def _meta(connection, key):
+        row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    @property
+    def version(self):
+        """Monotonically increasing version: the sequence number of the last mutation."""
+        return self._seq(self._connection())
+
+    def read_lock(self):
+        """Reads are isolated by SQLite, so there is nothing to hold."""
+        return nullcontext()
+
+    def add_item(self, item, expected_version=None):
+        """Add a new item to the inventory with validation."""
+        self._commit({"op": "add", "item": item}, expected_version)
+
+    def remove_item(self, item_id, expected_version=None):
+        """Remove an item from the inventory."""
+        self._commit({"op": "remove", "id": item_id}, expected_version)
+
+    def update_item(self, item_id, new_quantity=None, new_price=None, expected_version=None):
+        """Update an item's quantity and/or price with validation."""
+        self._commit({"op": "update", "id": item_id, "quantity": new_quantity, "price": new_price}, expected_version)
+
+    def apply_batch(self, ops, expected_version=None):
+        """Validate and apply several add/update/remove operations atomically, as Inventory.apply_batch."""
+        ops = list(ops)
+        if ops:
+            self._commit({"op": "batch", "ops": ops}, expected_version)
+
+    def batch(self, expected_version=None):
+        """Collect mutations in a ``with`` block and apply them with apply_batch on exit."""
+        return Batch(self, expected_version)
+
+    @timed("inventory.commit")
+    def _commit(self, record, expected_version=None):
+        """Validate and apply a mutation, and add one value history point, in one transaction."""
+        events = self.events
+        with events.lock if events is not None else nullcontext():
+            with self._transaction(write=True) as connection:
+                seq = self._seq(connection)
+                if expected_version is not None and expected_version != seq:
+                    raise VersionConflictError(
+                        f"The inventory changed (version {expected_version} -> {seq}). Reload and try again."
+                    )
+                validate_record(record, self.items_by_id)
+                now = datetime.now().replace(microsecond=0)
+                epoch = int(now.timestamp())
+                changes = []
+                for op in record["ops"] if record["op"] == "batch" else [record]:
+                    if op["op"] == "add":
+                        changes.append(self._apply_add(connection, op["item"], epoch))
+                    elif op["op"] == "remove":
+                        changes.append(self._apply_remove(connection, op["id"], epoch))
+                    else:
+                        changes.append(self._apply_update(connection, op["id"], op.get("quantity"), op.get("price"), epoch))
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('seq', ?)", (seq + 1,))
+                self._append_history(connection, seq + 1, now.strftime(TIMESTAMP_FORMAT))
+            # Published once committed, under the bus's lock so events come out in version order
+            if events is not None:
+                for kind, item, old_quantity in changes:
+                    events.change(kind, item, old_quantity, seq + 1, epoch)
+
+    def _apply_add(self, connection, item, epoch):
+        """Insert a validated item and log the transaction; return the change for the event bus."""
+        connection.execute(
+            f"INSERT INTO items ({ITEM_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+            (item.id, item.name, item.quantity, item.price, item.category),
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO item_tokens VALUES (?, ?)",
+            ((token, item.id) for token in name_tokens(item.name)),
+        )
+        self._apply_category_delta(connection, item.category, item.quantity * item.price, 1)
+        self._log(connection, Transaction(
+            epoch, "add", item.id, item.name, new_quantity=item.quantity, new_price=item.price
+        ))
+        return "item_added", item, None
+
+    def _apply_remove(self, connection, item_id, epoch):
+        """Delete an existing item and log the transaction; return the change for the event bus."""
+        item = self.items_by_id[item_id]
+        connection.execute("DELETE FROM items WHERE id = ?", (item_id,))
+        connection.executemany(
+            "DELETE FROM item_tokens WHERE token = ? AND item_id = ?",
+            ((token, item_id) for token in name_tokens(item.name)),
+        )
+        self._apply_category_delta(connection, item.category, -item.quantity * item.price, -1)
+        self._log(connection, Transaction(
+            epoch, "remove", item_id, item.name, old_quantity=item.quantity, old_price=item.price
+        ))
+        return "removed", item, item.quantity
+
+    def _apply_update(self, connection, item_id, new_quantity, new_price, epoch):
+        """Change an existing item's quantity and/or price and log the transaction; return the change for the event bus."""
+        item = self.items_by_id[item_id]
+        quantity = item.quantity if new_quantity is None else new_quantity
+        price = item.price if new_price is None else new_price
+        connection.execute("UPDATE items SET quantity = ?, price = ? WHERE id = ?", (quantity, price, item_id))
+        self._apply_category_delta(connection, item.category, quantity * price - item.quantity * item.price)
+        self._log(connection, Transaction(
+            epoch, "update", item_id,
+            old_quantity=item.quantity, new_quantity=quantity, old_price=item.price, new_price=price,
+        ))
+        return "quantity_changed", Item(item_id, item.name, quantity, price, item.category), item.quantity
+
+    @staticmethod
+    def _apply_category_delta(connection, category, value_delta, count_delta=0):
+        """Adjust the stored value and item count of a category."""
+        row = connection.execute(
+            "SELECT value, item_count FROM categories WHERE category = ?", (category,)
+        ).fetchone()
+        value, count = row if row else (0, 0)
+        count += count_delta
+        if count <= 0:
+            connection.execute("DELETE FROM categories WHERE category = ?", (category,))
+            return
+        connection.execute("INSERT OR REPLACE INTO categories VALUES (?, ?, ?)", (category, value + value_delta, count))
+
+    @staticmethod
+    def _log(connection, transaction):
+        connection.execute(
+            f"INSERT INTO transactions ({TRANSACTION_COLUMNS}) VALUES ({', '.join('?' * len(Transaction.__slots__))})",
+            [getattr(transaction, field) for field in Transaction.__slots__],
+        )
+
+    @staticmethod
+    def _append_history(connection, seq, timestamp):
+        category_values = dict(connection.execute("SELECT category, value FROM categories ORDER BY category"))
+        connection.execute(
+            "INSERT INTO history (seq, timestamp, total, category_values) VALUES (?, ?, ?, ?)",
+            (seq, timestamp, sum(category_values.values()), json.dumps(category_values)),
+        )
+
+    def total_inventory_value(self):
+        """Return the current total inventory value."""
+        return self._connection().execute("SELECT COALESCE(SUM(value), 0.0) FROM categories").fetchone()[0]
+
+    @timed("inventory.get_low_stock_items")
+    def get_low_stock_items(self, threshold=10):
+        """Get a list of items with quantity below the threshold, lowest quantity first."""
+        rows = self._connection().execute(
+            f"SELECT {ITEM_COLUMNS} FROM items WHERE quantity < ? ORDER BY quantity, id", (threshold,)
+        )
+        return [Item(*row) for row in rows]
+
+    def low_stock_quantities(self, threshold=10):
+        """Return ``{id: quantity}`` of the items with quantity below the threshold, read from the quantity index alone."""
+        return dict(self._connection().execute("SELECT id, quantity FROM items WHERE quantity < ?", (threshold,)))
+
+    def count_low_stock_items(self, threshold=10):
+        """Count the items with quantity below the threshold."""
+        return self._connection().execute("SELECT COUNT(*) FROM items WHERE quantity < ?", (threshold,)).fetchone()[0]
+
+    def categories(self):
+        """Return the sorted names of categories that have items."""
+        return [category for (category,) in self._connection().execute("SELECT category FROM categories ORDER BY category")]
+
+    @timed("inventory.get_items_by_category")
+    def get_items_by_category(self, category):
+        """Get a list of the items in a category."""
+        rows = self._connection().execute(
+            f"SELECT {ITEM_COLUMNS} FROM items WHERE category = ? ORDER BY id", (category,)
+        )
+        return [Item(*row) for row in rows]
+
+    def existing_ids(self, item_ids):
+        """Return the set of item_ids that are in the inventory, in one query per 500 ids."""
+        item_ids = list(item_ids)
+        existing = set()
+        with self._transaction() as connection:
+            for start in range(0, len(item_ids), QUERY_CHUNK):
+                chunk = item_ids[start:start + QUERY_CHUNK]
+                existing.update(item_id for (item_id,) in connection.execute(
+                    f"SELECT id FROM items WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                ))
+        return existing
+
+    @timed("inventory.search_items")
+    def search_items(self, query):
+        """Find items by exact ID or by name words starting with each term of the query."""
+        where, params = self._item_filter(query, None)
+        rows = self._connection().execute(f"SELECT {ITEM_COLUMNS} FROM items {where} ORDER BY id", params)
+        return [Item(*row) for row in rows]
+
+    @timed("inventory.query_items")
+    def query_items(self, query=None, category=None, sort_by="id", descending=False, offset=0, limit=50):
+        """Return a page of items, as Inventory.query_items; the sort column indexes serve the page."""
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Invalid sort column {sort_by!r}; use one of {', '.join(SORT_COLUMNS)}.")
+        where, params = self._item_filter(query, category)
+        direction = "DESC" if descending else "ASC"
+        rows = self._connection().execute(
+            f"SELECT {ITEM_COLUMNS} FROM items {where} ORDER BY {sort_by} {direction}, id {direction} LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        )
+        return [Item(*row) for row in rows]
+
+    def count_items(self, query=None, category=None):
+        """Count the items matching the filters of query_items()."""
+        where, params = self._item_filter(query, category)
+        return self._connection().execute(f"SELECT COUNT(*) FROM items {where}", params).fetchone()[0]
+
+    @staticmethod
+    def _item_filter(query, category):
+        """Return a WHERE clause and its parameters for a search query and a category."""
+        conditions, params = [], []
+        if query is not None:
+            matches = []
+            terms = TOKEN_PATTERN.findall(query.lower())
+            if terms:
+                prefix_match = "SELECT item_id FROM item_tokens WHERE token >= ? AND token < ?"
+                matches.append(f"id IN ({' INTERSECT '.join([prefix_match] * len(terms))})")
+                for term in terms:
+                    params += [term, term + "\U0010ffff"]
+            if query.strip().isdigit():
+                matches.append("id = ?")
+                params.append(int(query.strip()))
+            conditions.append(f"({' OR '.join(matches)})" if matches else "0")
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        return ("WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    @timed("inventory.analytics")
+    def analytics(self):
+        """Return aggregate views of the inventory, cached until the next mutation."""
+        with self._transaction() as connection:
+            seq = self._seq(connection)
+            if self._analytics is None or self._analytics.version != seq:
+                increment("inventory.analytics_rebuilds")
+                rows = connection.execute("SELECT category, value, item_count FROM categories").fetchall()
+                self._analytics = SQLiteAnalytics(
+                    self,
+                    sum(value for _, value, _ in rows),
+                    {category: value for category, value, _ in rows},
+                    {category: count for category, _, count in rows},
+                    seq,
+                )
+            return self._analytics
+
+    def verify_aggregates(self, rel_tol=1e-9):
+        """Check the stored category totals against a full scan of the items."""
+        with self._transaction() as connection:
+            stored = connection.execute("SELECT category, value, item_count FROM categories ORDER BY category").fetchall()
+            scanned = connection.execute(
+                "SELECT category, SUM(quantity * price), COUNT(*) FROM items GROUP BY category ORDER BY category"
+            ).fetchall()
+        if [(category, count) for category, _, count in stored] != [(category, count) for category, _, count in scanned]:
+            return False
+        return all(
+            abs(value - expected) <= max(rel_tol * abs(expected), 1e-6)
+            for (_, value, _), (_, expected, _) in zip(stored, scanned)
+        )
+
+    @timed("inventory.transactions")
+    def transactions(self, offset=0, limit=50, item_id=None, since=None):
+        """Return a page of transactions, newest first, filtered as in Inventory.transactions."""
+        where, params = self._transaction_filter(item_id, since)
+        with self._transaction() as connection:
+            rows = connection.execute(
+                f"SELECT {TRANSACTION_COLUMNS} FROM transactions{where} ORDER BY position DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            )
+            page = [Transaction(*row) for row in rows]
+            if len(page) == limit or not self._sync_archive(connection):
+                return page
+            # The page runs past the live rows into the archive
+            live = connection.execute(f"SELECT COUNT(*) FROM transactions{where}", params).fetchone()[0]
+        since = Inventory._since_epoch(since)
+        return page + self._archive.query(max(offset - live, 0), limit - len(page), item_id, since)
+
+    @timed("inventory.count_transactions")
+    def count_transactions(self, item_id=None, since=None):
+        """Count the transactions matching the filters of transactions()."""
+        where, params = self._transaction_filter(item_id, since)
+        with self._transaction() as connection:
+            count = connection.execute(f"SELECT COUNT(*) FROM transactions{where}", params).fetchone()[0]
+            if self._sync_archive(connection):
+                count += self._archive.count(item_id, Inventory._since_epoch(since))
+        return count
+
+    def _sync_archive(self, connection):
+        """Re-read the archive manifest if another connection archived more; return whether it has entries."""
+        if len(self._archive) != self._meta(connection, "archived_transactions"):
+            self._archive.refresh()
+        return len(self._archive) > 0
+
+    @staticmethod
+    def _transaction_filter(item_id, since):
+        conditions, params = [], []
+        if item_id is not None:
+            conditions.append("item_id = ?")
+            params.append(item_id)
+        since = Inventory._since_epoch(since)
+        if since is not None:
+            conditions.append("time >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    @timed("inventory.apply_retention")
+    def apply_retention(self, policy, now=None):
+        """Thin the value history and archive old transactions as a RetentionPolicy says, as Inventory.apply_retention."""
+        now = now or datetime.now()
+        result = {
+            "history_points_dropped": self._thin_history(policy, now),
+            "transactions_archived": self._archive_transactions(policy, now),
+        }
+        increment("inventory.history_points_dropped", result["history_points_dropped"])
+        increment("inventory.transactions_archived", result["transactions_archived"])
+        return result
+
+    def run_maintenance(self, policy=None, now=None):
+        """Apply policy, if given, then fold the write-ahead log back into the database."""
+        result = {"history_points_dropped": 0, "transactions_archived": 0}
+        if policy is not None:
+            result = self.apply_retention(policy, now)
+        self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return result
+
+    def start_compactor(self, policy=None, interval=3600):
+        """Run maintenance with policy on a background thread every interval seconds; return the Compactor."""
+        if self._compactor is None:
+            self._compactor = Compactor(self, policy, interval).start()
+        return self._compactor
+
+    def _thin_history(self, policy, now):
+        """Delete the value history rows policy no longer keeps, keeping the last row of each hour or day."""
+        if policy.raw_days is None:
+            return 0
+        raw_before = wall_timestamp(wall_seconds(now) - policy.raw_days * DAY)
+        hourly_from = "" if policy.hourly_days is None else wall_timestamp(wall_seconds(now) - policy.hourly_days * DAY)
+        with self._transaction(write=True) as connection:
+            # Timestamps are "YYYY-MM-DD HH:MM:SS": 13 characters name the hour, 10 the day
+            deleted = connection.execute(
+                """
+                DELETE FROM history WHERE timestamp < :raw_before AND position NOT IN (
+                    SELECT MAX(position) FROM history WHERE timestamp < :raw_before
+                    GROUP BY substr(timestamp, 1, CASE WHEN timestamp >= :hourly_from THEN 13 ELSE 10 END)
+                )
+                """,
+                {"raw_before": raw_before, "hourly_from": hourly_from},
+            ).rowcount
+        if deleted:
+            with self._rollups_lock:
+                self._rollups = None
+        return deleted
+
+    def _archive_transactions(self, policy, now):
+        """Move the oldest transactions older than policy allows into the archive; return how many."""
+        if policy.transaction_days is None:
+            return 0
+        cutoff = now.timestamp() - policy.transaction_days * DAY
+        archived = 0
+        while True:
+            # Holding the write lock keeps other processes from archiving the same rows
+            with self._transaction(write=True) as connection:
+                self._sync_archive(connection)
+                rows = connection.execute(
+                    f"SELECT position, {TRANSACTION_COLUMNS} FROM transactions ORDER BY position LIMIT ?", (ARCHIVE_SEGMENT,)
+                ).fetchall()
+                # Archive only the oldest run, so the archive stays a prefix of the log
+                old = list(itertools.takewhile(lambda row: row[1] < cutoff, rows))
+                if not old:
+                    return archived
+                self._archive.append(Transaction(*row[1:]) for row in old)
+                connection.execute("DELETE FROM transactions WHERE position <= ?", (old[-1][0],))
+                connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('archived_transactions', ?)", (len(self._archive),)
+                )
+            archived += len(old)
+            if len(old) < ARCHIVE_SEGMENT:
+                return archived
+
+    def _drop_archived_duplicates(self):
+        """Delete live rows that a crash left behind after they were archived."""
+        with self._transaction(write=True) as connection:
+            duplicates = len(self._archive) - self._meta(connection, "archived_transactions")
+            if duplicates > 0:
+                connection.execute(
+                    "DELETE FROM transactions WHERE position IN (SELECT position FROM transactions ORDER BY position LIMIT ?)",
+                    (duplicates,),
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('archived_transactions', ?)", (len(self._archive),)
+                )
+
+    @timed("inventory.value_history")
+    def value_history(self, start=None, end=None, bucket="1h", agg="last", max_points=500):
+        """Return ``(timestamp, total, {category: value})`` points, as Inventory.value_history."""
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"Invalid aggregation {agg!r}; use one of {', '.join(AGGREGATIONS)}.")
+        start = None if start is None else wall_seconds(start)
+        end = None if end is None else wall_seconds(end)
+        if bucket is None:
+            rows = self._connection().execute(
+                "SELECT timestamp, total, category_values FROM history WHERE timestamp >= ? AND timestamp <= ? ORDER BY position",
+                ("" if start is None else wall_timestamp(start), "\U0010ffff" if end is None else wall_timestamp(end)),
+            )
+            return [(timestamp, total, json.loads(category_values)) for timestamp, total, category_values in rows]
+        with self._rollups_lock:
+            rollups = self._value_rollups()
+            size = rollups.auto_bucket(start, end, max_points) if bucket == "auto" else parse_bucket(bucket)
+            return rollups.query(start, end, size, agg)
+
+    @timed("inventory.build_rollups")
+    def _value_rollups(self):
+        """Return the value history rollups, folding in rows added since they were last read."""
+        if self._rollups is None:
+            self._rollups = Rollups()
+            self._rollups_position = 0
+        rows = self._connection().execute(
+            "SELECT position, timestamp, total, category_values FROM history WHERE position > ? ORDER BY position",
+            (self._rollups_position,),
+        )
+        for position, timestamp, total, category_values in rows:
+            self._rollups.add(wall_seconds(timestamp), total, json.loads(category_values))
+            self._rollups_position = position
+        return self._rollups
+
+    @timed("inventory.import_inventory")
+    def import_inventory(self, inventory):
+        """Copy the items, value history and transactions of an in-memory Inventory into this empty database."""
+        with self._transaction(write=True) as connection:
+            if connection.execute("SELECT EXISTS (SELECT 1 FROM items) OR EXISTS (SELECT 1 FROM transactions)").fetchone()[0]:
+                raise ValueError(f"{self.path} already holds an inventory.")
+            connection.executemany(
+                f"INSERT INTO items ({ITEM_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                ((item.id, item.name, item.quantity, item.price, item.category) for item in inventory.items_by_id.values()),
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO item_tokens VALUES (?, ?)",
+                ((token, item.id) for item in inventory.items_by_id.values() for token in name_tokens(item.name)),
+            )
+            connection.execute(
+                "INSERT INTO categories SELECT category, SUM(quantity * price), COUNT(*) FROM items GROUP BY category"
+            )
+            connection.executemany(
+                "INSERT INTO history (seq, timestamp, total, category_values) VALUES (0, ?, ?, ?)",
+                ((entry[0], entry[1], json.dumps(entry[2] if len(entry) > 2 else {})) for entry in inventory.inventory_value_history),
+            )
+            connection.executemany(
+                f"INSERT INTO transactions ({TRANSACTION_COLUMNS}) VALUES ({', '.join('?' * len(Transaction.__slots__))})",
+                ([getattr(transaction, field) for field in Transaction.__slots__] for transaction in inventory.transaction_history),
+            )
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('seq', ?)", (inventory.version,))
+            connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('archived_transactions', ?)", (inventory.archived_transactions,)
+            )
+
+    @timed("inventory.save_to_file")
+    def save_to_file(self, filename=None):
+        """Export the inventory to a JSON file; saving to the database itself is a no-op."""
+        if filename is None or os.path.abspath(filename) == os.path.abspath(self.path):
+            return
+        temp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._transaction() as connection, open(temp_filename, "w") as file:
+            write_members(file, [
+                ("items", (item_to_dict(item) for item in self.items_by_id.values())),
+                ("history", (
+                    (timestamp, total, json.loads(category_values))
+                    for timestamp, total, category_values in connection.execute(
+                        "SELECT timestamp, total, category_values FROM history ORDER BY position"
+                    )
+                )),
+                ("archived_transactions", self._meta(connection, "archived_transactions")),
+                ("transactions", (
+                    Transaction(*row).to_dict()
+                    for row in connection.execute(f"SELECT {TRANSACTION_COLUMNS} FROM transactions ORDER BY position")
+                )),
+                ("seq", self._seq(connection)),
+            ])
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, filename)
+
+    def enable_events(self, rules=None):
+        """Publish every change made through this instance and its low-stock alerts on an EventBus; return it."""
+        # Other processes' commits are not published; their effect on alerts shows after events.reset()
+        if self.events is None:
+            events = EventBus(self, rules)
+            events.reset(publish=False)
+            self.events = events
+        return self.events
+
+    def is_stale(self):
+        """Every read goes to the database, so the inventory is never stale."""
+        return False
+
+    def refresh(self):
+        """Every read goes to the database, so there is nothing to catch up with."""
+
+    def close(self):
+        """Stop the compactor and close every thread's connection."""
+        if self._compactor is not None:
+            self._compactor.stop()
+            self._compactor = None
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
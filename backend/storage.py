@@ -0,0 +1,19 @@
+import os
+
+from .inventory import Inventory
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+def open_inventory(filename="inventory_data.json", compact_storage=False):
+    """Open filename as a SQLiteInventory (``.db``, ``.sqlite``, ``.sqlite3``) or a journalled in-memory Inventory."""
+    if os.path.splitext(filename)[1].lower() in SQLITE_EXTENSIONS:
+        # Imported here so JSON-backed apps never load sqlite3
+        from .sqlite_storage import SQLiteInventory
+
+        return SQLiteInventory(filename)
+    inventory = Inventory(compact_storage=compact_storage)
+    inventory.enable_journal(filename)
+    inventory.enable_history_store(filename)
+    inventory.enable_archive(filename)
+    inventory.load_from_file(filename)
+    return inventory
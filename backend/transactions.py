@@ -0,0 +1,144 @@
+import bisect
+from dataclasses import dataclass
+from datetime import datetime
+
+from .history import TIMESTAMP_FORMAT
+
+@dataclass(slots=True)
+class Transaction:
+    """One typed entry of the transaction log; the display text is built on demand."""
+    time: int
+    op: str
+    item_id: int = None
+    name: str = None
+    old_quantity: int = None
+    new_quantity: int = None
+    old_price: float = None
+    new_price: float = None
+    note: str = None
+
+    @property
+    def timestamp(self):
+        """The transaction time formatted like the rest of the data file."""
+        return datetime.fromtimestamp(self.time).strftime(TIMESTAMP_FORMAT)
+
+    @property
+    def message(self):
+        """Human-readable description of the transaction."""
+        if self.op == "add":
+            return f"Added item {self.item_id}: {self.name}"
+        if self.op == "remove":
+            return f"Removed item {self.item_id}: {self.name}"
+        if self.op == "update":
+            return (
+                f"Updated item {self.item_id}: Quantity {self.old_quantity} -> {self.new_quantity}, "
+                f"Price {self.old_price} -> {self.new_price}"
+            )
+        return self.note
+
+    def to_dict(self):
+        """Serialize to a dict, leaving out empty fields."""
+        return {
+            field: getattr(self, field)
+            for field in self.__slots__
+            if getattr(self, field) is not None
+        }
+
+    @classmethod
+    def from_data(cls, data):
+        """Build a transaction from a dict, or from a legacy ``[timestamp, message]`` pair."""
+        if isinstance(data, dict):
+            return cls(**data)
+        timestamp, message = data
+        return cls(int(datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()), "note", note=message)
+
+class TransactionLog:
+    """Append-only log of transactions in fixed-size segments, with a per-item position index.
+
+    With max_entries set, whole segments of the oldest entries are dropped once the log exceeds it.
+    """
+
+    def __init__(self, segment_size=4096, max_entries=None):
+        self.segment_size = segment_size
+        self.max_entries = max_entries
+        self.segments = []
+        self._base = 0
+        self._length = 0
+        self._positions_by_item = {}
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for segment in self.segments:
+            yield from segment
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("transaction index out of range")
+        return self._entry(self._base + index)
+
+    def _entry(self, position):
+        """Return the entry at an absolute position (counting dropped entries)."""
+        # Only whole segments are ever dropped, so every segment but the last is full
+        segment, offset = divmod(position - self._base, self.segment_size)
+        return self.segments[segment][offset]
+
+    def append(self, transaction):
+        """Append a transaction, dropping the oldest segment if the log is over max_entries."""
+        if not self.segments or len(self.segments[-1]) >= self.segment_size:
+            self.segments.append([])
+        self.segments[-1].append(transaction)
+        if transaction.item_id is not None:
+            self._positions_by_item.setdefault(transaction.item_id, []).append(self._base + self._length)
+        self._length += 1
+        if self.max_entries is not None and self._length - len(self.segments[0]) >= self.max_entries:
+            self.drop_oldest_segment()
+
+    def extend(self, transactions):
+        """Append several transactions."""
+        for transaction in transactions:
+            self.append(transaction)
+
+    def drop_oldest_segment(self):
+        """Remove the oldest segment of entries and return it."""
+        segment = self.segments.pop(0)
+        self._base += len(segment)
+        self._length -= len(segment)
+        for item_id in {transaction.item_id for transaction in segment if transaction.item_id is not None}:
+            positions = self._positions_by_item[item_id]
+            del positions[:bisect.bisect_left(positions, self._base)]
+            if not positions:
+                del self._positions_by_item[item_id]
+        return segment
+
+    def _first_position_since(self, since):
+        """Return the absolute position of the first entry with time >= since."""
+        if since is None or not self._length:
+            return self._base
+        # Bisect the segments on their first entry's time, without listing those times
+        segment_index = max(bisect.bisect_left(self.segments, since, key=lambda segment: segment[0].time) - 1, 0)
+        segment = self.segments[segment_index]
+        offset = bisect.bisect_left(segment, since, key=lambda transaction: transaction.time)
+        return self._base + segment_index * self.segment_size + offset
+
+    def _matching_positions(self, item_id, since):
+        """Return the matching absolute positions as a range or an index slice, oldest first."""
+        start = self._first_position_since(since)
+        if item_id is None:
+            return range(start, self._base + self._length)
+        positions = self._positions_by_item.get(item_id, [])
+        return positions[bisect.bisect_left(positions, start):]
+
+    def count(self, item_id=None, since=None):
+        """Count the transactions matching the filters."""
+        return len(self._matching_positions(item_id, since))
+
+    def query(self, offset=0, limit=50, item_id=None, since=None):
+        """Return up to limit matching transactions, newest first, skipping the newest offset."""
+        positions = self._matching_positions(item_id, since)
+        end = len(positions) - offset
+        start = max(end - limit, 0)
+        return [self._entry(positions[i]) for i in range(end - 1, start - 1, -1)]
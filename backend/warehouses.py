@@ -0,0 +1,260 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .inventory import VersionConflictError
+from .items import Item
+from .metrics import timed
+from .sqlite_storage import SQLiteInventory
+from .storage import open_inventory
+
+LOCATION_PATTERN = re.compile(r"^\w[\w -]*$")
+
+@dataclass(slots=True)
+class WarehouseSummary:
+    """Global aggregates merged from the shard summaries of every location."""
+    total_value: float
+    category_values: dict
+    category_counts: dict
+    location_values: dict
+    low_stock_counts: dict
+    versions: dict
+
+    @property
+    def low_stock_count(self):
+        """Number of stock lines below the threshold, summed over the locations."""
+        return sum(self.low_stock_counts.values())
+
+def _shard_summary(shard, threshold):
+    """Return the aggregates one shard maintains, as cheap as its engine allows."""
+    analytics = shard.analytics()
+    return (
+        analytics.total_value,
+        analytics.category_values,
+        analytics.category_counts,
+        analytics.low_stock_count(threshold),
+        analytics.version,
+    )
+
+def _low_stock_by_id(shard, threshold):
+    return {item.id: item for item in shard.get_low_stock_items(threshold)}
+
+class Warehouses:
+    """An inventory partitioned into one Inventory or SQLiteInventory shard per warehouse location.
+
+    Global views are merged from the shards' own aggregates, each read at its own moment.
+    """
+
+    def __init__(self, shards=None, directory=None, extension=".json", max_workers=None):
+        # Locations added without a shard get the data file <directory>/<location><extension>
+        self.shards = dict(shards or {})
+        self.directory = directory
+        self.extension = extension
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._transfer_lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers or os.cpu_count(), "warehouse-shard")
+        return self._executor
+
+    def _map(self, function, *args):
+        """Call function(shard, *args) for every shard; return ``{location: result}``."""
+        return self._map_locations(lambda location, shard: function(shard, *args))
+
+    def _map_locations(self, function):
+        """Call function(location, shard) for every shard; return ``{location: result}``."""
+        shards = list(self.shards.items())
+        # sqlite3 releases the GIL while a query runs; in-memory shards answer faster than a hand-off
+        parallel = [(location, shard) for location, shard in shards if isinstance(shard, SQLiteInventory)]
+        futures = {}
+        if len(parallel) > 1:
+            pool = self._pool()
+            futures = {location: pool.submit(function, location, shard) for location, shard in parallel}
+        results = {location: function(location, shard) for location, shard in shards if location not in futures}
+        results.update((location, future.result()) for location, future in futures.items())
+        return {location: results[location] for location, _ in shards}
+
+    def locations(self):
+        """Return the sorted names of the locations."""
+        return sorted(self.shards)
+
+    def location(self, location):
+        """Return the inventory shard of a location."""
+        shard = self.shards.get(location)
+        if shard is None:
+            raise ValueError(f"Unknown location {location!r}.")
+        return shard
+
+    def add_location(self, location, shard=None):
+        """Add a location backed by shard, or by a new data file in the warehouses directory; return its shard."""
+        if not LOCATION_PATTERN.match(location):
+            raise ValueError("Location names may only contain letters, digits, spaces, '-' and '_'.")
+        with self._lock:
+            if location in self.shards:
+                raise ValueError(f"Location {location!r} already exists.")
+            if shard is None:
+                if self.directory is None:
+                    raise ValueError("A shard is required when the warehouses have no directory.")
+                filename = os.path.join(self.directory, location + self.extension)
+                shard = open_inventory(filename)
+                if not os.path.exists(filename):
+                    # A new JSON shard only has a journal; write its snapshot so open_warehouses finds it
+                    shard.compact()
+            self.shards[location] = shard
+        return shard
+
+    def versions(self):
+        """Return the version of every shard; any mutation anywhere changes it."""
+        return {location: shard.version for location, shard in self.shards.items()}
+
+    def stock(self, item_id):
+        """Return ``{location: quantity}`` for the locations that stock an item."""
+        stock = {}
+        for location, shard in sorted(self.shards.items()):
+            item = shard.items_by_id.get(item_id)
+            if item is not None:
+                stock[location] = item.quantity
+        return stock
+
+    @timed("warehouses.transfer")
+    def transfer(self, item_id, source, destination, quantity):
+        """Move quantity units of an item from one location to another, creating its stock line if needed."""
+        if source == destination:
+            raise ValueError("Source and destination must be different locations.")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            raise ValueError("Transfer quantity must be a positive whole number.")
+        source_shard, destination_shard = self.location(source), self.location(destination)
+        with self._transfer_lock:
+            with source_shard.read_lock():
+                source_version = source_shard.version
+                item = source_shard.items_by_id.get(item_id)
+            if item is None:
+                raise ValueError(f"Item with ID {item_id} does not exist at {source}.")
+            if item.quantity < quantity:
+                raise ValueError(f"Only {item.quantity} units of item {item_id} are at {source}.")
+            with destination_shard.read_lock():
+                destination_version = destination_shard.version
+                existing = destination_shard.items_by_id.get(item_id)
+
+            # expected_version turns a concurrent change to either shard into VersionConflictError
+            source_shard.update_item(item_id, new_quantity=item.quantity - quantity, expected_version=source_version)
+            try:
+                if existing is None:
+                    destination_shard.add_item(
+                        Item(item_id, item.name, quantity, item.price, item.category),
+                        expected_version=destination_version,
+                    )
+                else:
+                    destination_shard.update_item(
+                        item_id, new_quantity=existing.quantity + quantity, expected_version=destination_version
+                    )
+            except Exception:
+                # Put the source back, so stock is never lost or counted twice
+                self._restore(source_shard, item_id, quantity)
+                raise
+
+    @staticmethod
+    def _restore(shard, item_id, quantity):
+        """Give back quantity units taken from shard by a transfer that failed halfway."""
+        while True:
+            with shard.read_lock():
+                version = shard.version
+                current = shard.items_by_id[item_id].quantity
+            try:
+                shard.update_item(item_id, new_quantity=current + quantity, expected_version=version)
+                return
+            except VersionConflictError:
+                continue
+
+    @timed("warehouses.summary")
+    def summary(self, threshold=10):
+        """Return the global aggregates, merged from every shard's summary."""
+        summaries = self._map(_shard_summary, threshold)
+        category_values = {}
+        category_counts = {}
+        for _, values, counts, _, _ in summaries.values():
+            for category, value in values.items():
+                category_values[category] = category_values.get(category, 0) + value
+            for category, count in counts.items():
+                category_counts[category] = category_counts.get(category, 0) + count
+        return WarehouseSummary(
+            total_value=sum(summary[0] for summary in summaries.values()),
+            category_values=dict(sorted(category_values.items())),
+            category_counts=dict(sorted(category_counts.items())),
+            location_values={location: summary[0] for location, summary in sorted(summaries.items())},
+            low_stock_counts={location: summary[3] for location, summary in sorted(summaries.items())},
+            versions={location: summary[4] for location, summary in sorted(summaries.items())},
+        )
+
+    def total_inventory_value(self):
+        """Return the total inventory value over all locations."""
+        return sum(self._map(lambda shard: shard.total_inventory_value()).values())
+
+    def category_values(self):
+        """Return the value of each category over all locations."""
+        return self.summary().category_values
+
+    @timed("warehouses.get_low_stock_items")
+    def get_low_stock_items(self, threshold=10):
+        """Get the items whose total quantity over all locations is below the threshold, lowest first."""
+        # Quantities are never negative, so such an item is low at every location that stocks it:
+        # merge the shards' low id -> quantity maps, and build items only for the answer
+        low_by_location = self._map(lambda shard: shard.low_stock_quantities(threshold))
+        totals = {}
+        for low in low_by_location.values():
+            for item_id, quantity in low.items():
+                totals[item_id] = totals.get(item_id, 0) + quantity
+        candidates = {item_id for item_id, total in totals.items() if total < threshold}
+        # A shard that stocks a candidate but did not list it holds at least threshold units of it
+        stocked = self._map_locations(
+            lambda location, shard: shard.existing_ids(candidates - low_by_location[location].keys())
+        )
+        for item_ids in stocked.values():
+            candidates -= item_ids
+        items = []
+        for location, low in low_by_location.items():
+            # Name, price and category come from the first location that listed the item
+            for item_id in candidates & low.keys():
+                item = self.shards[location].items_by_id.get(item_id)
+                if item is not None:
+                    items.append(Item(item_id, item.name, totals[item_id], item.price, item.category))
+            candidates -= low.keys()
+        return sorted(items, key=lambda item: (item.quantity, item.id))
+
+    def low_stock_by_location(self, threshold=10):
+        """Return ``{location: [items]}`` of the stock lines below the threshold at each location."""
+        return {
+            location: list(low.values())
+            for location, low in sorted(self._map(_low_stock_by_id, threshold).items())
+        }
+
+    def refresh(self):
+        """Catch up every shard that another process changed."""
+        for shard in self.shards.values():
+            if shard.is_stale():
+                shard.refresh()
+
+    def close(self):
+        """Stop the thread pool and close every shard."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for shard in self.shards.values():
+            shard.close()
+
+def open_warehouses(directory, extension=".json", max_workers=None):
+    """Open every ``<location><extension>`` file in directory as the shard of that location."""
+    warehouses = Warehouses(directory=directory, extension=extension, max_workers=max_workers)
+    os.makedirs(directory, exist_ok=True)
+    for filename in sorted(os.listdir(directory)):
+        location, file_extension = os.path.splitext(filename)
+        if file_extension == extension and LOCATION_PATTERN.match(location):
+            warehouses.add_location(location, open_inventory(os.path.join(directory, filename)))
+    return warehouses
@@ -0,0 +1,251 @@
+"""Load-test the HTTP API and report requests/sec and tail latency.
+
+Opens --concurrency keep-alive connections and keeps each one busy for
+--duration seconds with a mix of requests:
+
+  read   GET a random item, a page of /items, /analytics or /low-stock;
+         with --revalidate a client that has seen a response sends its
+         ETag back in If-None-Match, as a polling dashboard would
+  write  PATCH a random item's quantity
+
+--write-ratio sets the share of writes. Without --url the script starts
+the server itself (python -m backend.api) on a generated catalog, once per
+engine and per --group-ops value, so runs with 1 (every request committed
+on its own) and the default (concurrent writes coalesced) compare the
+write coalescing. --output, --compare and --tolerance work as in
+hot_paths.compare(), on requests/sec.
+
+Usage:
+  python benchmarks/api_load.py [--items 100000] [--concurrency 64] [--duration 10] [--group-ops 1 1000]
+  python benchmarks/api_load.py --url http://127.0.0.1:8000 --write-ratio 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+# Make the backend importable when run as a script from anywhere
+sys.path.append(ROOT)
+
+from backend.history import TIMESTAMP_FORMAT
+from backend.inventory import Inventory
+from backend.sqlite_storage import SQLiteInventory
+from benchmarks.hot_paths import compare, git_revision, percentile, write_catalog
+
+ENGINES = ("json", "sqlite")
+
+class Connection:
+    """A minimal HTTP/1.1 keep-alive client connection for JSON requests."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        """Send one request and return ``(status, headers, body)``."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", f"Content-Length: {len(payload)}"]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self.writer.write("\r\n".join(lines).encode("latin-1") + b"\r\n\r\n" + payload)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        response_headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+        length = int(response_headers.get("content-length", 0))
+        content = await self.reader.readexactly(length) if length else b""
+        return int(status_line.split()[1]), response_headers, content
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def read_paths(items, rng):
+    """Yield an endless mix of read requests."""
+    while True:
+        choice = rng.random()
+        if choice < 0.5:
+            yield "read", f"/items/{rng.randint(1, items)}"
+        elif choice < 0.7:
+            yield "read", f"/items?offset={rng.randrange(0, max(items - 50, 1), 50)}&limit=50"
+        elif choice < 0.9:
+            yield "read", "/analytics"
+        else:
+            yield "read", "/low-stock?threshold=10"
+
+async def client(connection, args, items, deadline, latencies, statuses, seed):
+    rng = random.Random(seed)
+    reads = read_paths(items, rng)
+    etags = {}
+    while time.perf_counter() < deadline:
+        if rng.random() < args.write_ratio:
+            kind, method, path = "write", "PATCH", f"/items/{rng.randint(1, items)}"
+            body, headers = {"quantity": rng.randint(0, 100)}, None
+        else:
+            (kind, path), method, body = next(reads), "GET", None
+            headers = {"If-None-Match": etags[path]} if args.revalidate and path in etags else None
+        start = time.perf_counter()
+        status, response_headers, _ = await connection.request(method, path, body, headers)
+        latencies[kind].append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+        if kind == "read" and "etag" in response_headers:
+            etags[path] = response_headers["etag"]
+
+async def load(args, url, items):
+    """Run the clients against url; return their latencies and status counts."""
+    parts = urlsplit(url)
+    connections = [Connection(parts.hostname, parts.port or 80) for _ in range(args.concurrency)]
+    latencies = {"read": [], "write": []}
+    statuses = {}
+    started = time.perf_counter()
+    deadline = started + args.duration
+    try:
+        await asyncio.gather(*(
+            client(connection, args, items, deadline, latencies, statuses, args.seed + number)
+            for number, connection in enumerate(connections)
+        ))
+    finally:
+        for connection in connections:
+            connection.close()
+    return latencies, statuses, time.perf_counter() - started
+
+def summarize(latencies, statuses, seconds, **labels):
+    """Return the result row of one run."""
+    every = sorted(latencies["read"] + latencies["write"])
+    row = dict(labels, requests=len(every), rps=len(every) / seconds, statuses=statuses)
+    for kind, samples in (("all", every), ("read", sorted(latencies["read"])), ("write", sorted(latencies["write"]))):
+        for name, fraction in (("p50", 0.50), ("p99", 0.99), ("p999", 0.999)):
+            row[f"{kind}_{name}_ms"] = percentile(samples, fraction) * 1000 if samples else None
+    return row
+
+def prepare(directory, engine, items, categories):
+    """Write a catalog data file for engine and return its path."""
+    json_file = os.path.join(directory, "catalog.json")
+    write_catalog(json_file, items, categories)
+    if engine == "json":
+        return json_file
+    inventory = Inventory()
+    inventory.load_from_file(json_file)
+    database = SQLiteInventory(os.path.join(directory, "catalog.db"))
+    database.import_inventory(inventory)
+    database.close()
+    return database.path
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def start_server(data_file, group_ops):
+    """Start python -m backend.api on data_file; return the process and its URL once it accepts connections."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "backend.api", "--data-file", data_file, "--port", str(port), "--group-ops", str(group_ops)],
+        cwd=ROOT,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The API server exited with status {process.returncode}.")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("The API server did not start within 120 seconds.")
+
+def print_results(results):
+    print(f"{'run':<24}{'requests':>10}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'p999 ms':>9}"
+          f"{'read p99':>10}{'write p99':>11}  statuses")
+    def ms(value):
+        return "-" if value is None else f"{value:.1f}"
+    for row in results:
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(row["statuses"].items()))
+        print(f"{row['run']:<24}{row['requests']:>10,}{row['rps']:>10,.0f}{ms(row['all_p50_ms']):>9}"
+              f"{ms(row['all_p99_ms']):>9}{ms(row['all_p999_ms']):>9}{ms(row['read_p99_ms']):>10}"
+              f"{ms(row['write_p99_ms']):>11}  {statuses}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="load-test a running server instead of starting one")
+    parser.add_argument("--items", type=int, default=100_000, help="catalog size; with --url, the ids to request")
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=["json"])
+    parser.add_argument("--group-ops", type=int, nargs="+", default=[1, 1000],
+                        help="server --group-ops values to run; 1 turns write coalescing off")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per run")
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--revalidate", action="store_true", help="send If-None-Match with the last ETag seen")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed drop in requests/sec")
+    args = parser.parse_args()
+
+    results = []
+    if args.url:
+        print(f"Loading {args.url} for {args.duration:g}s...", file=sys.stderr)
+        latencies, statuses, seconds = asyncio.run(load(args, args.url, args.items))
+        results.append(summarize(latencies, statuses, seconds, run="url"))
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            for engine in args.engines:
+                for group_ops in args.group_ops:
+                    # A fresh catalog per run, so no run starts from another's writes
+                    run_directory = os.path.join(directory, f"{engine}-{group_ops}")
+                    os.makedirs(run_directory)
+                    data_file = prepare(run_directory, engine, args.items, args.categories)
+                    process, url = start_server(data_file, group_ops)
+                    try:
+                        print(f"Loading {engine} with --group-ops {group_ops} for {args.duration:g}s...", file=sys.stderr)
+                        latencies, statuses, seconds = asyncio.run(load(args, url, args.items))
+                    finally:
+                        process.terminate()
+                        process.wait()
+                    results.append(summarize(latencies, statuses, seconds, run=f"{engine} group-ops {group_ops}"))
+    print_results(results)
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime(TIMESTAMP_FORMAT),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "items": args.items,
+            "concurrency": args.concurrency,
+            "write_ratio": args.write_ratio,
+            "revalidate": args.revalidate,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.tolerance, key=("run",), metric="rps", columns=("all_p99_ms",)):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
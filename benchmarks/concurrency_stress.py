@@ -0,0 +1,138 @@
+"""Stress a journalled inventory shared by several processes and threads.
+
+Every worker thread runs a mix of optimistic read-modify-write increments on
+a few shared counter items, adds of its own items and removes of items it
+added earlier, saving after each one like the app does. At the end the data
+file is reloaded and checked for lost updates: every counter must hold the
+number of increments made, exactly the surviving added items must exist and
+the version, transaction log and value history must account for every
+mutation exactly once.
+
+Usage: python benchmarks/concurrency_stress.py [--processes 4] [--threads 4] [--ops 200]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Make the backend importable when run as a script from anywhere
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from backend.inventory import Inventory, VersionConflictError
+from backend.items import Item
+
+def open_inventory(filename, compact_every):
+    inventory = Inventory()
+    inventory.enable_journal(filename, compact_every)
+    inventory.enable_history_store(filename)
+    inventory.load_from_file(filename)
+    return inventory
+
+def increment(inventory, item_id):
+    """Add one to an item's quantity, retrying on version conflicts; return the conflicts hit."""
+    conflicts = 0
+    while True:
+        with inventory.read_lock():
+            version = inventory.version
+            quantity = inventory.items_by_id[item_id].quantity
+        try:
+            inventory.update_item(item_id, new_quantity=quantity + 1, expected_version=version)
+            return conflicts
+        except VersionConflictError:
+            conflicts += 1
+
+def run_thread(inventory, filename, worker, ops, counters, result):
+    rng = random.Random(worker)
+    increments = [0] * counters
+    added = []
+    next_id = (worker + 1) * 1_000_000
+    conflicts = 0
+    for _ in range(ops):
+        roll = rng.random()
+        if roll < 0.6:
+            counter = rng.randrange(counters)
+            conflicts += increment(inventory, counter + 1)
+            increments[counter] += 1
+        elif roll < 0.8 or not added:
+            inventory.add_item(Item(next_id, f"Worker {worker} item {next_id}", 1, 1.0, f"Worker {worker % 4}"))
+            added.append(next_id)
+            next_id += 1
+        else:
+            inventory.remove_item(added.pop(rng.randrange(len(added))))
+        inventory.save_to_file(filename)
+    result.append((increments, added, conflicts))
+
+def run_process(filename, process, threads, ops, counters, compact_every, queue):
+    inventory = open_inventory(filename, compact_every)
+    results = []
+    workers = [
+        threading.Thread(target=run_thread, args=(inventory, filename, process * threads + t, ops, counters, results))
+        for t in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    inventory.close()
+    queue.put(results)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=200, help="mutations per thread")
+    parser.add_argument("--counters", type=int, default=4, help="shared items every thread increments")
+    parser.add_argument("--compact-every", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "inventory_data.json")
+        inventory = open_inventory(filename, args.compact_every)
+        inventory.apply_batch({"op": "add", "item": Item(i + 1, f"Counter {i + 1}", 0, 1.0, "Counters")}
+                              for i in range(args.counters))
+        setup_version = inventory.version
+        inventory.close()
+
+        queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=run_process,
+                args=(filename, p, args.threads, args.ops, args.counters, args.compact_every, queue),
+            )
+            for p in range(args.processes)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        results = [result for _ in processes for result in queue.get()]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        inventory = open_inventory(filename, args.compact_every)
+        increments = [sum(result[0][i] for result in results) for i in range(args.counters)]
+        expected_ids = set(range(1, args.counters + 1)).union(*(result[1] for result in results))
+        conflicts = sum(result[2] for result in results)
+        total_ops = args.processes * args.threads * args.ops
+
+        print(f"{args.processes} processes x {args.threads} threads x {args.ops} ops")
+        print(f"{total_ops:,} mutations in {elapsed:.2f} s: {total_ops / elapsed:,.0f} ops/s, "
+              f"{conflicts:,} version conflicts retried")
+        counters = [inventory.items_by_id[i + 1].quantity for i in range(args.counters)]
+        assert counters == increments, f"lost increments: {counters} != {increments}"
+        assert set(inventory.items_by_id) == expected_ids, "lost or resurrected adds/removes"
+        assert inventory.version == setup_version + total_ops, (
+            f"version {inventory.version} != {setup_version + total_ops}"
+        )
+        assert inventory.count_transactions() == args.counters + total_ops, "lost transactions"
+        assert len(inventory.inventory_value_history) == inventory.version, "lost or duplicated history rows"
+        assert inventory.verify_aggregates()
+        inventory.close()
+        print("No lost updates.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compare low-stock alerting through the event bus with polling the inventory after each change.
+
+For each catalog size every case makes the same quantity updates, which
+move random items across the low-stock threshold, and keeps the low-stock
+view current its own way:
+
+  no_alerts     the update alone, with events disabled
+  events        the update with events enabled and one subscriber; alerts
+                are evaluated as the change is applied
+  poll_count    the update, then analytics().low_stock_count() as the sidebar
+                did on every rerun
+  poll_items    the update, then get_low_stock_items() as the Low Stock page does
+
+--output, --compare and --tolerance work as in hot_paths.compare().
+
+Usage:
+  python benchmarks/events.py [--sizes 1000 100000 1000000] [--engines json sqlite]
+  python benchmarks/events.py --compare events.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+from datetime import datetime
+
+# Make the backend importable when run as a script from anywhere
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from backend.history import TIMESTAMP_FORMAT
+from backend.inventory import Inventory
+from backend.sqlite_storage import SQLiteInventory
+from benchmarks.hot_paths import compare, git_revision, measure, write_catalog
+
+ENGINES = ("json", "sqlite")
+CASES = ("no_alerts", "events", "poll_count", "poll_items")
+THRESHOLD = 10
+
+def open_catalog(directory, engine, size, categories, case):
+    """Return a fresh inventory of the generated catalog for one case."""
+    json_file = os.path.join(directory, f"catalog-{size}.json")
+    if not os.path.exists(json_file):
+        write_catalog(json_file, size, categories)
+    inventory = Inventory()
+    inventory.load_from_file(json_file)
+    if engine == "sqlite":
+        database = SQLiteInventory(os.path.join(directory, f"{case}-{size}.db"))
+        database.import_inventory(inventory)
+        inventory = database
+    return inventory
+
+def alert_case(inventory, case, size, rng):
+    """Return operation(i) for a case: one quantity update plus keeping the low-stock view current."""
+    alerts = []
+    if case == "events":
+        inventory.enable_events().subscribe(alerts.append, kinds=("low_stock", "restocked"))
+
+    def update(i):
+        # Half the new quantities are below the threshold, so many updates open or close an alert
+        inventory.update_item(rng.randint(1, size), new_quantity=rng.randint(0, 2 * THRESHOLD))
+
+    if case == "poll_count":
+        return lambda i: (update(i), inventory.analytics().low_stock_count(THRESHOLD))
+    if case == "poll_items":
+        return lambda i: (update(i), inventory.get_low_stock_items(THRESHOLD))
+    return update
+
+def print_results(results):
+    print(f"{'engine':<8}{'size':>10}  {'case':<14}{'ops':>7}{'ops/s':>13}{'p50 us':>14}{'p99 us':>14}")
+    for result in results:
+        print(f"{result['engine']:<8}{result['size']:>10,}  {result['case']:<14}{result['ops']:>7,}"
+              f"{result['ops_per_sec']:>13,.1f}{result['p50_us']:>14,.1f}{result['p99_us']:>14,.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--ops", type=int, default=2000, help="updates per case")
+    parser.add_argument("--max-seconds", type=float, default=10, help="stop a case early after this long")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before a case fails")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for engine in args.engines:
+            for size in args.sizes:
+                for case in args.cases:
+                    print(f"Running {engine} {size:,} {case}...", file=sys.stderr)
+                    inventory = open_catalog(directory, engine, size, args.categories, case)
+                    operation = alert_case(inventory, case, size, random.Random(args.seed))
+                    results.append(dict(measure(case, operation, args.ops, args.max_seconds, warmup=1),
+                                        engine=engine, size=size))
+                    if engine == "sqlite":
+                        inventory.close()
+    print_results(results)
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime(TIMESTAMP_FORMAT),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.tolerance, key=("engine", "size", "case")):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
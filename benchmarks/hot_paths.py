@@ -0,0 +1,298 @@
+"""Benchmark the Inventory hot paths on synthetic catalogs and compare against a baseline.
+
+For each catalog size a synthetic catalog is written to a data file once;
+each workload then loads it in a fresh subprocess, so peak memory is
+measured per workload:
+
+  mutation     add_item, update_item, remove_item and the value history append
+  query        low stock, category, search, total value, transaction and item pages
+  persistence  save_to_file and load_from_file round-trips
+
+Every case reports ops/sec, p50/p99 latency and the process peak RSS after
+it ran. --output writes the results as JSON; --compare reads such a file
+as the baseline, prints the change per case and exits with status 1 if
+any case is slower (or, with --memory, bigger) by more than --tolerance.
+The other benchmarks compare their results the same way, through
+compare() below.
+
+Usage:
+  python benchmarks/hot_paths.py [--sizes 1000 100000] [--categories 50] [--output results.json]
+  python benchmarks/hot_paths.py --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Make the backend importable when run as a script from anywhere
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from backend.history import TIMESTAMP_FORMAT
+from backend.indexes import SORT_COLUMNS
+from backend.inventory import Inventory
+from backend.items import Item, item_to_dict
+from backend.jsonstream import write_members
+
+WORKLOADS = ("mutation", "query", "persistence")
+ADJECTIVES = ("Red", "Blue", "Steel", "Heavy", "Compact", "Wireless", "Spare", "Premium", "Basic", "Large")
+NOUNS = ("Bolt", "Widget", "Cable", "Valve", "Panel", "Sensor", "Bracket", "Motor", "Filter", "Switch")
+
+def generate_catalog(count, categories, seed=0):
+    """Yield count deterministic Items spread over the given number of categories."""
+    rng = random.Random(seed)
+    for item_id in range(1, count + 1):
+        yield Item(
+            item_id,
+            f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {item_id}",
+            rng.randrange(500),
+            round(rng.uniform(1, 1000), 2),
+            f"Category {rng.randrange(categories)}",
+        )
+
+def write_catalog(filename, count, categories, seed=0):
+    """Write a generated catalog as a data file in the save_to_file layout."""
+    with open(filename, "w") as file:
+        write_members(file, [
+            ("items", (item_to_dict(item) for item in generate_catalog(count, categories, seed))),
+            ("seq", 0),
+        ])
+
+def peak_rss():
+    """Peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def measure(name, operation, ops, max_seconds, warmup=0):
+    """Time operation(i) for i in range(ops), stopping early after max_seconds; return its result row."""
+    # Untimed calls first, so caches and lazily built structures are in place
+    for i in range(warmup):
+        operation(i)
+    latencies = []
+    clock = time.perf_counter_ns
+    deadline = clock() + max_seconds * 1e9
+    for i in range(warmup, warmup + ops):
+        start = clock()
+        operation(i)
+        end = clock()
+        latencies.append(end - start)
+        if end > deadline:
+            break
+    total = sum(latencies)
+    latencies.sort()
+    return {
+        "case": name,
+        "ops": len(latencies),
+        "ops_per_sec": len(latencies) / (total / 1e9) if total else float("inf"),
+        "p50_us": percentile(latencies, 0.50) / 1e3,
+        "p99_us": percentile(latencies, 0.99) / 1e3,
+        "peak_rss_bytes": peak_rss(),
+    }
+
+def mutation_cases(inventory, size, categories, rng):
+    """Adds of new items, updates of existing ones and removes of the added items, in that order."""
+    first_new = size + 1
+    new_items = generate_catalog(10**9, categories, seed=1)
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+
+    added = []
+    def add(i):
+        item = next(new_items)
+        inventory.add_item(Item(first_new + i, item.name, item.quantity, item.price, item.category))
+        added.append(first_new + i)
+
+    def update(i):
+        inventory.update_item(rng.randrange(1, size + 1), new_quantity=rng.randrange(500))
+
+    def remove(i):
+        if added:
+            inventory.remove_item(added.pop())
+
+    yield "add_item", add
+    yield "update_item", update
+    yield "remove_item", remove
+    yield "value_history_append", lambda i: inventory._update_inventory_value_history(timestamp)
+
+def query_cases(inventory, size, categories, rng):
+    yield "get_low_stock_items", lambda i: inventory.get_low_stock_items(threshold=10)
+    yield "count_low_stock_items", lambda i: inventory.count_low_stock_items(threshold=10)
+    yield "get_items_by_category", lambda i: inventory.get_items_by_category(f"Category {rng.randrange(categories)}")
+    yield "search_items", lambda i: inventory.search_items(f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)[:3]}")
+    yield "search_items_by_id", lambda i: inventory.search_items(str(rng.randrange(1, size + 1)))
+    yield "total_inventory_value", lambda i: inventory.total_inventory_value()
+    yield "transactions_page", lambda i: inventory.transactions(offset=rng.randrange(100), limit=50)
+    yield "query_items_page", lambda i: inventory.query_items(
+        sort_by=rng.choice(SORT_COLUMNS), descending=rng.random() < 0.5, offset=rng.randrange(size), limit=50
+    )
+
+def persistence_cases(inventory, directory, compact_storage):
+    filename = os.path.join(directory, "inventory_data.json")
+    yield "save_to_file", lambda i: inventory.save_to_file(filename)
+    yield "load_from_file", lambda i: Inventory(compact_storage=compact_storage).load_from_file(filename)
+
+def run_workload(args, size, workload):
+    """Run one workload on a fresh catalog in this process; return its result rows."""
+    start = time.perf_counter()
+    # Loading builds the indexes in bulk; adding the catalog item by item would take far longer
+    inventory = Inventory(compact_storage=args.compact_storage)
+    inventory.load_from_file(args.catalog)
+    setup = {"case": "setup", "ops": 1, "seconds": time.perf_counter() - start, "peak_rss_bytes": peak_rss()}
+    rng = random.Random(args.seed)
+    results = [setup]
+    with tempfile.TemporaryDirectory() as directory:
+        if workload == "mutation":
+            cases, ops = mutation_cases(inventory, size, args.categories, rng), args.ops
+        elif workload == "query":
+            cases, ops = query_cases(inventory, size, args.categories, rng), args.ops
+        else:
+            cases, ops = persistence_cases(inventory, directory, args.compact_storage), args.persistence_ops
+        for name, operation in cases:
+            results.append(measure(name, operation, ops, args.max_seconds, warmup=min(ops // 10, 100)))
+    for result in results:
+        result.update(size=size, workload=workload)
+    return results
+
+def run_in_subprocess(args, size, workload, catalog):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--run", workload, "--sizes", str(size), "--catalog", catalog,
+        "--categories", str(args.categories), "--ops", str(args.ops),
+        "--persistence-ops", str(args.persistence_ops), "--max-seconds", str(args.max_seconds),
+        "--seed", str(args.seed),
+    ]
+    if args.compact_storage:
+        command.append("--compact-storage")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results):
+    print(f"{'size':>10}  {'workload':<12}{'case':<24}{'ops':>7}{'ops/s':>13}{'p50 us':>14}{'p99 us':>14}{'peak MiB':>10}")
+    for result in results:
+        if result["case"] == "setup":
+            print(f"{result['size']:>10,}  {result['workload']:<12}{'setup':<24}{'':>7}"
+                  f"{result['seconds']:>12.2f}s{'':>28}{result['peak_rss_bytes'] / 2**20:>10,.0f}")
+            continue
+        print(f"{result['size']:>10,}  {result['workload']:<12}{result['case']:<24}{result['ops']:>7,}"
+              f"{result['ops_per_sec']:>13,.1f}{result['p50_us']:>14,.1f}{result['p99_us']:>14,.1f}"
+              f"{result['peak_rss_bytes'] / 2**20:>10,.0f}")
+
+def relative_change(new, old):
+    """Return new / old - 1, treating any change from zero as infinite."""
+    if old:
+        return new / old - 1
+    return float("inf") if new else 0.0
+
+def compare(results, baseline, tolerance, key, metric="ops_per_sec", lower_is_better=False, columns=(), check=None):
+    """Print each result's change against the baseline; return the keys of the results that regressed.
+
+    Rows are matched on the key fields; one regresses when metric moves the wrong way by more than tolerance,
+    or when check(row, old) returns a reason. This is what --compare does in every benchmark.
+    """
+    previous = {tuple(row[field] for field in key): row for row in baseline["results"]}
+    # One column per key field, numbers right-aligned
+    cells = [[f"{row[field]:,}" if isinstance(row[field], int) else str(row[field]) for field in key] for row in results]
+    widths = [max((len(row_cells[i]) for row_cells in cells), default=0) for i in range(len(key))]
+    labels = ["  ".join(
+        cell.rjust(width) if isinstance(row[field], int) else cell.ljust(width)
+        for cell, width, field in zip(row_cells, widths, key)
+    ) for row, row_cells in zip(results, cells)]
+    width = max(map(len, labels), default=0) + 2
+    regressions = []
+    print(f"\nAgainst baseline {baseline['meta'].get('revision') or ''} ({baseline['meta']['created']}), "
+          f"tolerance {tolerance:.0%}")
+    print(f"{'':<{width}}{metric:>14}" + "".join(f"{column:>16}" for column in columns))
+    for row, label in zip(results, labels):
+        row_key = tuple(row[field] for field in key)
+        old = previous.get(row_key)
+        if old is None or metric not in row:
+            continue
+        change = relative_change(row[metric], old[metric])
+        reason = check(row, old) if check is not None else None
+        regressed = (change > tolerance if lower_is_better else change < -tolerance) or reason is not None
+        if regressed:
+            regressions.append(row_key)
+        print(f"{label:<{width}}{change:>+14.0%}"
+              + "".join(f"{relative_change(row[column], old[column]):>+16.0%}" for column in columns)
+              + (f"  {reason}" if reason else "") + ("  REGRESSION" if regressed else ""))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000],
+                        help="catalog sizes to run, e.g. 1000 1000000 10000000")
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--ops", type=int, default=2000, help="operations per mutation or query case")
+    parser.add_argument("--persistence-ops", type=int, default=3, help="round-trips per persistence case")
+    parser.add_argument("--max-seconds", type=float, default=10, help="stop a case early after this long")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compact-storage", action="store_true", help="keep items in an ItemTable")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before a case fails")
+    parser.add_argument("--memory", action="store_true", help="also fail cases whose peak RSS grew too much")
+    parser.add_argument("--run", choices=WORKLOADS, help=argparse.SUPPRESS)
+    parser.add_argument("--catalog", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_workload(args, args.sizes[0], args.run)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            catalog = os.path.join(directory, f"catalog-{size}.json")
+            print(f"Generating {size:,} items...", file=sys.stderr)
+            write_catalog(catalog, size, args.categories, args.seed)
+            for workload in args.workloads:
+                print(f"Running {workload} on {size:,} items...", file=sys.stderr)
+                results.extend(run_in_subprocess(args, size, workload, catalog))
+            os.remove(catalog)
+    print_results(results)
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime(TIMESTAMP_FORMAT),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "categories": args.categories,
+            "compact_storage": args.compact_storage,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        def memory_check(row, old):
+            growth = relative_change(row["peak_rss_bytes"], old["peak_rss_bytes"])
+            return f"peak RSS {growth:+.0%}" if args.memory and growth > args.tolerance else None
+
+        if compare(results, baseline, args.tolerance, key=("size", "workload", "case"),
+                   columns=("p50_us", "p99_us", "peak_rss_bytes"), check=memory_check):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Measure the imports and wall time of the app's cold start and of each page's first visit.
+
+Each measurement runs the real frontend/app.py with Streamlit's AppTest in a
+fresh ``python -X importtime`` process, after Streamlit itself and its test
+harness are already imported, and attributes every module imported from
+then on to a phase:
+
+  startup  the first rerun: backend, sidebar and the default page
+  <page>   switching to that page for the first time after startup
+
+For each phase it reports wall time, total import time, the number of
+modules imported, which heavy libraries (pandas, plotly, reportlab, ...)
+were loaded and the slowest top-level imports. --output, --compare and
+--tolerance work as in hot_paths.compare(); a phase regresses when its
+import time grew by more than --tolerance or it loads a new heavy library.
+
+Usage:
+  python benchmarks/import_time.py [--pages Dashboard "Value Trend"] [--output imports.json]
+  python benchmarks/import_time.py --compare imports.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+APP = os.path.join(ROOT, "frontend", "app.py")
+# Make the frontend importable when run as a script from anywhere
+sys.path.append(ROOT)
+
+from frontend.views import PAGES
+
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "plotly", "plotly.express", "reportlab", "openpyxl", "multiprocessing", "sqlite3")
+MARKER = "@@phase "
+DEFAULT_PAGE = "Inventory"
+
+def run_phases(page):
+    """Child process: run the app's startup, then visit page, marking each phase on stderr."""
+    from streamlit.testing.v1 import AppTest
+
+    # Warm up the harness so only the app's own imports land in the phases
+    AppTest.from_string("import streamlit as st\nst.write('warm up')").run()
+    timings = {}
+    print(MARKER + "startup", file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    app = AppTest.from_file(APP, default_timeout=300).run()
+    timings["startup"] = time.perf_counter() - start
+    if page:
+        print(MARKER + page, file=sys.stderr, flush=True)
+        start = time.perf_counter()
+        app.sidebar.radio[0].set_value(page).run()
+        timings[page] = time.perf_counter() - start
+    print(MARKER + "end", file=sys.stderr, flush=True)
+    errors = [str(exception.value) for exception in app.exception]
+    print(json.dumps({"seconds": timings, "errors": errors}))
+
+def parse_importtime(stderr):
+    """Return ``{phase: [(name, self_us, cumulative_us, depth)]}`` from -X importtime output split by markers."""
+    phases = {}
+    current = None
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            current = line[len(MARKER):]
+            phases.setdefault(current, [])
+        elif line.startswith("import time:") and current is not None and current != "end":
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            if not self_us.strip().isdigit():
+                continue  # the header line
+            phases[current].append((name.strip(), int(self_us), int(cumulative_us), len(name) - len(name.lstrip()) - 1))
+    phases.pop("end", None)
+    return phases
+
+def summarize(imports, seconds, top):
+    """Summarize one phase's imports."""
+    names = {name for name, _, _, _ in imports}
+    top_level = sorted((entry for entry in imports if entry[3] == 0), key=lambda entry: -entry[2])
+    return {
+        "seconds": seconds,
+        "import_ms": sum(self_us for _, self_us, _, _ in imports) / 1000,
+        "modules": len(imports),
+        "heavy": [module for module in HEAVY_MODULES if module in names],
+        "slowest": [[name, cumulative_us / 1000] for name, _, cumulative_us, _ in top_level[:top]],
+    }
+
+def measure(page, data_file, top):
+    """Run one child process and return ``{phase: summary}``."""
+    env = dict(os.environ, WARETRACK_DATA_FILE=data_file)
+    command = [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--run"]
+    if page:
+        command += ["--page", page]
+    process = subprocess.run(command, check=True, capture_output=True, text=True, env=env, cwd=ROOT)
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    if result["errors"]:
+        raise RuntimeError(f"The app raised on {page or 'startup'}: {result['errors']}")
+    phases = parse_importtime(process.stderr)
+    return {phase: summarize(phases[phase], seconds, top) for phase, seconds in result["seconds"].items()}
+
+def print_results(results):
+    print(f"{'phase':<22}{'wall ms':>10}{'import ms':>11}{'modules':>9}  heavy libraries / slowest imports")
+    for phase, summary in results.items():
+        slowest = ", ".join(f"{name} {ms:.0f}" for name, ms in summary["slowest"])
+        print(f"{phase:<22}{summary['seconds'] * 1000:>10.0f}{summary['import_ms']:>11.0f}{summary['modules']:>9}  "
+              f"{', '.join(summary['heavy']) or '-'}")
+        if slowest:
+            print(f"{'':<52}{slowest}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="*", help="pages to visit after startup (default: all)")
+    parser.add_argument("--data-file", help="inventory data file to open (default: an empty temporary one)")
+    parser.add_argument("--top", type=int, default=3, help="slowest top-level imports to list per phase")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed growth of a phase's import time")
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--page", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_phases(args.page)
+        return
+    # Imported only here: the measured child runs this file too, and must not have the backend preloaded
+    from benchmarks.hot_paths import compare, git_revision
+
+    pages = args.pages if args.pages is not None else [page for page in PAGES if page != DEFAULT_PAGE]
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = args.data_file or os.path.join(directory, "inventory_data.json")
+        results.update(measure(None, data_file, args.top))
+        for page in pages:
+            print(f"Measuring {page}...", file=sys.stderr)
+            results[page] = measure(page, data_file, args.top)[page]
+    print_results(results)
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        def new_heavy(row, old):
+            loaded = sorted(set(row["heavy"]) - set(old["heavy"]))
+            return "now loads " + ", ".join(loaded) if loaded else None
+
+        rows = [dict(summary, phase=phase) for phase, summary in results.items()]
+        baseline_rows = [dict(summary, phase=phase) for phase, summary in baseline["results"].items()]
+        if compare(rows, dict(baseline, results=baseline_rows), args.tolerance, key=("phase",), metric="import_ms",
+                   lower_is_better=True, columns=("seconds",), check=new_heavy):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare the memory footprint of the item storage modes.
+
+Usage: python benchmarks/item_storage_memory.py [--items 1000000] [--categories 50]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+# Make the backend importable when run as a script from anywhere
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from backend.items import Item, ItemTable
+
+@dataclass
+class DictItem:
+    """The original Item layout: a plain dataclass with a per-instance __dict__."""
+    id: int
+    name: str
+    quantity: int
+    price: float
+    category: str
+
+def generate_rows(count, categories):
+    # Fresh strings per row, the way json.load produces them
+    for i in range(1, count + 1):
+        yield i, f"Item {i}", i % 500, float(i % 1000) + 0.99, f"Category {i % categories}"
+
+def build_dataclass_dict(count, categories):
+    return {row[0]: DictItem(*row) for row in generate_rows(count, categories)}
+
+def build_slots_dict(count, categories):
+    return {row[0]: Item(*row) for row in generate_rows(count, categories)}
+
+def build_item_table(count, categories):
+    table = ItemTable()
+    for row in generate_rows(count, categories):
+        table[row[0]] = Item(*row)
+    return table
+
+def measure(build, count, categories):
+    """Return (bytes allocated, seconds) to build one storage."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    storage = build(count, categories)
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del storage
+    return allocated, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=50)
+    args = parser.parse_args()
+
+    modes = [
+        ("dict of @dataclass (original)", build_dataclass_dict),
+        ("dict of @dataclass(slots=True)", build_slots_dict),
+        ("ItemTable (struct of arrays)", build_item_table),
+    ]
+    print(f"{args.items:,} items, {args.categories} categories")
+    print(f"{'storage':<34}{'MiB':>10}{'bytes/item':>12}{'build s':>10}")
+    baseline = None
+    for label, build in modes:
+        allocated, elapsed = measure(build, args.items, args.categories)
+        baseline = baseline or allocated
+        print(f"{label:<34}{allocated / 2**20:>10.1f}{allocated / args.items:>12.1f}{elapsed:>10.2f}"
+              f"  ({allocated / baseline:.0%} of original)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Compare peak memory and wall time of whole-document and streaming JSON load/save.
+
+Generates a data file of about --size-mb in the save_to_file layout (items
+plus the transaction log), then runs each mode in a fresh subprocess:
+
+  load-document  json.load the whole file, then build the inventory (the old loader)
+  load-stream    Inventory.load_from_file, which streams the file member by member
+  save-document  build the full data dict and json.dump it (the old writer)
+  save-stream    Inventory.save_to_file, which writes items one at a time
+
+Save modes load with the streaming loader first and report how much the
+save itself added on top of the loaded inventory.
+
+Usage: python benchmarks/json_streaming.py [--size-mb 1024] [--file data.json]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Make the backend importable when run as a script from anywhere
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from backend.indexes import InventoryIndex
+from backend.inventory import Inventory
+from backend.items import item_from_dict, item_to_dict
+from backend.jsonstream import write_members
+from backend.transactions import Transaction, TransactionLog
+
+MODES = ("load-document", "load-stream", "save-document", "save-stream")
+ITEM_BYTES = 150
+TRANSACTION_BYTES = 160
+
+def generate(filename, size_mb):
+    """Write a data file of roughly size_mb: 60% items, 40% transactions."""
+    items = int(size_mb * 2**20 * 0.6 / ITEM_BYTES)
+    transactions = int(size_mb * 2**20 * 0.4 / TRANSACTION_BYTES)
+    with open(filename, "w") as file:
+        write_members(file, [
+            ("items", (
+                {"id": i, "name": f"Item {i}", "quantity": i % 500, "price": float(i % 1000) + 0.99,
+                 "category": f"Category {i % 50}"}
+                for i in range(1, items + 1)
+            )),
+            ("transactions", (
+                {"time": 1_700_000_000 + i, "op": "add", "item_id": i % items + 1, "name": f"Item {i % items + 1}",
+                 "new_quantity": i % 500, "new_price": 9.99}
+                for i in range(transactions)
+            )),
+            ("seq", transactions),
+        ])
+
+def current_rss():
+    """Resident set size of this process in bytes (Linux), or 0 where unavailable."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+def peak_rss():
+    """Peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def load_document(filename):
+    inventory = Inventory()
+    with open(filename) as file:
+        data = json.load(file)
+    for item_data in data["items"]:
+        item = item_from_dict(item_data)
+        inventory.items_by_id[item.id] = item
+    inventory._recompute_aggregates()
+    inventory._index = InventoryIndex(inventory.items_by_id.values())
+    inventory.transaction_history = TransactionLog()
+    inventory.transaction_history.extend(Transaction.from_data(entry) for entry in data.get("transactions", []))
+    return inventory
+
+def save_document(inventory, filename):
+    data = {"items": [item_to_dict(item) for item in inventory.items_by_id.values()]}
+    data["history"] = list(inventory.inventory_value_history)
+    data["transactions"] = [transaction.to_dict() for transaction in inventory.transaction_history]
+    data["seq"] = inventory.version
+    with open(filename, "w") as file:
+        json.dump(data, file, indent=4)
+
+def run_mode(mode, filename):
+    """Run one mode in this process and print its measurements as JSON."""
+    start = time.perf_counter()
+    if mode == "load-document":
+        load_document(filename)
+        result = {}
+    else:
+        inventory = Inventory()
+        inventory.load_from_file(filename)
+        result = {}
+        if mode != "load-stream":
+            before = current_rss()
+            start = time.perf_counter()
+            output = filename + ".out"
+            if mode == "save-document":
+                save_document(inventory, output)
+            else:
+                inventory.save_to_file(output)
+            result["added_bytes"] = peak_rss() - before
+            os.remove(output)
+    result["seconds"] = time.perf_counter() - start
+    result["peak_bytes"] = peak_rss()
+    print(json.dumps(result))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1024)
+    parser.add_argument("--file", help="reuse or create this data file instead of a temporary one")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--run", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_mode(args.run, args.file)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = args.file or os.path.join(directory, "inventory_data.json")
+        if not os.path.exists(filename):
+            print(f"Generating {args.size_mb:g} MB data file...")
+            generate(filename, args.size_mb)
+        size = os.path.getsize(filename)
+        print(f"{filename}: {size / 2**20:,.0f} MiB")
+        print(f"{'mode':<16}{'wall s':>10}{'peak RSS MiB':>16}{'RSS / file':>12}{'save added MiB':>16}")
+        for mode in args.modes:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run", mode, "--file", filename],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            added = f"{result['added_bytes'] / 2**20:>16,.0f}" if "added_bytes" in result else f"{'':>16}"
+            print(f"{mode:<16}{result['seconds']:>10.2f}{result['peak_bytes'] / 2**20:>16,.0f}"
+                  f"{result['peak_bytes'] / size:>12.2f}{added}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Measure what a retention policy saves in snapshot cost, disk use and resident history.
+
+Generates a JSON data file holding --days of value history, a point every
+--interval minutes, and --transactions transactions spread over the same
+days. Each policy then gets its own copy, opened with open_inventory;
+the policy is applied once and the copy is reopened, and for each policy
+the benchmark times:
+
+  reopen          open_inventory on the retained files
+  snapshot        compact(), the full snapshot the compactor writes
+  recent_page     the newest page of transactions
+  oldest_page     the oldest page, which reads an archive segment once archived
+  count_item      count_transactions for one item over the whole log
+  value_history   the daily value trend over the whole history
+
+It also reports the resident value history points and transactions and
+the bytes on disk of the data file, history store and archive.
+--output, --compare and --tolerance work as in hot_paths.compare().
+
+Usage:
+  python benchmarks/retention.py [--days 365] [--interval 5] [--transactions 1000000]
+  python benchmarks/retention.py --policies "" "raw=7d,hourly=90d,transactions=30d" --compare retention.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Make the backend importable when run as a script from anywhere
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from backend.history import TIMESTAMP_FORMAT
+from backend.items import item_to_dict
+from backend.jsonstream import write_members
+from backend.retention import DAY, RetentionPolicy
+from backend.storage import open_inventory
+from benchmarks.hot_paths import compare, generate_catalog, git_revision, measure
+
+DEFAULT_POLICIES = ("", "raw=7d,hourly=90d,transactions=30d")
+
+def generate(filename, items, days, interval, transactions, categories):
+    """Write a data file with history and transactions spanning the last days, oldest first."""
+    catalog = list(generate_catalog(items, categories))
+    now = time.time()
+    start = now - days * DAY
+    points = int(days * DAY / (interval * 60))
+    names = sorted({item.category for item in catalog})
+
+    def history():
+        for point in range(points):
+            moment = start + point * interval * 60
+            total = 1_000_000.0 + point
+            yield [
+                datetime.fromtimestamp(moment).strftime(TIMESTAMP_FORMAT),
+                total,
+                {name: total / len(names) for name in names},
+            ]
+
+    def log():
+        for number in range(transactions):
+            item = catalog[number % items]
+            yield {
+                "time": int(start + number * days * DAY / transactions), "op": "update", "item_id": item.id,
+                "old_quantity": item.quantity, "new_quantity": item.quantity + 1,
+                "old_price": item.price, "new_price": item.price,
+            }
+
+    with open(filename, "w") as file:
+        write_members(file, [
+            ("items", (item_to_dict(item) for item in catalog)),
+            ("history", history()),
+            ("transactions", log()),
+            ("seq", 0),
+        ])
+
+def disk_bytes(filename):
+    """Bytes on disk of a data file and its history store, journal and archive."""
+    base = os.path.splitext(filename)[0]
+    total = 0
+    for path in (filename, base + ".journal.jsonl", base + ".history", base + ".archive"):
+        if os.path.isdir(path):
+            total += sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+        elif os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+def run_policy(source, directory, spec, args):
+    """Apply one policy to a copy of source and return its result rows and footprint."""
+    filename = os.path.join(directory, "inventory.json")
+    shutil.copy(source, filename)
+    inventory = open_inventory(filename)
+    policy = RetentionPolicy.parse(spec)
+    start = time.perf_counter()
+    applied = inventory.apply_retention(policy)
+    retention_seconds = time.perf_counter() - start
+    inventory.compact()
+    inventory.close()
+
+    def reopen(i):
+        open_inventory(filename).close()
+
+    inventory = open_inventory(filename)
+    total = inventory.count_transactions()
+    item_id = next(iter(inventory.items_by_id))
+    cases = [
+        ("reopen", reopen, 3),
+        ("snapshot", lambda i: inventory.compact(), 5),
+        ("recent_page", lambda i: inventory.transactions(offset=0, limit=50), args.ops),
+        ("oldest_page", lambda i: inventory.transactions(offset=total - 50, limit=50), args.ops),
+        ("count_item", lambda i: inventory.count_transactions(item_id=item_id), args.ops),
+        ("value_history", lambda i: inventory.value_history(bucket="1d", max_points=args.days + 1), args.ops),
+    ]
+    label = spec or "keep all"
+    rows = [
+        dict(measure(name, operation, ops, args.max_seconds, warmup=1), policy=label)
+        for name, operation, ops in cases
+    ]
+    footprint = {
+        "policy": label,
+        "retention_seconds": retention_seconds,
+        "history_points_dropped": applied["history_points_dropped"],
+        "transactions_archived": applied["transactions_archived"],
+        "history_points": len(inventory.inventory_value_history),
+        "resident_transactions": len(inventory.transaction_history),
+        "transactions": total,
+        "disk_bytes": disk_bytes(filename),
+    }
+    inventory.close()
+    return rows, footprint
+
+def print_results(results, footprints):
+    print(f"{'policy':<38}{'case':<16}{'ops':>7}{'ops/s':>13}{'p50 us':>14}{'p99 us':>14}")
+    for result in results:
+        print(f"{result['policy']:<38}{result['case']:<16}{result['ops']:>7,}"
+              f"{result['ops_per_sec']:>13,.1f}{result['p50_us']:>14,.1f}{result['p99_us']:>14,.1f}")
+    print(f"\n{'policy':<38}{'apply s':>9}{'history pts':>13}{'resident tx':>13}{'all tx':>11}{'disk MB':>10}")
+    for footprint in footprints:
+        print(f"{footprint['policy']:<38}{footprint['retention_seconds']:>9.2f}{footprint['history_points']:>13,}"
+              f"{footprint['resident_transactions']:>13,}{footprint['transactions']:>11,}"
+              f"{footprint['disk_bytes'] / 2**20:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365, help="days of history and transactions")
+    parser.add_argument("--interval", type=float, default=5, help="minutes between value history points")
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--policies", nargs="+", default=list(DEFAULT_POLICIES),
+                        help='retention specs to compare; "" keeps everything')
+    parser.add_argument("--ops", type=int, default=200, help="operations per query case")
+    parser.add_argument("--max-seconds", type=float, default=10, help="stop a case early after this long")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before a case fails")
+    args = parser.parse_args()
+
+    results = []
+    footprints = []
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "source.json")
+        print(f"Generating {args.days} days of history and {args.transactions:,} transactions...", file=sys.stderr)
+        generate(source, args.items, args.days, args.interval, args.transactions, args.categories)
+        for number, spec in enumerate(args.policies):
+            print(f"Running policy {spec or 'keep all'}...", file=sys.stderr)
+            policy_directory = os.path.join(directory, str(number))
+            os.makedirs(policy_directory)
+            rows, footprint = run_policy(source, policy_directory, spec, args)
+            results.extend(rows)
+            footprints.append(footprint)
+    print_results(results, footprints)
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime(TIMESTAMP_FORMAT),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "days": args.days,
+            "interval": args.interval,
+            "transactions": args.transactions,
+        },
+        "results": results,
+        "footprints": footprints,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.tolerance, key=("policy", "case")):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
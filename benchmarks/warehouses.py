@@ -0,0 +1,168 @@
+"""Benchmark global queries and transfers of sharded warehouses against one flat inventory.
+
+The same stock lines are stored once as a single flat inventory and once
+split over --locations warehouse shards, with each item stocked at two
+neighbouring locations. For every engine and pool size it times:
+
+  summary                global totals, category values and low-stock counts
+  get_low_stock_items    items whose total stock over all locations is low
+  total_inventory_value  the global total on its own
+  transfer               moving stock between two random locations
+
+The flat rows show what one unpartitioned inventory pays for the same
+answers. Shards are queried in parallel on --workers threads; only SQLite
+shards run truly in parallel, as sqlite3 releases the GIL during queries.
+--output, --compare and --tolerance work as in hot_paths.compare().
+
+Usage:
+  python benchmarks/warehouses.py [--size 200000] [--locations 8] [--engines json sqlite] [--workers 1 8]
+  python benchmarks/warehouses.py --compare warehouses.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Make the backend importable when run as a script from anywhere
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+
+from backend.history import TIMESTAMP_FORMAT
+from backend.inventory import Inventory
+from backend.items import Item, item_to_dict
+from backend.jsonstream import write_members
+from backend.sqlite_storage import SQLiteInventory
+from backend.warehouses import Warehouses
+from benchmarks.hot_paths import compare, generate_catalog, git_revision, measure
+
+ENGINES = ("json", "sqlite")
+
+def stock_lines(size, locations, categories, seed=0):
+    """Return ``{location: [Item]}`` with size stock lines; each item is stocked at two neighbouring locations."""
+    shards = {f"Warehouse {number}": [] for number in range(locations)}
+    names = list(shards)
+    for line, item in enumerate(generate_catalog(size, categories, seed)):
+        # Item i lives at locations i and i + 1, so ids 1..size/2 each have two stock lines
+        item_id = line // 2 + 1
+        location = names[(item_id + line % 2) % locations]
+        shards[location].append(Item(item_id, item.name, item.quantity, item.price, item.category))
+    return shards
+
+def write_shard(filename, items, engine):
+    """Write items as a data file for engine and return the opened shard."""
+    json_file = filename + ".json"
+    with open(json_file, "w") as file:
+        write_members(file, [("items", (item_to_dict(item) for item in items)), ("seq", 0)])
+    inventory = Inventory()
+    inventory.load_from_file(json_file)
+    if engine == "json":
+        return inventory
+    shard = SQLiteInventory(filename + ".db")
+    shard.import_inventory(inventory)
+    return shard
+
+def build(directory, engine, lines):
+    """Return the shard of every location and a flat inventory holding all their stock lines under distinct ids."""
+    shards = {
+        location: write_shard(os.path.join(directory, f"{engine}-{number}"), items, engine)
+        for number, (location, items) in enumerate(lines.items())
+    }
+    flat_items = (
+        Item(line_id, item.name, item.quantity, item.price, item.category)
+        for line_id, item in enumerate((item for items in lines.values() for item in items), start=1)
+    )
+    flat = write_shard(os.path.join(directory, f"{engine}-flat"), flat_items, engine)
+    return shards, flat
+
+def warehouse_cases(warehouses, lines, rng):
+    locations = warehouses.locations()
+
+    def transfer(i):
+        source, destination = rng.sample(locations, 2)
+        item_id = rng.choice(lines[source]).id
+        if warehouses.location(source).items_by_id[item_id].quantity:
+            warehouses.transfer(item_id, source, destination, 1)
+
+    yield "summary", lambda i: warehouses.summary(threshold=10)
+    yield "get_low_stock_items", lambda i: warehouses.get_low_stock_items(threshold=10)
+    yield "total_inventory_value", lambda i: warehouses.total_inventory_value()
+    yield "transfer", transfer
+
+def flat_cases(inventory):
+    def summary(i):
+        analytics = inventory.analytics()
+        return analytics.total_value, analytics.category_values, analytics.low_stock_count(10)
+
+    yield "summary", summary
+    yield "get_low_stock_items", lambda i: inventory.get_low_stock_items(threshold=10)
+    yield "total_inventory_value", lambda i: inventory.total_inventory_value()
+
+def print_results(results):
+    print(f"{'engine':<8}{'layout':<16}{'case':<24}{'ops':>7}{'ops/s':>13}{'p50 us':>14}{'p99 us':>14}")
+    for result in results:
+        print(f"{result['engine']:<8}{result['layout']:<16}{result['case']:<24}{result['ops']:>7,}"
+              f"{result['ops_per_sec']:>13,.1f}{result['p50_us']:>14,.1f}{result['p99_us']:>14,.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000, help="stock lines over all locations")
+    parser.add_argument("--locations", type=int, default=8)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count()],
+                        help="thread pool sizes to query the shards with")
+    parser.add_argument("--ops", type=int, default=200, help="operations per case")
+    parser.add_argument("--max-seconds", type=float, default=10, help="stop a case early after this long")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before a case fails")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for engine in args.engines:
+            print(f"Building {args.size:,} {engine} stock lines over {args.locations} locations...", file=sys.stderr)
+            start = time.perf_counter()
+            lines = stock_lines(args.size, args.locations, args.categories, args.seed)
+            shards, flat = build(directory, engine, lines)
+            print(f"Built in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            for name, operation in flat_cases(flat):
+                results.append(dict(measure(name, operation, args.ops, args.max_seconds, warmup=1),
+                                    engine=engine, layout="flat"))
+            for workers in sorted(set(args.workers)):
+                warehouses = Warehouses(shards, max_workers=workers)
+                for name, operation in warehouse_cases(warehouses, lines, random.Random(args.seed)):
+                    results.append(dict(measure(name, operation, args.ops, args.max_seconds, warmup=1),
+                                        engine=engine, layout=f"{args.locations} x {workers} threads"))
+            for shard in [flat, *shards.values()]:
+                shard.close()
+    print_results(results)
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime(TIMESTAMP_FORMAT),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "size": args.size,
+            "locations": args.locations,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.tolerance, key=("engine", "layout", "case")):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+# Page label -> module in this package. Each module is imported the first time the page is shown,
+# so pandas, plotly and the report workers only load for the pages that use them
+PAGES = {
+    "Inventory": "inventory",
+    "Dashboard": "dashboard",
+    "Value Trend": "value_trend",
+    "Transaction History": "transaction_history",
+    "Add Item": "add_item",
+    "Update Item": "update_item",
+    "Remove Item": "remove_item",
+    "Bulk Import": "bulk_import",
+    "Low Stock": "low_stock",
+    "Performance": "performance",
+}
@@ -0,0 +1,32 @@
+import streamlit as st
+
+from backend.inventory import Item
+
+def render(inventory, data_file):
+    """Render the Add Item page."""
+    st.header("➕ Add New Item")
+    with st.form("add_item_form"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            item_id = st.number_input("Item ID", min_value=1, step=1)
+            item_quantity = st.number_input("Quantity", min_value=0, step=1)
+        with col2:
+            item_name = st.text_input("Item Name")
+            item_price = st.number_input("Price", min_value=0.01, step=0.01)
+        with col3:
+            item_category = st.text_input("Category")
+        submit = st.form_submit_button("Add Item")
+    
+    if submit:
+        if not item_name or not item_category:
+            st.error("Name and Category are required!")
+        else:
+            try:
+                new_item = Item(item_id, item_name, item_quantity, item_price, item_category)
+                inventory.add_item(new_item)
+                inventory.save_to_file(data_file)
+                st.success("Item added successfully!")
+            except ValueError as e:
+                st.error(str(e))
+            except Exception as e:
+                st.error(f"Error adding item: {str(e)}")
@@ -0,0 +1,54 @@
+import pandas as pd
+import streamlit as st
+
+from backend.inventory import Item
+
+def render(inventory, data_file):
+    """Render the Bulk Import page."""
+    st.header("📥 Bulk Import / Bulk Adjust")
+    bulk_mode = st.radio("Mode", ["Import items", "Adjust quantities"], horizontal=True)
+    if bulk_mode == "Import items":
+        st.caption("CSV columns: id, name, quantity, price, category. Existing IDs get their quantity and price updated.")
+        required_columns = ["id", "name", "quantity", "price", "category"]
+    else:
+        st.caption("CSV columns: id, change. The signed change is added to each item's current quantity.")
+        required_columns = ["id", "change"]
+    uploaded_file = st.file_uploader("Upload CSV", type="csv")
+
+    if uploaded_file is not None:
+        try:
+            df_bulk = pd.read_csv(uploaded_file)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+            st.error(f"Could not read the CSV file: {e}")
+            return
+        df_bulk.columns = [str(column).strip().lower() for column in df_bulk.columns]
+        missing_columns = [column for column in required_columns if column not in df_bulk.columns]
+        if missing_columns:
+            st.error(f"Missing columns: {', '.join(missing_columns)}")
+        else:
+            st.dataframe(df_bulk[required_columns], use_container_width=True)
+            if st.button(f"Apply {len(df_bulk)} rows"):
+                try:
+                    ops = []
+                    # Fail instead of applying changes computed from state another session has since changed
+                    version = inventory.version
+                    if bulk_mode == "Import items":
+                        for row in df_bulk.itertuples(index=False):
+                            if int(row.id) in inventory.items_by_id:
+                                ops.append({"op": "update", "id": int(row.id), "quantity": int(row.quantity), "price": float(row.price)})
+                            else:
+                                ops.append({"op": "add", "item": Item(int(row.id), str(row.name), int(row.quantity), float(row.price), str(row.category))})
+                    else:
+                        new_quantities = {}
+                        for row in df_bulk.itertuples(index=False):
+                            item = inventory.items_by_id.get(int(row.id))
+                            current = new_quantities.get(int(row.id), item.quantity if item else 0)
+                            new_quantities[int(row.id)] = current + int(row.change)
+                        ops = [{"op": "update", "id": item_id, "quantity": quantity} for item_id, quantity in new_quantities.items()]
+                    # Validated and applied all-or-nothing, with one history point and one save
+                    inventory.apply_batch(ops, expected_version=version)
+                    inventory.save_to_file(data_file)
+                    st.success(f"Applied {len(ops)} changes.")
+                except (ValueError, OverflowError) as e:
+                    # int() of an "inf" cell overflows before the batch is validated
+                    st.error(str(e))
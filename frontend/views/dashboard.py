@@ -0,0 +1,82 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from backend import metrics
+from backend.jobs import ReportJobs
+from backend.reports import REPORT_FORMATS
+
+@st.cache_resource
+def load_report_jobs():
+    """One worker pool per server process renders reports for every session."""
+    return ReportJobs(max_workers=2)
+
+@st.fragment(run_every=1)
+def report_progress(key):
+    """Poll a running report job, rerunning the page once it is done."""
+    try:
+        if load_report_jobs().done(key):
+            st.rerun()
+    except KeyError:
+        st.rerun()  # evicted by a newer report; show_report explains
+    st.progress(load_report_jobs().progress(key), text="Generating report...")
+
+def show_report(key):
+    """Show a report job's progress, its download button or its error."""
+    try:
+        path = load_report_jobs().result(key)
+    except KeyError:
+        st.info("A newer report of this format replaced this one; generate it again.")
+        return
+    except Exception as e:
+        st.error(f"Report generation failed: {str(e)}")
+        return
+    if path is None:
+        report_progress(key)
+        return
+    file_name, mime = REPORT_FORMATS[key[0]]
+    with open(path, "rb") as file:
+        st.download_button(label=f"Download {file_name}", data=file.read(), file_name=file_name, mime=mime)
+
+def render(inventory, data_file):
+    """Render the Dashboard page."""
+    # Cached until the next mutation, so this is the same object the sidebar used
+    analytics = inventory.analytics()
+    st.markdown("<h1 class='dashboard-title'>📊 Inventory Dashboard</h1>", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown(f"<div class='metric-card'><div class='metric-title'>Total Items</div><div class='metric-value'>{analytics.total_items}</div></div>", unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"<div class='metric-card'><div class='metric-title'>Total Value</div><div class='metric-value'>Rs {analytics.total_value}</div></div>", unsafe_allow_html=True)
+    with col3:
+        st.markdown(f"<div class='metric-card'><div class='metric-title'>Low Stock Items</div><div class='metric-value'>{analytics.low_stock_count(threshold=st.session_state.low_stock_threshold)}</div></div>", unsafe_allow_html=True)
+    
+    with metrics.timer("ui.dashboard_charts"):
+        df_value = analytics.category_frame()
+    
+        fig_value = px.bar(df_value, x="Category", y="Value", title="Inventory Value by Category", color="Category")
+        fig_value.update_traces(width=0.1)
+        st.plotly_chart(fig_value, use_container_width=True)
+
+        fig_pie = px.pie(df_value, names="Category", values="Value", title="📊 Inventory Distribution by Category", hole=0.3)
+        fig_pie.update_traces(textinfo="percent+label", hoverinfo="label+value")
+        fig_pie.update_layout(plot_bgcolor="#1e1e1e", paper_bgcolor="#1e1e1e", font=dict(color="white"), title_x=0.3)
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+        df_quantity = pd.DataFrame(
+            [{"Quantity": f"{low:g}-{high:g}", "Items": count} for low, high, count in analytics.quantity_distribution(bins=10)]
+        )
+        if not df_quantity.empty:
+            fig_quantity = px.bar(df_quantity, x="Quantity", y="Items", title="📦 Stock Quantity Distribution")
+            st.plotly_chart(fig_quantity, use_container_width=True)
+
+    # Reports render in a background worker; the page stays usable while they run
+    st.subheader("📄 Reports & Exports")
+    report_labels = {"pdf": "PDF report", "csv": "CSV export", "xlsx": "Excel export"}
+    report_kind = st.selectbox("Format", list(report_labels), format_func=report_labels.get)
+    if st.button("Generate"):
+        options = {"low_stock_threshold": st.session_state.low_stock_threshold} if report_kind == "pdf" else {}
+        st.session_state.report_key = load_report_jobs().submit(report_kind, inventory, **options)
+    if "report_key" in st.session_state:
+        show_report(st.session_state.report_key)
@@ -0,0 +1,48 @@
+import math
+
+import streamlit as st
+
+from backend import metrics
+
+def render(inventory, data_file):
+    """Render the Inventory page."""
+    st.markdown("<h1 class='title'>📋 Current Inventory</h1>", unsafe_allow_html=True)
+    
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    
+    with col1:
+        search_keyword = st.text_input("🔍 Search by ID or Name", key="search", help="Type an item ID or the start of words in its name")
+    
+    with col2:
+        selected_category = st.selectbox("📂 Filter by Category", ["All"] + inventory.categories())
+    
+    with col3:
+        sort_by = st.selectbox("🔽 Sort by", ["ID", "Name", "Quantity", "Price"])
+
+    with col4:
+        page_size = st.selectbox("Per page", [25, 50, 100, 250], index=1)
+    
+    # Only the visible page is fetched, from the inventory's presorted and search indexes
+    filters = {"query": search_keyword or None, "category": None if selected_category == "All" else selected_category}
+    total_items = inventory.count_items(**filters)
+    sort_key = {"ID": "id", "Name": "name", "Quantity": "quantity", "Price": "price"}
+    
+    if total_items:
+        page_count = math.ceil(total_items / page_size)
+        page_col, order_col = st.columns([3, 1])
+        with page_col:
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+        with order_col:
+            descending = st.toggle("Descending")
+        page_items = inventory.query_items(
+            sort_by=sort_key[sort_by], descending=descending, offset=(page - 1) * page_size, limit=page_size, **filters
+        )
+        st.caption(f"Showing {(page - 1) * page_size + 1}-{(page - 1) * page_size + len(page_items)} of {total_items} items")
+        with metrics.timer("ui.inventory_table"):
+            # Imported here so an empty inventory, or another default page, starts without pandas
+            import pandas as pd
+
+            df = pd.DataFrame([{"ID": item.id, "Name": item.name, "Quantity": item.quantity, "Price": item.price, "Category": item.category} for item in page_items])
+            st.dataframe(df, use_container_width=True, hide_index=True)
+    else:
+        st.info("No items match the search/filter criteria.")
@@ -0,0 +1,64 @@
+import pandas as pd
+import streamlit as st
+
+from backend.events import rules_path
+
+def render(inventory, data_file):
+    """Render the Low Stock page."""
+    st.header("⚠️ Low Stock Alerts")
+    # Set low stock threshold
+    st.session_state.low_stock_threshold = st.number_input(
+        "Set Low Stock Threshold", 
+        min_value=1, 
+        value=st.session_state.low_stock_threshold, 
+        step=1
+    )
+    
+    # Get low-stock items
+    low_stock_items = inventory.get_low_stock_items(threshold=st.session_state.low_stock_threshold)
+    if low_stock_items:
+        st.table(pd.DataFrame([{"ID": item.id, "Name": item.name, "Quantity": item.quantity, "Category": item.category} for item in low_stock_items]))
+    else:
+        st.info("No low-stock items.")
+
+    # Rules come first so a rule saved in this run shows in the open alerts below
+    events = inventory.events
+    st.subheader("📐 Alert Rules")
+    rules = events.rules
+    st.caption(f"Default threshold: {rules.default}. Item rules override category rules, which override the default.")
+    rows = [{"Rule": f"Category {category}", "Threshold": threshold} for category, threshold in sorted(rules.categories.items())]
+    rows += [{"Rule": f"Item {item_id}", "Threshold": threshold} for item_id, threshold in sorted(rules.items.items())]
+    if rows:
+        st.table(pd.DataFrame(rows))
+    with st.form("alert_rule_form"):
+        scope = st.selectbox("Applies to", ["Default", "Category", "Item"])
+        category = st.selectbox("Category", inventory.categories() or [""])
+        item_id = st.number_input("Item ID", min_value=1, step=1)
+        threshold = st.number_input("Alert below", min_value=0, value=10, step=1)
+        col1, col2 = st.columns(2)
+        save = col1.form_submit_button("Save Rule")
+        remove = col2.form_submit_button("Remove Rule")
+
+    if save or remove:
+        try:
+            events.set_threshold(
+                threshold if save else None,
+                item_id=item_id if scope == "Item" else None,
+                category=category if scope == "Category" else None,
+            )
+            rules.save(rules_path(data_file))
+            st.success("Alert rule saved!" if save else "Alert rule removed!")
+        except ValueError as e:
+            st.error(str(e))
+
+    # Open alerts are kept up to date on every mutation, so this needs no scan
+    st.subheader("🔔 Open Alerts")
+    alerts = events.active_alerts()
+    if alerts:
+        st.table(pd.DataFrame([
+            {"ID": alert.item_id, "Name": alert.name, "Quantity": alert.quantity, "Threshold": alert.threshold,
+             "Category": alert.category}
+            for alert in alerts
+        ]))
+    else:
+        st.info("No item is below its alert threshold.")
@@ -0,0 +1,47 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from backend import metrics
+
+def render(inventory, data_file):
+    """Render the Performance page."""
+    st.header("⏱ Performance")
+    # The registry is process-wide, so this covers every session served by this process
+    metrics.registry.enabled = st.toggle(
+        "Collect metrics", value=metrics.registry.enabled,
+        help="Times inventory calls, page sections and reruns. Costs almost nothing while off."
+    )
+    timings = metrics.registry.timings()
+    if timings:
+        st.caption(f"Percentiles cover each metric's last {metrics.registry.window} calls")
+        df_timings = pd.DataFrame([
+            {
+                "Metric": name, "Calls": summary["count"], "Total s": summary["total"],
+                "Mean ms": summary["mean"] * 1000, "p50 ms": summary["p50"] * 1000,
+                "p90 ms": summary["p90"] * 1000, "p99 ms": summary["p99"] * 1000, "Max ms": summary["max"] * 1000,
+            }
+            for name, summary in timings.items()
+        ]).sort_values("Total s", ascending=False)
+        st.dataframe(df_timings, use_container_width=True, hide_index=True)
+
+        selected_metric = st.selectbox("📊 Latency histogram", df_timings["Metric"])
+        df_samples = pd.DataFrame({"Milliseconds": [sample * 1000 for sample in metrics.registry.samples(selected_metric)]})
+        fig_samples = px.histogram(df_samples, x="Milliseconds", nbins=50, title=f"{selected_metric} (last {len(df_samples)} calls)")
+        st.plotly_chart(fig_samples, use_container_width=True)
+    else:
+        st.info("No timings recorded yet." if metrics.registry.enabled else "Turn on collection and use the app to record timings.")
+
+    counters = metrics.registry.counters()
+    if counters:
+        st.table(pd.DataFrame(list(counters.items()), columns=["Counter", "Value"]))
+    if st.button("Reset Metrics"):
+        metrics.registry.reset()
+        st.rerun()
+
+    st.subheader("🔬 Profile a Rerun")
+    st.caption("Profiles the next rerun of this session with cProfile, e.g. after switching to a slow page, then shows it here.")
+    if st.button("Profile Next Rerun"):
+        st.session_state.profile_next_rerun = True
+    if "profile_report" in st.session_state:
+        st.code(st.session_state.profile_report, language=None)
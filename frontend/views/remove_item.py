@@ -0,0 +1,16 @@
+import streamlit as st
+
+def render(inventory, data_file):
+    """Render the Remove Item page."""
+    st.header("❌ Remove Item")
+    with st.form("remove_item_form"):
+        item_id = st.number_input("Item ID", min_value=1, step=1)
+        submit = st.form_submit_button("Remove Item")
+    
+    if submit:
+        try:
+            inventory.remove_item(item_id)
+            inventory.save_to_file(data_file)
+            st.success("Item removed successfully!")
+        except ValueError as e:
+            st.error(str(e))
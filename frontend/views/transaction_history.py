@@ -0,0 +1,35 @@
+import math
+
+import streamlit as st
+
+def render(inventory, data_file):
+    """Render the Transaction History page."""
+    st.markdown(
+        "<h1 style='text-align: center; color: #f8f9fa;'>📜 Transaction History</h1>", 
+        unsafe_allow_html=True
+    )
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        item_filter = st.text_input("🔍 Filter by Item ID", help="Leave empty to show all items")
+    with col2:
+        page_size = st.selectbox("Per page", [25, 50, 100], index=1)
+    filter_id = int(item_filter) if item_filter.strip().isdigit() else None
+    total_transactions = inventory.count_transactions(item_id=filter_id)
+
+    if total_transactions:
+        # Only the visible page is fetched and formatted
+        page_count = math.ceil(total_transactions / page_size)
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+        st.caption(f"Showing {total_transactions} transactions, newest first")
+        for transaction in inventory.transactions(offset=(page - 1) * page_size, limit=page_size, item_id=filter_id):
+            st.markdown(
+                f"""
+                <div class="transaction-box">
+                    <span class="timestamp">{transaction.timestamp}</span><br>
+                    {transaction.message}
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+    else:
+        st.info("No transactions recorded.")
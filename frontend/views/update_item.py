@@ -0,0 +1,18 @@
+import streamlit as st
+
+def render(inventory, data_file):
+    """Render the Update Item page."""
+    st.header("🔄 Update Item")
+    with st.form("update_item_form"):
+        item_id = st.number_input("Item ID", min_value=1, step=1)
+        new_quantity = st.number_input("New Quantity", min_value=0, step=1)
+        new_price = st.number_input("New Price", min_value=0.01, step=0.01)
+        submit = st.form_submit_button("Update Item")
+    
+    if submit:
+        try:
+            inventory.update_item(item_id, new_quantity=new_quantity, new_price=new_price)
+            inventory.save_to_file(data_file)
+            st.success("Item updated successfully!")
+        except ValueError as e:
+            st.error(str(e))
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from backend import metrics
+
+def render(inventory, data_file):
+    """Render the Value Trend page."""
+    st.header("📈 Inventory Value Trend")
+    time_range = st.selectbox("🕒 Time Range", ["All Time", "Last 24 Hours", "Last 7 Days", "Last 30 Days"])
+    range_days = {"All Time": None, "Last 24 Hours": 1, "Last 7 Days": 7, "Last 30 Days": 30}[time_range]
+    start = None if range_days is None else datetime.now() - timedelta(days=range_days)
+    # Bucketed points come from the backend rollups, so the chart size is bounded
+    value_points = inventory.value_history(start=start, bucket="auto", agg="last")
+    if value_points:
+        df = pd.DataFrame(
+            [
+                {"Timestamp": timestamp, "Category": category, "Value": value}
+                for timestamp, _, category_values in value_points
+                for category, value in category_values.items()
+            ]
+        )
+        if not df.empty:
+            with metrics.timer("ui.value_trend_chart"):
+                fig = px.area(df, x="Timestamp", y="Value", color="Category", title="Inventory Value Over Time by Category")
+                fig.update_layout(xaxis_title="Time", yaxis_title="Inventory Value", xaxis_tickangle=45)
+                st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No category data available for inventory value trend.")
+    else:
+        st.info("No data available for inventory value trend.")
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from backend.inventory import Inventory
+from backend.items import Item
+from backend.sqlite_storage import SQLiteInventory
+
+CATEGORIES = ("Tools", "Garden", "Kitchen", "Toys")
+
+@pytest.fixture(params=["dict", "compact", "sqlite"])
+def inventory(request, tmp_path):
+    if request.param == "sqlite":
+        inventory = SQLiteInventory(str(tmp_path / "inventory.db"))
+        yield inventory
+        inventory.close()
+    else:
+        yield Inventory(compact_storage=request.param == "compact")
+
+def random_op(rng, ids, next_id):
+    """Return a random valid op against ids, updating ids as the op would."""
+    choice = rng.random()
+    if not ids or choice < 0.4:
+        ids.add(next_id)
+        item = Item(next_id, f"item {next_id}", rng.randint(0, 50), round(rng.uniform(0.5, 100), 2), rng.choice(CATEGORIES))
+        return {"op": "add", "item": item}
+    item_id = rng.choice(sorted(ids))
+    if choice < 0.55:
+        ids.discard(item_id)
+        return {"op": "remove", "id": item_id}
+    quantity = rng.choice([None, rng.randint(0, 50)])
+    price = rng.choice([None, round(rng.uniform(0.5, 100), 2)])
+    return {"op": "update", "id": item_id, "quantity": quantity, "price": price}
+
+def apply(inventory, op):
+    if op["op"] == "add":
+        inventory.add_item(op["item"])
+    elif op["op"] == "remove":
+        inventory.remove_item(op["id"])
+    else:
+        inventory.update_item(op["id"], op["quantity"], op["price"])
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_mutations_keep_aggregates(inventory, seed):
+    rng = random.Random(seed)
+    ids = set()
+    for step in range(300):
+        if rng.random() < 0.1:
+            ops = [random_op(rng, ids, 1000 * step + number) for number in range(rng.randint(1, 8))]
+            inventory.apply_batch(ops)
+        else:
+            apply(inventory, random_op(rng, ids, 1000 * step))
+        assert inventory.verify_aggregates(), f"aggregates drifted at step {step}"
+    assert inventory.existing_ids(range(1000 * 300)) == ids
+
+def test_rejected_batch_keeps_aggregates(inventory):
+    inventory.add_item(Item(1, "Hammer", 5, 10.0, "Tools"))
+    with pytest.raises(ValueError):
+        inventory.apply_batch([
+            {"op": "update", "id": 1, "quantity": 7, "price": None},
+            {"op": "remove", "id": 2},
+        ])
+    assert inventory.verify_aggregates()
+    assert inventory.total_inventory_value() == 50.0
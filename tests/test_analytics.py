@@ -0,0 +1,67 @@
+import pytest
+
+from backend.analytics import StaleAnalyticsError
+from backend.inventory import Inventory
+from backend.items import Item
+from backend.sqlite_storage import SQLiteInventory
+
+@pytest.fixture(params=["memory", "sqlite"])
+def inventory(request, tmp_path):
+    if request.param == "sqlite":
+        inventory = SQLiteInventory(str(tmp_path / "inventory.db"))
+        yield inventory
+        inventory.close()
+    else:
+        yield Inventory()
+
+def add(inventory, quantities):
+    inventory.apply_batch([
+        {"op": "add", "item": Item(item_id, f"item {item_id}", quantity, 2.0, "Tools")}
+        for item_id, quantity in enumerate(quantities, start=1)
+    ])
+
+@pytest.mark.parametrize("quantities", [[5], [0, 1, 3], [2, 2, 4, 9], list(range(0, 700, 7))])
+def test_quantity_distribution_covers_every_item_once(inventory, quantities):
+    add(inventory, quantities)
+    distribution = inventory.analytics().quantity_distribution(bins=10)
+    edges = [low for low, _, _ in distribution] + [distribution[-1][1]]
+    assert edges == sorted(edges)
+    assert edges[0] == min(quantities) and edges[-1] == max(quantities)
+    assert sum(count for _, _, count in distribution) == len(quantities)
+    assert len(distribution) <= 10
+
+def test_kept_analytics_answer_for_their_version(inventory):
+    add(inventory, [1, 2, 30])
+    analytics = inventory.analytics()
+    assert analytics.low_stock_count(10) == 2
+    inventory.update_item(3, new_quantity=0)
+    inventory.remove_item(1)
+    assert analytics.low_stock_count(10) == 2
+    assert sum(count for _, _, count in analytics.quantity_distribution()) == 3
+    assert inventory.analytics().low_stock_count(10) == 2
+    assert inventory.analytics().total_items == 2
+    with pytest.raises(StaleAnalyticsError):
+        analytics.columns()
+
+def test_sqlite_analytics_read_after_a_commit_are_stale(tmp_path):
+    inventory = SQLiteInventory(str(tmp_path / "inventory.db"))
+    add(inventory, [1, 2, 30])
+    analytics = inventory.analytics()
+    inventory.update_item(3, new_quantity=0)
+    with pytest.raises(StaleAnalyticsError):
+        analytics.low_stock_count(10)
+    inventory.close()
+
+def test_quantity_index_is_copied_only_for_kept_analytics():
+    inventory = Inventory()
+    add(inventory, [1, 2, 30])
+    quantities = inventory.analytics()._quantity_index
+    assert quantities is inventory._index.by_quantity
+    inventory.update_item(3, new_quantity=0)
+    # Nothing kept the analytics, so the index changed its list in place
+    assert inventory._index.by_quantity is quantities
+
+    kept = inventory.analytics()
+    inventory.update_item(3, new_quantity=40)
+    assert inventory._index.by_quantity is not kept._quantity_index
+    assert kept._quantity_index == [(0, 3), (1, 1), (2, 2)]
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.api import create_app
+from backend.inventory import Inventory
+from backend.items import Item
+
+def request(app, method, path, body=None):
+    """Send one request straight to the ASGI app; return ``(status, decoded JSON body)``."""
+    payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "http",
+        "method": method, "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"test"), (b"content-type", b"application/json")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], json.loads(b"".join(message.get("body", b"") for message in sent[1:]))
+
+@pytest.fixture
+def inventory():
+    inventory = Inventory()
+    inventory.add_item(Item(1, "Hammer", 5, 10.0, "Tools"))
+    return inventory
+
+@pytest.fixture
+def app(inventory):
+    return create_app(inventory)
+
+def item_body(quantity):
+    return b'{"id": 2, "name": "Rake", "quantity": %s, "price": 20.0, "category": "Garden"}' % quantity
+
+BAD_QUANTITIES = [b"5.5", b"true", b"NaN", b"Infinity", b"-Infinity", b"1e400", b'"5"', b"null"]
+
+def test_add_accepts_an_integral_float_quantity_as_int(app, inventory):
+    status, body = request(app, "POST", "/items", item_body(b"5.0"))
+    assert status == 201
+    assert body["item"]["quantity"] == 5
+    assert type(inventory.items_by_id[2].quantity) is int
+
+@pytest.mark.parametrize("quantity", BAD_QUANTITIES)
+def test_add_rejects_quantities_that_are_not_whole_numbers(app, inventory, quantity):
+    status, body = request(app, "POST", "/items", item_body(quantity))
+    assert status == 400 and "quantity" in body["error"]
+    assert 2 not in inventory.items_by_id
+    assert inventory.version == 1
+
+def test_update_accepts_an_integral_float_quantity_as_int(app, inventory):
+    status, _ = request(app, "PATCH", "/items/1", b'{"quantity": 7.0}')
+    assert status == 200
+    assert inventory.items_by_id[1].quantity == 7
+    assert type(inventory.items_by_id[1].quantity) is int
+
+@pytest.mark.parametrize("quantity", [value for value in BAD_QUANTITIES if value != b"null"])
+def test_update_rejects_quantities_that_are_not_whole_numbers(app, inventory, quantity):
+    status, _ = request(app, "PATCH", "/items/1", b'{"quantity": %s}' % quantity)
+    assert status == 400
+    assert inventory.items_by_id[1].quantity == 5
+    assert inventory.version == 1
+
+def test_batch_with_a_bad_quantity_applies_nothing(app, inventory):
+    body = b'{"ops": [{"op": "update", "id": 1, "quantity": 2}, {"op": "update", "id": 1, "quantity": 2.5}]}'
+    status, _ = request(app, "POST", "/batch", body)
+    assert status == 400
+    assert inventory.items_by_id[1].quantity == 5
+    assert inventory.version == 1
@@ -0,0 +1,126 @@
+import copy
+import multiprocessing
+import threading
+from datetime import datetime
+
+import pytest
+
+from backend.inventory import Inventory
+from backend.items import Item
+from backend.locks import ReadWriteLock
+
+def journalled(filename):
+    inventory = Inventory()
+    inventory.enable_journal(filename)
+    inventory.load_from_file(filename)
+    return inventory
+
+def snapshot(inventory):
+    index = inventory._index
+    return copy.deepcopy((
+        dict(inventory.items_by_id),
+        inventory.total_inventory_value(),
+        inventory._category_values,
+        inventory._category_counts,
+        index.ids_by_category,
+        index.by_quantity,
+        index.by_token,
+        index.orders,
+        inventory.version,
+        inventory.count_transactions(),
+    ))
+
+@pytest.mark.parametrize("item", [Item(9, None, 5, 1.0, "Tools"), Item(9, "Saw", None, 1.0, "Tools")])
+def test_rejected_add_leaves_indexes_and_totals_unchanged(item):
+    inventory = Inventory()
+    inventory.add_item(Item(1, "Hammer", 5, 10.0, "Tools"))
+    inventory.query_items(sort_by="price")
+    before = snapshot(inventory)
+    with pytest.raises(ValueError):
+        inventory.add_item(item)
+    assert snapshot(inventory) == before
+    # Below validation too, the index rejects the item before anything else changes
+    with pytest.raises((AttributeError, TypeError)):
+        inventory._apply_add(item, int(datetime.now().timestamp()))
+    assert snapshot(inventory) == before
+    assert inventory.verify_aggregates()
+
+def test_threads_share_one_inventory():
+    inventory = Inventory()
+    inventory.apply_batch([{"op": "add", "item": Item(i, f"item {i}", 50, 1.0, "Tools")} for i in range(1, 11)])
+
+    def worker(number):
+        for step in range(200):
+            inventory.update_item(1 + (number + step) % 10, new_quantity=step % 40)
+            inventory.analytics().low_stock_count(10)
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert inventory.version == 1 + 4 * 200
+    assert inventory.verify_aggregates()
+
+def test_instances_sharing_a_journal_catch_up(tmp_path):
+    filename = str(tmp_path / "inventory.json")
+    first, second = journalled(filename), journalled(filename)
+    first.add_item(Item(1, "Hammer", 5, 10.0, "Tools"))
+    # A commit first applies what the other instance journalled
+    second.add_item(Item(2, "Rake", 3, 20.0, "Garden"))
+    assert sorted(second.items_by_id) == [1, 2]
+    first.refresh()
+    assert sorted(first.items_by_id) == [1, 2]
+    assert first.version == second.version == 2
+    second.compact()
+    first.update_item(2, new_quantity=7)
+    reloaded = journalled(filename)
+    assert reloaded.items_by_id[2].quantity == 7
+    assert reloaded.version == 3
+    assert reloaded.verify_aggregates()
+
+def add_items(filename, first_id, count):
+    inventory = journalled(filename)
+    for item_id in range(first_id, first_id + count):
+        inventory.add_item(Item(item_id, f"item {item_id}", 1, 1.0, "Tools"))
+
+def test_processes_sharing_a_journal_lose_nothing(tmp_path):
+    filename = str(tmp_path / "inventory.json")
+    processes = [
+        multiprocessing.Process(target=add_items, args=(filename, 1000 * number, 25))
+        for number in range(1, 5)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    inventory = journalled(filename)
+    assert len(inventory.items_by_id) == 100
+    assert inventory.version == 100
+    assert inventory.count_transactions() == 100
+
+def test_read_write_lock_is_reentrant_and_refuses_upgrades():
+    lock = ReadWriteLock()
+    with lock.write(), lock.write(), lock.read():
+        pass
+    with lock.read(), lock.read():
+        with pytest.raises(RuntimeError):
+            with lock.write():
+                pass
+
+def test_writer_waits_for_readers():
+    lock = ReadWriteLock()
+    events = []
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    with lock.read():
+        thread = threading.Thread(target=writer)
+        thread.start()
+        thread.join(0.1)
+        events.append("read done")
+    thread.join()
+    assert events == ["read done", "write"]
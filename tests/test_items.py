@@ -0,0 +1,40 @@
+import pytest
+
+from backend.inventory import MAX_QUANTITY, Inventory
+from backend.items import Item, ItemTable
+
+def test_item_table_round_trips_items():
+    items = [Item(1, "Hammer", 5, 10.0, "Tools"), Item(2, "Rake", 3, 20.0, "Garden"), Item(3, "Saw", 0, 15.5, "Tools")]
+    table = ItemTable(items)
+    assert sorted(table.values(), key=lambda item: item.id) == items
+    del table[1]
+    assert 1 not in table
+    assert table[3] == items[2]
+    table[2] = Item(2, "Rake", 9, 21.0, "Garden")
+    assert table[2].quantity == 9
+
+@pytest.mark.parametrize("compact_storage", [False, True])
+@pytest.mark.parametrize("quantity", [5.0, 5.5, True, "5", None, MAX_QUANTITY + 1])
+def test_add_rejects_quantities_that_are_not_int64(compact_storage, quantity):
+    inventory = Inventory(compact_storage=compact_storage)
+    with pytest.raises(ValueError):
+        inventory.add_item(Item(1, "Hammer", quantity, 10.0, "Tools"))
+    assert inventory.version == 0
+    assert len(inventory.items_by_id) == 0
+    assert inventory.count_transactions() == 0
+
+@pytest.mark.parametrize("compact_storage", [False, True])
+@pytest.mark.parametrize("quantity", [5.0, False, MAX_QUANTITY + 1])
+def test_update_rejects_quantities_that_are_not_int64(compact_storage, quantity):
+    inventory = Inventory(compact_storage=compact_storage)
+    inventory.add_item(Item(1, "Hammer", 5, 10.0, "Tools"))
+    with pytest.raises(ValueError):
+        inventory.update_item(1, new_quantity=quantity)
+    assert inventory.version == 1
+    assert inventory.items_by_id[1].quantity == 5
+    assert type(inventory.items_by_id[1].quantity) is int
+
+def test_compact_storage_accepts_the_largest_quantity():
+    inventory = Inventory(compact_storage=True)
+    inventory.add_item(Item(1, "Hammer", MAX_QUANTITY, 10.0, "Tools"))
+    assert inventory.items_by_id[1].quantity == MAX_QUANTITY
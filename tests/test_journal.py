@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from backend.inventory import Inventory
+from backend.items import Item, item_to_dict
+from backend.journal import Journal, journal_path
+
+def journalled(filename, compact_storage=False):
+    inventory = Inventory(compact_storage=compact_storage)
+    inventory.enable_journal(filename)
+    inventory.load_from_file(filename)
+    return inventory
+
+def state(inventory):
+    items = sorted((item_to_dict(item) for item in inventory.items_by_id.values()), key=lambda item: item["id"])
+    return items, inventory.version, inventory.total_inventory_value(), inventory.count_transactions()
+
+@pytest.fixture
+def filename(tmp_path):
+    return str(tmp_path / "inventory.json")
+
+def populate(inventory):
+    inventory.add_item(Item(1, "Hammer", 5, 10.0, "Tools"))
+    inventory.add_item(Item(2, "Rake", 3, 20.0, "Garden"))
+    inventory.update_item(1, new_quantity=8)
+    inventory.apply_batch([
+        {"op": "add", "item": Item(3, "Trowel", 12, 4.5, "Garden")},
+        {"op": "remove", "id": 2},
+    ])
+
+@pytest.mark.parametrize("compact_storage", [False, True])
+def test_journal_replay_restores_state(filename, compact_storage):
+    inventory = journalled(filename, compact_storage)
+    populate(inventory)
+    assert not os.path.exists(filename)
+    reloaded = journalled(filename, compact_storage)
+    assert state(reloaded) == state(inventory)
+    assert reloaded.verify_aggregates()
+
+def test_replay_skips_records_already_in_snapshot(filename):
+    inventory = journalled(filename)
+    populate(inventory)
+    # A crash between writing the compacted snapshot and truncating the journal
+    inventory._write_snapshot(filename)
+    reloaded = journalled(filename)
+    assert state(reloaded) == state(inventory)
+
+def test_torn_trailing_record_is_ignored(filename):
+    inventory = journalled(filename)
+    populate(inventory)
+    with open(journal_path(filename), "ab") as file:
+        file.write(b'{"op":"remove","id":1,"se')
+    reloaded = journalled(filename)
+    assert state(reloaded) == state(inventory)
+    reloaded.update_item(3, new_quantity=1)
+    assert state(journalled(filename)) == state(reloaded)
+
+@pytest.mark.parametrize("item", [
+    Item(4, None, 5, 1.0, "Tools"),
+    Item(4, "Saw", 5, 1.0, None),
+    Item("4", "Saw", 5, 1.0, "Tools"),
+    Item(4, "Saw", "5", 1.0, "Tools"),
+    Item(4, "Saw", True, 1.0, "Tools"),
+    Item(4, "Saw", 5, "1.0", "Tools"),
+    Item(4, "Saw", 5, float("nan"), "Tools"),
+])
+def test_invalid_item_changes_nothing(filename, item):
+    inventory = journalled(filename)
+    populate(inventory)
+    before = state(inventory)
+    journal_size = os.path.getsize(journal_path(filename))
+    with pytest.raises(ValueError):
+        inventory.add_item(item)
+    assert state(inventory) == before
+    assert os.path.getsize(journal_path(filename)) == journal_size
+    assert state(journalled(filename)) == before
+
+def test_failed_journal_write_is_rolled_back(filename, monkeypatch):
+    inventory = journalled(filename)
+    populate(inventory)
+    before = state(inventory)
+    append = Journal.append
+
+    def torn_append(journal, record):
+        with open(journal.path, "ab") as file:
+            file.write(b'{"op":"add"')
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(Journal, "append", torn_append)
+    with pytest.raises(OSError):
+        inventory.add_item(Item(4, "Saw", 5, 1.0, "Tools"))
+    assert state(inventory) == before
+    assert inventory.verify_aggregates()
+
+    monkeypatch.setattr(Journal, "append", append)
+    inventory.add_item(Item(5, "Drill", 2, 60.0, "Tools"))
+    assert state(journalled(filename)) == state(inventory)
+
+def test_failed_apply_is_not_journalled(filename, monkeypatch):
+    inventory = journalled(filename)
+    populate(inventory)
+    before = state(inventory)
+    journal_size = os.path.getsize(journal_path(filename))
+    apply_update = inventory._apply_update
+
+    def failing_update(*args):
+        # Fail once; the rollback replays the journal through this method too
+        monkeypatch.setattr(inventory, "_apply_update", apply_update)
+        raise RuntimeError("apply failed")
+
+    # The add is applied before the update fails, and must be undone with it
+    monkeypatch.setattr(inventory, "_apply_update", failing_update)
+    with pytest.raises(RuntimeError):
+        inventory.apply_batch([
+            {"op": "add", "item": Item(4, "Saw", 5, 1.0, "Tools")},
+            {"op": "update", "id": 1, "quantity": 2, "price": None},
+        ])
+    assert state(inventory) == before
+    assert inventory.verify_aggregates()
+    assert os.path.getsize(journal_path(filename)) == journal_size
@@ -0,0 +1,49 @@
+import io
+import json
+
+import pytest
+
+from backend.jsonstream import iter_members, write_members
+
+DOCUMENT = {
+    "items": [
+        {"id": 1, "name": "Hammer \"claw\" é", "quantity": 12, "price": 10.5, "category": "Tools"},
+        {"id": 22, "name": "Rake", "quantity": 0, "price": 1e-3, "category": "Garden"},
+    ],
+    "numbers": [1.5, -2, 300, -4.25e-7, 6E+10, 0, -0.5, 123456789012345678],
+    "literals": [True, False, None, "", [], {}],
+    "history": [["2024-01-01 00:00:00", 1234.5, {"Tools": 1234.5}]],
+    "empty": [],
+    "seq": 42,
+    "ratio": -0.125,
+}
+
+def decode(text, chunk_size):
+    return {
+        key: value if isinstance(value, (int, float, str, dict)) or value is None else list(value)
+        for key, value in iter_members(io.StringIO(text), chunk_size)
+    }
+
+@pytest.mark.parametrize("chunk_size", list(range(1, 17)) + [31, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 4])
+def test_members_decode_at_every_chunk_size(chunk_size, indent):
+    text = json.dumps(DOCUMENT, indent=indent)
+    assert decode(text, chunk_size) == DOCUMENT
+
+@pytest.mark.parametrize("chunk_size", range(1, 8))
+def test_number_split_at_a_chunk_boundary(chunk_size):
+    assert decode('{"a": [1.5, -2]}', chunk_size) == {"a": [1.5, -2]}
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1 << 20])
+@pytest.mark.parametrize("text", ['{"a": [1, 2', '{"a": [1 2]}', '{"a": 1.5.5}', '{"a": [tru]}'])
+def test_malformed_documents_raise(chunk_size, text):
+    with pytest.raises(json.JSONDecodeError):
+        decode(text, chunk_size)
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+def test_write_members_round_trips(chunk_size):
+    file = io.StringIO()
+    write_members(file, [(key, iter(value) if isinstance(value, list) else value) for key, value in DOCUMENT.items()])
+    assert json.loads(file.getvalue()) == DOCUMENT
+    assert file.getvalue() == json.dumps(DOCUMENT, indent=4)
+    assert decode(file.getvalue(), chunk_size) == DOCUMENT
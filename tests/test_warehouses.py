@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from backend.inventory import Inventory
+from backend.items import Item
+from backend.sqlite_storage import SQLiteInventory
+from backend.warehouses import Warehouses
+
+def open_shard(engine, filename):
+    return SQLiteInventory(filename) if engine == "sqlite" else Inventory()
+
+@pytest.fixture(params=["memory", "sqlite", "mixed"])
+def warehouses(request, tmp_path):
+    rng = random.Random(7)
+    shards = {}
+    for number in range(4):
+        engine = "sqlite" if request.param == "sqlite" or (request.param == "mixed" and number % 2) else "memory"
+        shard = open_shard(engine, str(tmp_path / f"{number}.db"))
+        # Each item is stocked at a random subset of the locations
+        shard.apply_batch([
+            {"op": "add", "item": Item(item_id, f"item {item_id}", rng.randrange(15), 1.0 + item_id, "Tools")}
+            for item_id in range(1, 200)
+            if rng.random() < 0.5
+        ])
+        shards[f"Warehouse {number}"] = shard
+    warehouses = Warehouses(shards, max_workers=4)
+    yield warehouses
+    warehouses.close()
+
+def expected_low_stock(warehouses, threshold):
+    totals = {}
+    for shard in warehouses.shards.values():
+        for item in shard.items_by_id.values():
+            totals[item.id] = totals.get(item.id, 0) + item.quantity
+    return sorted((quantity, item_id) for item_id, quantity in totals.items() if quantity < threshold)
+
+@pytest.mark.parametrize("threshold", [0, 1, 5, 10, 20, 100])
+def test_low_stock_items_total_every_location(warehouses, threshold):
+    items = warehouses.get_low_stock_items(threshold)
+    assert [(item.quantity, item.id) for item in items] == expected_low_stock(warehouses, threshold)
+    for item in items:
+        assert item.name == f"item {item.id}" and item.price == 1.0 + item.id
+
+def test_low_stock_items_follow_transfers(warehouses):
+    rng = random.Random(3)
+    locations = warehouses.locations()
+    for _ in range(50):
+        source, destination = rng.sample(locations, 2)
+        stocked = [item for item in warehouses.location(source).items_by_id.values() if item.quantity]
+        if stocked:
+            item = rng.choice(stocked)
+            warehouses.transfer(item.id, source, destination, rng.randint(1, item.quantity))
+    items = warehouses.get_low_stock_items(10)
+    assert [(item.quantity, item.id) for item in items] == expected_low_stock(warehouses, 10)
+
+@pytest.mark.parametrize("quantity", [0, -1, 1.0, 2.5, True, "1"])
+def test_transfer_rejects_quantities_that_are_not_positive_integers(warehouses, quantity):
+    source, destination = warehouses.locations()[:2]
+    item = next(iter(warehouses.location(source).items_by_id.values()))
+    with pytest.raises(ValueError):
+        warehouses.transfer(item.id, source, destination, quantity)
+    assert warehouses.location(source).items_by_id[item.id] == item